@@ -0,0 +1,96 @@
+"""Benchmark of the alias backends (setting `alias-backend`).
+
+Measures the cost of looking up existing aliases and inserting new ones as the
+database grows, for the `json` backend (indexed in memory, with journal) and
+the `sqlite` backend.
+
+Usage: python benchmarks/alias_backends.py [max-rows]
+"""
+from pathlib import Path
+import sys
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Use the settings of the tests, so the user's settings are not needed
+from tests.conftest import pytest_configure  # noqa: E402 isort:skip
+
+pytest_configure()
+
+from vcm.downloader.alias import Alias, AliasEntry  # noqa: E402 isort:skip
+from vcm.downloader.alias import SqliteAlias  # noqa: E402 isort:skip
+from vcm.settings import settings  # noqa: E402 isort:skip
+
+OPERATIONS = 1000
+
+
+def fill(size, start=0):
+    for index in range(start, size):
+        yield f"id-{index}", f"/university/subject/section/file {index}.pdf"
+
+
+def benchmark_json(folder: Path, size: int):
+    settings["root-folder"] = folder.as_posix()
+    settings["alias-backend"] = "json"
+    Alias._instance = None
+
+    alias = Alias()
+    for id_, original in fill(size):
+        alias._add_entry(AliasEntry(id_, original))
+    alias.save()
+
+    # Measure the operations, not the initial load of the file
+    Alias._instance = None
+    Alias()
+    return run_operations(Alias.id_to_alias, size)
+
+
+def benchmark_sqlite(folder: Path, size: int):
+    settings["root-folder"] = folder.as_posix()
+    settings["alias-backend"] = "sqlite"
+    Alias._instance = None
+    SqliteAlias._instance = None
+
+    database = SqliteAlias(folder / "alias.sqlite3")
+    with database.connection:
+        database.connection.executemany(
+            "INSERT INTO alias (id, alias) VALUES (?, ?)", fill(size)
+        )
+
+    result = run_operations(Alias.id_to_alias, size)
+    database.connection.close()
+    SqliteAlias._instance = None
+    return result
+
+
+def run_operations(id_to_alias, size):
+    step = max(size // OPERATIONS, 1)
+    start = perf_counter()
+    for index in range(0, size, step):
+        id_to_alias(f"id-{index}", "unused")
+    lookup = (perf_counter() - start) / len(range(0, size, step))
+
+    start = perf_counter()
+    for id_, original in fill(size + OPERATIONS, size):
+        id_to_alias(id_, original)
+    Alias.commit()
+    insert = (perf_counter() - start) / OPERATIONS
+
+    return lookup, insert
+
+
+def main():
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    sizes = [size for size in (1_000, 10_000, 100_000) if size <= max_rows]
+
+    print(f"{'backend':8} {'rows':>8} {'lookup (us)':>12} {'insert (us)':>12}")
+    for size in sizes:
+        for name, function in (("json", benchmark_json), ("sqlite", benchmark_sqlite)):
+            with TemporaryDirectory() as folder:
+                lookup, insert = function(Path(folder), size)
+            print(f"{name:8} {size:8} {lookup * 1e6:12.1f} {insert * 1e6:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
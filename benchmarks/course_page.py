@@ -0,0 +1,128 @@
+"""Benchmark of the extraction of the links of a course page.
+
+Builds a synthetic course page with many activities and compares the time
+needed to find the section of every activity with the previous algorithm
+(`find_parent` + `find` for each activity) and with `Subject.index_sections`
+(a single traversal), checking that both find the same sections.
+
+Usage: python benchmarks/course_page.py [activities] [sections]
+"""
+from pathlib import Path
+import sys
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Use the settings of the tests, so the user's settings are not needed
+from tests.conftest import pytest_configure  # noqa: E402 isort:skip
+
+pytest_configure()
+
+from bs4 import BeautifulSoup  # noqa: E402 isort:skip
+from vcm.core.utils import get_html_parser  # noqa: E402 isort:skip
+from vcm.downloader.subject import Subject  # noqa: E402 isort:skip
+
+MODULES = ("resource", "forum", "page", "url", "assign", "quiz", "folder")
+
+ACTIVITY = """
+<li class="activity {module} modtype_{module}" id="module-{id}">
+  <div><div class="mod-indent-outer"><div class="mod-indent"></div><div>
+    <div class="activityinstance">
+      <a href="https://campusvirtual.uva.es/mod/{module}/view.php?id={id}">
+        <img src="https://campusvirtual.uva.es/icon.svg" class="iconlarge">
+        <span class="instancename">Activity {id}<span class="accesshide">
+          {module}</span></span>
+      </a>
+    </div>
+  </div></div></div>
+</li>
+"""
+
+SECTION = """
+<li id="section-{number}" class="section main clearfix">
+  <div class="content">
+    <h3 class="sectionname"><span><a href="{url}#section-{number}">Section
+      {number}</a></span></h3>
+    <ul class="section img-text">{activities}</ul>
+  </div>
+</li>
+"""
+
+
+def create_course_page(nactivities, nsections):
+    url = "https://campusvirtual.uva.es/course/view.php?id=1"
+    sections = []
+    for number in range(nsections):
+        activities = "".join(
+            ACTIVITY.format(module=MODULES[id_ % len(MODULES)], id=id_)
+            for id_ in range(number, nactivities, nsections)
+        )
+        sections.append(SECTION.format(number=number, url=url, activities=activities))
+
+    return (
+        "<html><head><title>Course</title></head><body><div id='page'>"
+        "<ul class='topics'>%s</ul></div></body></html>" % "".join(sections)
+    )
+
+
+def find_sections_legacy(soup):
+    _ = [x.extract() for x in soup.find_all("span", {"class": "accesshide"})]
+    _ = [x.extract() for x in soup.find_all("div", {"class": "mod-indent"})]
+
+    sections = []
+    for activity in soup.find_all("div", class_="activityinstance"):
+        header = activity.find_parent("li", class_="section main clearfix").find(
+            "h3", class_="sectionname"
+        )
+        sections.append((header.text, activity.a.span.text))
+    return sections
+
+
+def find_sections_indexed(soup):
+    sections = []
+    for header, elements in Subject.index_sections(soup):
+        for activity in elements:
+            sections.append((header.text, activity.a.span.text))
+    return sections
+
+
+def benchmark(function, page, parse_only=None):
+    parser = get_html_parser("lxml")
+    start = perf_counter()
+    soup = BeautifulSoup(page, parser, parse_only=parse_only)
+    parsed = perf_counter()
+    result = function(soup)
+    end = perf_counter()
+    return parsed - start, end - parsed, result
+
+
+def main():
+    nactivities = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    nsections = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    page = create_course_page(nactivities, nsections)
+    print(f"{nactivities} activities, {nsections} sections, {len(page)} bytes")
+
+    cases = [
+        ("legacy", find_sections_legacy, None),
+        ("indexed", find_sections_indexed, None),
+        ("indexed+strainer", find_sections_indexed, Subject.parse_only),
+    ]
+
+    reference = None
+    for name, function, parse_only in cases:
+        parse_time, extract_time, result = benchmark(function, page, parse_only)
+        if reference is None:
+            reference = result
+
+        status = "same links" if result == reference else "DIFFERENT LINKS"
+        print(
+            f"{name:18} parse {parse_time * 1000:8.1f} ms, "
+            f"extract {extract_time * 1000:8.1f} ms  ({status})"
+        )
+
+        if result != reference:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
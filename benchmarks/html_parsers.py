@@ -0,0 +1,85 @@
+"""Benchmark of the HTML parsers supported by the setting `html-parser`.
+
+Parses the course page of `tests/data` and a synthetic course page with each
+parser, finds their sections and links as `Subject.find_links_html` does, and
+checks that the links found are the same for all of them.
+
+Usage: python benchmarks/html_parsers.py [repetitions]
+"""
+from pathlib import Path
+import sys
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Use the settings of the tests, so the user's settings are not needed
+from tests.conftest import pytest_configure  # noqa: E402 isort:skip
+
+pytest_configure()
+
+from bs4 import BeautifulSoup  # noqa: E402 isort:skip
+from bs4.builder import builder_registry  # noqa: E402 isort:skip
+from benchmarks.course_page import create_course_page  # noqa: E402 isort:skip
+from vcm.downloader.subject import Section, Subject  # noqa: E402 isort:skip
+
+PARSERS = ("html.parser", "lxml", "html5lib")
+DATA_PATH = Path(__file__).parent.parent / "tests" / "data"
+SUBJECT_URL = "https://campusvirtual.uva.es/course/view.php?id=1"
+
+
+def get_links(subject: Subject, soup: BeautifulSoup):
+    links = []
+    for header, elements in Subject.index_sections(soup):
+        section = Section(header.text, header.a["href"])
+        for element in elements:
+            if "singlebutton" in element["class"]:
+                link = subject.create_folder_link(element, section)
+            else:
+                link = subject.create_activity_link(element, section)
+            if link:
+                links.append(Subject.link_to_dict(link))
+    return links
+
+
+def benchmark(parser: str, pages: dict, repetitions: int):
+    subject = Subject("Benchmark", SUBJECT_URL, None)
+    links = {}
+    start = perf_counter()
+    for _ in range(repetitions):
+        for name, page in pages.items():
+            parse_only = Subject.parse_only if parser != "html5lib" else None
+            soup = BeautifulSoup(page, parser, parse_only=parse_only)
+            links[name] = get_links(subject, soup)
+    elapsed = perf_counter() - start
+    return elapsed / repetitions, links
+
+
+def main():
+    repetitions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    pages = {
+        "course.html.example": (DATA_PATH / "course.html.example").read_text(
+            encoding="utf8"
+        ),
+        "synthetic": create_course_page(500, 20),
+    }
+
+    reference = None
+    for parser in PARSERS:
+        if builder_registry.lookup(parser) is None:
+            print(f"{parser:12} not installed")
+            continue
+
+        elapsed, links = benchmark(parser, pages, repetitions)
+        if reference is None:
+            reference = links
+
+        nlinks = sum(len(x) for x in links.values())
+        status = "same links" if links == reference else "DIFFERENT LINKS"
+        print(f"{parser:12} {elapsed * 1000:8.2f} ms/round  {nlinks} links ({status})")
+
+        if links != reference:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+from threading import Thread
+from time import sleep
+from unittest import mock
+
+import pytest
+
+from vcm.core.concurrency import ConcurrencyLimiter
+
+
+class TestConcurrencyLimiter:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.settings_m = mock.patch("vcm.core.concurrency.settings").start()
+        self.settings_m.adaptive_concurrency = True
+        self.monotonic_m = mock.patch("vcm.core.concurrency.monotonic").start()
+        self.monotonic_m.return_value = 100
+        self.limiter = ConcurrencyLimiter()
+        self.limiter.configure(20)
+        yield
+        self.settings_m.adaptive_concurrency = False
+        self.limiter.configure(20)
+        mock.patch.stopall()
+
+    def test_singleton(self):
+        assert ConcurrencyLimiter() is ConcurrencyLimiter()
+
+    @pytest.mark.parametrize("max_limit, limit", [(20, 10), (5, 2), (1, 1), (0, 1)])
+    def test_configure(self, max_limit, limit):
+        self.limiter.in_flight = 3
+        self.limiter.configure(max_limit)
+
+        assert self.limiter.enabled is True
+        assert self.limiter.max_limit == max(max_limit, 1)
+        assert self.limiter.current_limit == limit
+        assert self.limiter.in_flight == 0
+        assert self.limiter.baseline_latency is None
+        assert self.limiter.samples == 0
+        assert [x[1] for x in self.limiter.history] == [limit]
+
+    @pytest.mark.parametrize("status_code", [None, 408, 500, 502, 503, 504])
+    def test_is_overloaded(self, status_code):
+        assert ConcurrencyLimiter.is_overloaded(status_code) is True
+
+    @pytest.mark.parametrize("status_code", [200, 206, 304, 403, 404, 429])
+    def test_is_not_overloaded(self, status_code):
+        assert ConcurrencyLimiter.is_overloaded(status_code) is False
+
+    def test_additive_increase(self):
+        # A full window of requests increases the limit by one
+        for _ in range(11):
+            self.limiter.acquire()
+            self.limiter.release(0.1, 200)
+
+        assert self.limiter.current_limit == 11
+        assert self.limiter.in_flight == 0
+        assert [x[1] for x in self.limiter.history] == [10, 11]
+
+    def test_max_limit(self):
+        for _ in range(1000):
+            self.limiter.release(0.1, 200)
+
+        assert self.limiter.limit == 20
+        assert self.limiter.current_limit == 20
+
+    @pytest.mark.parametrize("status_code", [None, 500, 408])
+    def test_multiplicative_decrease(self, status_code):
+        self.limiter.release(0.1, status_code)
+        assert self.limiter.current_limit == 5
+
+        # Cooldown
+        self.monotonic_m.return_value = 101
+        self.limiter.release(0.1, status_code)
+        assert self.limiter.current_limit == 5
+
+        self.monotonic_m.return_value = 103
+        self.limiter.release(0.1, status_code)
+        assert self.limiter.current_limit == 2
+
+        for i in range(5):
+            self.monotonic_m.return_value = 110 + i * 10
+            self.limiter.release(0.1, status_code)
+        assert self.limiter.current_limit == 1
+        assert [x[1] for x in self.limiter.history] == [10, 5, 2, 1]
+
+    def test_slow_requests(self):
+        for _ in range(self.limiter.min_samples):
+            self.limiter.release(1, 200)
+        assert self.limiter.baseline_latency == pytest.approx(1)
+
+        self.limiter.release(2.5, 200)
+        assert self.limiter.history[-1][1] == self.limiter.current_limit
+        limit = self.limiter.current_limit
+
+        self.limiter.release(3.5, 200)
+        assert self.limiter.current_limit == limit // 2
+
+    def test_slow_requests_min_samples(self):
+        self.limiter.release(1, 200)
+        self.limiter.release(10, 200)
+        assert self.limiter.current_limit == 10
+
+    def test_acquire_waits(self):
+        self.limiter.configure(2)
+        self.limiter.acquire()
+
+        thread = Thread(target=self.limiter.acquire, daemon=True)
+        thread.start()
+        sleep(0.05)
+        assert thread.is_alive()
+        assert self.limiter.in_flight == 1
+
+        self.limiter.release(0.1, 200)
+        thread.join(1)
+        assert not thread.is_alive()
+        assert self.limiter.in_flight == 1
+
+    def test_disabled(self):
+        self.settings_m.adaptive_concurrency = False
+        self.limiter.configure(2)
+
+        for _ in range(10):
+            self.limiter.acquire()
+        self.limiter.release(0.1, 500)
+
+        assert self.limiter.in_flight == 0
+        assert self.limiter.current_limit == 1
+        assert self.limiter.report() == "disabled"
+
+    def test_report(self):
+        self.limiter.release(0.1, 500)
+        self.limiter.acquire()
+
+        report = self.limiter.report()
+        assert report.startswith("5/20, 1 in flight [10 (")
+        assert report.endswith(") -> 5 (%s)]" % self.limiter.history[-1][0])
@@ -28,6 +28,7 @@ from vcm.core.exceptions import (
     UnkownIconWarning,
     VcmError,
     VcmWarning,
+    WebServiceError,
 )
 
 
@@ -262,6 +263,17 @@ class TestResponseError:
             raise ResponseError("message")
 
 
+class TestWebServiceError:
+    def test_inheritance(self):
+        exc = WebServiceError("message")
+        assert isinstance(exc, WebServiceError)
+        assert isinstance(exc, VcmError)
+
+    def test_raises(self):
+        with pytest.raises(WebServiceError):
+            raise WebServiceError("message")
+
+
 # WARNINGS
 
 
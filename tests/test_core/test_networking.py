@@ -1,4 +1,5 @@
 from contextlib import nullcontext
+import json
 import logging
 from typing import Any
 from unittest import mock
@@ -6,8 +7,20 @@ from unittest import mock
 import pytest
 import requests
 
-from vcm.core.exceptions import DownloaderError, LoginError, LogoutError, MoodleError
-from vcm.core.networking import Connection, Downloader, USER_AGENT
+from vcm.core.exceptions import (
+    DownloaderError,
+    LoginError,
+    LogoutError,
+    MoodleError,
+    WebServiceError,
+)
+from vcm.core.networking import (
+    USER_AGENT,
+    AjaxBatcher,
+    Connection,
+    Downloader,
+    RetryBudget,
+)
 
 
 class TestConnection:
@@ -31,6 +44,7 @@ class TestConnection:
         self.settings_m = mock.patch("vcm.core.networking.settings").start()
         self.settings_m.logout_retries = self.logout_retries
         self.settings_m.login_retries = self.login_retries
+        self.settings_m.persist_session = False
 
         # Restart singleton stored
         Connection._instance = None
@@ -88,7 +102,13 @@ class TestConnection:
 
     @mock.patch("vcm.core.networking.Connection.logout")
     @mock.patch("vcm.core.networking.Connection.login")
-    def test_context_manager(self, login_m, logout_m):
+    @mock.patch("vcm.core.networking.Connection.delete_session")
+    @mock.patch("vcm.core.networking.Connection.save_session")
+    @pytest.mark.parametrize("persist_session", [True, False])
+    def test_context_manager(
+        self, save_session_m, delete_session_m, login_m, logout_m, persist_session
+    ):
+        self.settings_m.persist_session = persist_session
         login_m.assert_not_called()
         logout_m.assert_not_called()
 
@@ -99,13 +119,29 @@ class TestConnection:
             assert conn
 
         login_m.assert_called_once_with()
-        logout_m.assert_called_once_with()
+        if persist_session:
+            save_session_m.assert_called_once_with()
+            logout_m.assert_not_called()
+            delete_session_m.assert_not_called()
+        else:
+            save_session_m.assert_not_called()
+            logout_m.assert_called_once_with()
+            delete_session_m.assert_called_once_with()
+
+    def test_session_path(self, tmp_path):
+        self.settings_m.session_path = tmp_path / "vcm-session.json"
+        assert Connection().session_path == tmp_path / "vcm-session.json"
 
     def test_get(self):
         conn = Connection()
         conn.get(self.url)
         self.downloader_m.return_value.get.assert_called_once_with(self.url)
 
+    def test_head(self):
+        conn = Connection()
+        conn.head(self.url)
+        self.downloader_m.return_value.head.assert_called_once_with(self.url)
+
     def test_post(self):
         conn = Connection()
         data = {"hello": "world"}
@@ -117,6 +153,15 @@ class TestConnection:
         conn.delete(self.url)
         self.downloader_m.return_value.delete.assert_called_once_with(self.url)
 
+    def test_pool_stats(self):
+        conn = Connection()
+        assert conn.pool_stats is self.downloader_m.return_value.get_pool_stats()
+
+    def test_set_pool_size(self):
+        conn = Connection()
+        conn.set_pool_size(25)
+        self.downloader_m.return_value.configure_pool.assert_called_once_with(25)
+
     def test_make_logout_request(self):
         conn = Connection()
         conn._sesskey = "<sesskey>"
@@ -548,6 +593,203 @@ class TestConnection:
 
         assert caplog.record_tuples == expected
 
+    @mock.patch("vcm.core.networking.Connection.inner_login")
+    @mock.patch("vcm.core.networking.Connection.restore_session")
+    @pytest.mark.parametrize("restored", [True, False])
+    @pytest.mark.parametrize("persist_session", [True, False])
+    def test_login_persist_session(
+        self, restore_session_m, inner_login_m, persist_session, restored
+    ):
+        self.settings_m.persist_session = persist_session
+        restore_session_m.return_value = restored
+        conn = Connection()
+        conn._login_response = mock.MagicMock()
+
+        with mock.patch.object(conn, "find_sesskey_and_user_url"):
+            conn.login()
+
+        if persist_session:
+            restore_session_m.assert_called_once_with()
+        else:
+            restore_session_m.assert_not_called()
+
+        if persist_session and restored:
+            inner_login_m.assert_not_called()
+        else:
+            inner_login_m.assert_called_once_with()
+
+    def set_session(self, tmp_path):
+        self.settings_m.session_path = tmp_path / "vcm-session.json"
+        conn = Connection()
+        conn._downloader.cookies = requests.cookies.RequestsCookieJar()
+        return conn
+
+    def test_save_session(self, tmp_path, caplog):
+        caplog.set_level(10)
+        conn = self.set_session(tmp_path)
+        conn._sesskey = "<sesskey>"
+        conn._user_url = "<user-url>"
+        conn._downloader.cookies.set(
+            "MoodleSession", "<session>", domain="campusvirtual.uva.es", path="/"
+        )
+
+        conn.save_session()
+
+        assert conn.session_path.stat().st_mode & 0o777 == 0o600
+        session = json.loads(conn.session_path.read_text())
+        assert session == {
+            "sesskey": "<sesskey>",
+            "user_url": "<user-url>",
+            "cookies": [
+                {
+                    "name": "MoodleSession",
+                    "value": "<session>",
+                    "domain": "campusvirtual.uva.es",
+                    "path": "/",
+                    "secure": False,
+                    "expires": None,
+                }
+            ],
+        }
+        assert caplog.record_tuples == [
+            (self.logger_name, 20, "Session saved (1 cookies)")
+        ]
+
+    def test_save_session_permissions(self, tmp_path):
+        conn = self.set_session(tmp_path)
+        conn.session_path.write_text("{}")
+        conn.session_path.chmod(0o644)
+
+        conn.save_session()
+        assert conn.session_path.stat().st_mode & 0o777 == 0o600
+
+    @mock.patch("vcm.core.networking.Connection.check_already_logged_in")
+    @pytest.mark.parametrize("logged_in", [True, False])
+    def test_restore_session(self, cali_m, logged_in, tmp_path, caplog):
+        caplog.set_level(10)
+        cali_m.return_value = logged_in
+        conn = self.set_session(tmp_path)
+        conn._downloader.cookies.set("MoodleSession", "<session>", domain="uva.es")
+        conn._sesskey = "<sesskey>"
+        conn._user_url = "<user-url>"
+        conn.save_session()
+
+        Connection._instance = None
+        conn = self.set_session(tmp_path)
+        caplog.clear()
+
+        assert conn.restore_session() is logged_in
+        cali_m.assert_called_once_with()
+        assert conn._downloader.cookies.get("MoodleSession") == "<session>"
+
+        if logged_in:
+            assert conn.sesskey == "<sesskey>"
+            assert conn.user_url == "<user-url>"
+            message = "Saved session restored"
+        else:
+            assert conn._sesskey is None
+            assert conn._user_url is None
+            message = "Saved session expired, logging in"
+
+        assert caplog.record_tuples == [(self.logger_name, 20, message)]
+
+    @mock.patch("vcm.core.networking.Connection.check_already_logged_in")
+    def test_restore_session_no_file(self, cali_m, tmp_path):
+        conn = self.set_session(tmp_path)
+        assert conn.restore_session() is False
+        cali_m.assert_not_called()
+
+    @mock.patch("vcm.core.networking.Connection.check_already_logged_in")
+    @pytest.mark.parametrize("content", ["invalid-json", "[]", '{"sesskey": 1}'])
+    def test_restore_session_corrupted(self, cali_m, content, tmp_path, caplog):
+        conn = self.set_session(tmp_path)
+        conn.session_path.write_text(content)
+
+        assert conn.restore_session() is False
+        cali_m.assert_not_called()
+        assert not conn.session_path.exists()
+        assert caplog.record_tuples[-1][1] == 30
+        assert "Session file corrupted" in caplog.record_tuples[-1][2]
+
+    @mock.patch("vcm.core.networking.Connection.check_already_logged_in")
+    def test_restore_session_empty(self, cali_m, tmp_path):
+        conn = self.set_session(tmp_path)
+        conn.save_session()
+
+        assert conn.restore_session() is False
+        cali_m.assert_not_called()
+
+    def test_delete_session(self, tmp_path):
+        conn = self.set_session(tmp_path)
+        conn.delete_session()
+
+        conn.session_path.write_text("{}")
+        conn.delete_session()
+        assert not conn.session_path.exists()
+
+    def test_call_ajax(self):
+        response = mock.MagicMock(ok=True)
+        response.json.return_value = [{"error": False, "data": 1}] * 2
+        self.downloader_m.return_value.post.return_value = response
+        calls = [
+            {"methodname": "function_1", "args": {"a": 1}},
+            {"methodname": "function_2", "args": {}},
+        ]
+
+        conn = Connection()
+        conn._sesskey = "<sesskey>"
+        assert conn.call_ajax(calls) == response.json.return_value
+
+        self.downloader_m.return_value.post.assert_called_once_with(
+            conn._ajax_url_template % ("<sesskey>", "function_1,function_2"),
+            None,
+            json=[
+                {"methodname": "function_1", "args": {"a": 1}, "index": 0},
+                {"methodname": "function_2", "args": {}, "index": 1},
+            ],
+        )
+
+    def test_call_ajax_downloader_error(self):
+        self.downloader_m.return_value.post.side_effect = DownloaderError("error")
+        conn = Connection()
+        conn._sesskey = "<sesskey>"
+
+        with pytest.raises(WebServiceError, match="AJAX request failed"):
+            conn.call_ajax([{"methodname": "function", "args": {}}])
+
+    def test_call_ajax_http_error(self):
+        response = mock.MagicMock(ok=False, status_code=500)
+        self.downloader_m.return_value.post.return_value = response
+        conn = Connection()
+        conn._sesskey = "<sesskey>"
+
+        with pytest.raises(WebServiceError, match="returned 500"):
+            conn.call_ajax([{"methodname": "function", "args": {}}])
+
+    def test_call_ajax_invalid_json(self):
+        response = mock.MagicMock(ok=True)
+        response.json.side_effect = ValueError
+        self.downloader_m.return_value.post.return_value = response
+        conn = Connection()
+        conn._sesskey = "<sesskey>"
+
+        with pytest.raises(WebServiceError, match="invalid JSON"):
+            conn.call_ajax([{"methodname": "function", "args": {}}])
+
+    @pytest.mark.parametrize(
+        "data", [{"error": "Invalid sesskey"}, [{"error": True}], [1, 2, 3]]
+    )
+    def test_call_ajax_rejected(self, data):
+        response = mock.MagicMock(ok=True)
+        response.json.return_value = data
+        self.downloader_m.return_value.post.return_value = response
+        conn = Connection()
+        conn._sesskey = "<sesskey>"
+        calls = [{"methodname": "function", "args": {}}] * 2
+
+        with pytest.raises(WebServiceError, match="AJAX request rejected"):
+            conn.call_ajax(calls)
+
     def test_find_sesskey_and_user_url(self, get_test_data):
         login_response = mock.MagicMock()
         login_response.text = get_test_data("logged-in.html.example")
@@ -562,6 +804,91 @@ class TestConnection:
         assert connection.user_url == expected_url
 
 
+class TestAjaxBatcher:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.connection_m = mock.patch("vcm.core.networking.Connection").start()
+        self.call_ajax_m = self.connection_m.return_value.call_ajax
+        self.call_ajax_m.side_effect = self.call_ajax
+        self.settings_m = mock.patch("vcm.core.networking.settings").start()
+        self.settings_m.ajax_batch_size = 3
+        self.settings_m.ajax_batch_wait = 0.05
+        yield
+        mock.patch.stopall()
+
+    @staticmethod
+    def call_ajax(calls):
+        return [{"error": False, "data": call["args"]["x"] * 2} for call in calls]
+
+    @pytest.mark.parametrize("batch_size, wait", [(None, None), (10, 0)])
+    def test_init(self, batch_size, wait):
+        batcher = AjaxBatcher(batch_size, wait)
+        assert batcher.batch_size == (batch_size or 3)
+        assert batcher.wait == (0.05 if wait is None else wait)
+        assert batcher.connection is self.connection_m.return_value
+        assert batcher.requests_sent == 0
+
+    def test_batch_size(self):
+        batcher = AjaxBatcher(wait=60)
+        futures = [batcher.submit("function", {"x": x}) for x in range(7)]
+
+        # Two full batches sent, one call pending
+        assert self.call_ajax_m.call_count == 2
+        assert [f.done() for f in futures] == [True] * 6 + [False]
+
+        batcher.flush()
+        assert self.call_ajax_m.call_count == 3
+        assert batcher.requests_sent == 3
+        assert [f.result() for f in futures] == [0, 2, 4, 6, 8, 10, 12]
+
+        sizes = [len(x[0][0]) for x in self.call_ajax_m.call_args_list]
+        assert sizes == [3, 3, 1]
+        assert self.call_ajax_m.call_args_list[-1][0][0] == [
+            {"methodname": "function", "args": {"x": 6}}
+        ]
+
+    def test_wait(self):
+        batcher = AjaxBatcher(wait=0.01)
+        future = batcher.submit("function", {"x": 5})
+
+        assert future.result(timeout=5) == 10
+        self.call_ajax_m.assert_called_once()
+
+    def test_flush_empty(self):
+        AjaxBatcher().flush()
+        self.call_ajax_m.assert_not_called()
+
+    def test_call_error(self):
+        self.call_ajax_m.side_effect = lambda calls: [
+            {"error": False, "data": 1},
+            {"error": True, "exception": {"errorcode": "invalidrecord"}},
+        ]
+        batcher = AjaxBatcher(wait=60)
+        future_1 = batcher.submit("function_1", {})
+        future_2 = batcher.submit("function_2", {})
+        batcher.flush()
+
+        assert future_1.result() == 1
+        with pytest.raises(WebServiceError, match="function_2 failed"):
+            future_2.result()
+
+    def test_batch_error(self, caplog):
+        self.call_ajax_m.side_effect = WebServiceError("AJAX request failed")
+        batcher = AjaxBatcher(wait=60)
+        futures = [batcher.submit("function", {"x": x}) for x in range(2)]
+        batcher.flush()
+
+        for future in futures:
+            with pytest.raises(WebServiceError, match="AJAX request failed"):
+                future.result()
+
+        assert caplog.record_tuples[-1] == (
+            "vcm.core.networking",
+            30,
+            "AJAX batch of 2 calls failed: AJAX request failed",
+        )
+
+
 class TestDownloader:
     @classmethod
     def setup_class(cls):
@@ -573,6 +900,13 @@ class TestDownloader:
         self.request_m = mock.patch("requests.Session.request").start()
         self.settings_m = mock.patch("vcm.core.networking.settings").start()
         self.settings_m.retries = self.retries
+        self.settings_m.keep_alive = True
+        self.settings_m.pool_block = False
+        self.settings_m.backoff_factor = 0.5
+        self.settings_m.backoff_max = 30
+        self.settings_m.retry_budget = 1000
+        self.sleep_m = mock.patch("vcm.core.networking.sleep").start()
+        RetryBudget.reset()
 
         # Reset module logger
         self.logger_name = "vcm.core.networking"
@@ -609,6 +943,55 @@ class TestDownloader:
         assert downloader.headers["user-agent"] == USER_AGENT
         self.request_m.assert_not_called()
 
+    @pytest.mark.parametrize("keep_alive", [True, False])
+    def test_init_keep_alive(self, keep_alive):
+        self.settings_m.keep_alive = keep_alive
+        downloader = Downloader()
+
+        if keep_alive:
+            assert downloader.headers["connection"] == "keep-alive"
+        else:
+            assert downloader.headers["connection"] == "close"
+
+    @pytest.mark.parametrize("pool_size", [None, 30])
+    def test_init_pool_size(self, pool_size):
+        downloader = Downloader(pool_size=pool_size)
+        expected = pool_size or 10
+
+        assert downloader.pool_size == expected
+        for prefix in ("http://", "https://"):
+            adapter = downloader.adapters[prefix]
+            assert adapter._pool_maxsize == expected
+            assert adapter._pool_block is False
+
+    @pytest.mark.parametrize("pool_block", [True, False])
+    def test_configure_pool(self, pool_block):
+        self.settings_m.pool_block = pool_block
+        downloader = Downloader()
+        old_adapter = downloader.adapters["https://"]
+
+        with mock.patch.object(old_adapter, "close") as close_m:
+            downloader.configure_pool(40)
+            close_m.assert_called()
+
+        adapter = downloader.adapters["https://"]
+        assert adapter is not old_adapter
+        assert adapter is downloader.adapters["http://"]
+        assert adapter._pool_maxsize == 40
+        assert adapter._pool_block is pool_block
+        assert downloader.pool_size == 40
+
+    def test_get_pool_stats(self):
+        downloader = Downloader()
+        assert downloader.get_pool_stats() == {"requests": 0, "hits": 0, "misses": 0}
+
+        pools = downloader.adapters["https://"].poolmanager.pools
+        pools["a"] = mock.MagicMock(num_requests=15, num_connections=3)
+        pools["b"] = mock.MagicMock(num_requests=2, num_connections=2)
+
+        stats = downloader.get_pool_stats()
+        assert stats == {"requests": 17, "hits": 12, "misses": 5}
+
     def test_request_get(self):
         Downloader().get(self.url)
         self.request_m.assert_called_once_with(
@@ -629,6 +1012,181 @@ class TestDownloader:
         Downloader().put(self.url)
         self.request_m.assert_called_once_with("PUT", self.url, data=mock.ANY)
 
+    def test_request_conditional(self):
+        validators = {"etag": '"abc"', "last-modified": "<last-modified>"}
+        Downloader().request("GET", self.url, validators=validators)
+        self.request_m.assert_called_once_with(
+            "GET",
+            self.url,
+            headers={"If-None-Match": '"abc"', "If-Modified-Since": "<last-modified>"},
+        )
+
+    def test_request_not_conditional(self):
+        Downloader().request("GET", self.url, validators=None)
+        self.request_m.assert_called_once_with("GET", self.url)
+
+    @pytest.mark.parametrize(
+        "validators,headers,expected",
+        (
+            ({}, None, {}),
+            ({"etag": None, "last-modified": None}, None, {}),
+            ({"etag": "a"}, None, {"If-None-Match": "a"}),
+            ({"last-modified": "b"}, None, {"If-Modified-Since": "b"}),
+            ({"etag": "a"}, {"Range": "x"}, {"If-None-Match": "a", "Range": "x"}),
+        ),
+    )
+    def test_get_conditional_headers(self, validators, headers, expected):
+        result = Downloader.get_conditional_headers(validators, headers)
+        assert result == expected
+
+    @pytest.mark.parametrize("attempt", range(1, 10))
+    def test_get_backoff_time(self, attempt):
+        for _ in range(20):
+            backoff_time = Downloader.get_backoff_time(attempt)
+            assert 0 <= backoff_time <= min(0.5 * 2 ** (attempt - 1), 30)
+
+    @pytest.mark.parametrize(
+        "retry_after,expected",
+        (("5", 5), ("120", 30), ("-3", 0), ("invalid", 0)),
+    )
+    def test_get_backoff_time_retry_after(self, retry_after, expected):
+        response = mock.MagicMock(headers={"Retry-After": retry_after})
+        assert Downloader.get_backoff_time(1, response) == expected
+
+    def test_get_backoff_time_retry_after_date(self):
+        response = mock.MagicMock(
+            headers={"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+        )
+        assert Downloader.get_backoff_time(1, response) == 0
+
+    def test_request_backoff(self):
+        exception = requests.exceptions.ConnectionError()
+        self.request_m.side_effect = [exception] * 3 + [mock.DEFAULT]
+
+        Downloader().get(self.url)
+
+        assert self.sleep_m.call_count == 3
+        for i, call in enumerate(self.sleep_m.call_args_list):
+            assert 0 <= call[0][0] <= 0.5 * 2**i
+
+        assert RetryBudget.retried == 3
+        assert RetryBudget.given_up == 0
+
+    @pytest.mark.parametrize("status_code", [429, 503])
+    def test_request_retry_status_code(self, status_code, caplog):
+        caplog.set_level(10)
+        overloaded = mock.MagicMock(status_code=status_code)
+        overloaded.headers = {"Retry-After": "7"}
+        ok = mock.MagicMock(status_code=200)
+        self.request_m.side_effect = [overloaded, ok]
+
+        assert Downloader().get(self.url) is ok
+
+        overloaded.close.assert_called_once_with()
+        self.sleep_m.assert_called_once_with(7)
+        assert RetryBudget.retried == 1
+        assert caplog.record_tuples[-1] == (
+            self.logger_name,
+            30,
+            "Received %d in GET, retries=9" % status_code,
+        )
+
+    def test_request_retry_status_code_no_retries_left(self):
+        overloaded = mock.MagicMock(status_code=503, headers={})
+        self.request_m.return_value = overloaded
+
+        assert Downloader().get(self.url, retries=3) is overloaded
+        assert self.request_m.call_count == 3
+        assert self.sleep_m.call_count == 2
+        assert RetryBudget.given_up == 1
+
+    def test_request_retry_status_code_budget_exhausted(self):
+        self.settings_m.retry_budget = 1
+        RetryBudget.reset()
+        overloaded = mock.MagicMock(status_code=429, headers={})
+        self.request_m.return_value = overloaded
+
+        assert Downloader().get(self.url) is overloaded
+        assert self.request_m.call_count == 2
+        assert RetryBudget.retried == 1
+        assert RetryBudget.given_up == 1
+
+    @pytest.mark.parametrize("stream", [True, False])
+    @pytest.mark.parametrize("lane", ["html", "files", None])
+    @mock.patch("vcm.core.networking.RateLimiter")
+    def test_request_rate_limiter(self, rate_limiter_m, lane, stream):
+        response = mock.MagicMock(status_code=200, content=b"12345")
+        self.request_m.return_value = response
+        kwargs = {"lane": lane} if lane else {}
+
+        assert Downloader().get(self.url, stream=stream, **kwargs) is response
+
+        rate_limiter_m.return_value.acquire_request.assert_called_once_with(
+            lane or "html"
+        )
+        acquire_bytes_m = rate_limiter_m.return_value.acquire_bytes
+        if stream:
+            acquire_bytes_m.assert_not_called()
+        else:
+            acquire_bytes_m.assert_called_once_with(lane or "html", 5)
+        assert "lane" not in self.request_m.call_args[1]
+
+    @mock.patch("vcm.core.networking.ConcurrencyLimiter")
+    def test_request_concurrency_limiter(self, concurrency_limiter_m):
+        exception = requests.exceptions.ConnectionError()
+        response = mock.MagicMock(status_code=502)
+        self.request_m.side_effect = [exception, response]
+
+        assert Downloader().get(self.url) is response
+
+        limiter_m = concurrency_limiter_m.return_value
+        assert limiter_m.acquire.call_count == 2
+        assert limiter_m.release.call_count == 2
+        assert limiter_m.release.call_args_list[0][0][1] is None
+        assert limiter_m.release.call_args_list[1][0][1] == 502
+
+    @pytest.mark.parametrize("consume", ["iter_content", "close", "both"])
+    @mock.patch("vcm.core.networking.ConcurrencyLimiter")
+    def test_request_concurrency_limiter_stream(self, concurrency_limiter_m, consume):
+        response = mock.MagicMock(status_code=200)
+        response.iter_content.return_value = iter([b"123", b"456"])
+        close_m = response.close
+        self.request_m.return_value = response
+        limiter_m = concurrency_limiter_m.return_value
+
+        assert Downloader().get(self.url, stream=True) is response
+
+        # The slot is held while the body is downloaded
+        limiter_m.acquire.assert_called_once_with()
+        limiter_m.release.assert_not_called()
+
+        if consume in ("iter_content", "both"):
+            assert b"".join(response.iter_content(3)) == b"123456"
+        if consume in ("close", "both"):
+            response.close()
+            close_m.assert_called_once_with()
+
+        limiter_m.release.assert_called_once()
+        assert limiter_m.release.call_args[0][1] == 200
+
+    def test_request_budget_exhausted(self, caplog):
+        self.settings_m.retry_budget = 2
+        RetryBudget.reset()
+        exception = requests.exceptions.ConnectionError()
+        self.request_m.side_effect = exception
+
+        with pytest.raises(DownloaderError, match="max retries failed"):
+            Downloader().get(self.url)
+
+        assert self.request_m.call_count == 3
+        assert self.sleep_m.call_count == 2
+        assert RetryBudget.retried == 2
+        assert RetryBudget.given_up == 1
+        assert RetryBudget.report() == "2 requests retried, 1 given up"
+        assert (self.logger_name, 30, "Retry budget exhausted, giving up") in (
+            caplog.record_tuples
+        )
+
     requests_exceptions = [
         "RequestException",
         "HTTPError",
@@ -0,0 +1,134 @@
+from unittest import mock
+
+import pytest
+
+from vcm.core.rate_limiter import LANES, RateLimiter, TokenBucket
+
+
+class TestTokenBucket:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.monotonic_m = mock.patch("vcm.core.rate_limiter.monotonic").start()
+        self.monotonic_m.return_value = 100.0
+        self.sleep_m = mock.patch("vcm.core.rate_limiter.sleep").start()
+        yield
+        mock.patch.stopall()
+
+    @pytest.mark.parametrize("rate, capacity", [(5, 5), (0.5, 1), (0, 1)])
+    def test_init(self, rate, capacity):
+        bucket = TokenBucket(rate)
+        assert bucket.rate == rate
+        assert bucket.capacity == capacity
+        assert bucket.tokens == capacity
+        assert bucket.timestamp == 100.0
+        assert bucket.waited == 0
+        assert bucket.unlimited is (rate == 0)
+
+    def test_unlimited(self):
+        bucket = TokenBucket(0)
+        for _ in range(1000):
+            bucket.consume(1000)
+
+        self.sleep_m.assert_not_called()
+        assert bucket.waited == 0
+
+    def test_burst(self):
+        bucket = TokenBucket(5)
+        for _ in range(5):
+            assert bucket.get_wait_time(1) == 0
+
+        assert bucket.get_wait_time(1) == pytest.approx(0.2)
+        assert bucket.get_wait_time(1) == pytest.approx(0.4)
+        assert bucket.waited == pytest.approx(0.6)
+
+    def test_refill(self):
+        bucket = TokenBucket(5)
+        assert bucket.get_wait_time(5) == 0
+
+        self.monotonic_m.return_value = 100.4
+        assert bucket.get_wait_time(2) == 0
+        assert bucket.get_wait_time(1) == pytest.approx(0.2)
+
+        # The capacity is never exceeded
+        self.monotonic_m.return_value = 1000
+        assert bucket.get_wait_time(5) == 0
+        assert bucket.get_wait_time(1) == pytest.approx(0.2)
+
+    def test_debt(self):
+        bucket = TokenBucket(1000)
+        assert bucket.get_wait_time(3000) == pytest.approx(2)
+        assert bucket.get_wait_time(1000) == pytest.approx(3)
+
+    def test_consume(self):
+        bucket = TokenBucket(2)
+        bucket.consume()
+        bucket.consume()
+        self.sleep_m.assert_not_called()
+
+        bucket.consume()
+        self.sleep_m.assert_called_once_with(pytest.approx(0.5))
+
+
+class TestRateLimiter:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.settings_m = mock.patch("vcm.core.rate_limiter.settings", {}).start()
+        self.bucket_m = mock.patch("vcm.core.rate_limiter.TokenBucket").start()
+        self.bucket_m.side_effect = lambda rate: mock.MagicMock(rate=rate, waited=1.5)
+        self.set_settings()
+        yield
+        mock.patch.stopall()
+
+    def set_settings(
+        self, html_requests=0.0, html_bytes=0, files_requests=0.0, files_bytes=0
+    ):
+        self.settings_m["rate-limit-html-requests"] = html_requests
+        self.settings_m["rate-limit-html-bytes"] = html_bytes
+        self.settings_m["rate-limit-files-requests"] = files_requests
+        self.settings_m["rate-limit-files-bytes"] = files_bytes
+
+    def test_lanes(self):
+        assert LANES == ("html", "files")
+
+    def test_singleton(self):
+        assert RateLimiter() is RateLimiter()
+
+    def test_configure(self):
+        self.set_settings(5.0, 100, 2.5, 2000)
+        rate_limiter = RateLimiter()
+        rate_limiter.configure()
+
+        assert rate_limiter.request_buckets["html"].rate == 5.0
+        assert rate_limiter.byte_buckets["html"].rate == 100
+        assert rate_limiter.request_buckets["files"].rate == 2.5
+        assert rate_limiter.byte_buckets["files"].rate == 2000
+
+    @pytest.mark.parametrize("lane", LANES)
+    def test_acquire_request(self, lane):
+        rate_limiter = RateLimiter()
+        rate_limiter.configure()
+        rate_limiter.acquire_request(lane)
+
+        rate_limiter.request_buckets[lane].consume.assert_called_once_with()
+        rate_limiter.byte_buckets[lane].consume.assert_not_called()
+
+    @pytest.mark.parametrize("lane", LANES)
+    def test_acquire_bytes(self, lane):
+        rate_limiter = RateLimiter()
+        rate_limiter.configure()
+        rate_limiter.acquire_bytes(lane, 1234)
+
+        rate_limiter.byte_buckets[lane].consume.assert_called_once_with(1234)
+        rate_limiter.request_buckets[lane].consume.assert_not_called()
+
+    def test_invalid_lane(self):
+        with pytest.raises(ValueError, match="Invalid lane"):
+            RateLimiter().acquire_request("invalid")
+
+        with pytest.raises(ValueError, match="Invalid lane"):
+            RateLimiter().acquire_bytes("invalid", 1)
+
+    def test_report(self):
+        rate_limiter = RateLimiter()
+        rate_limiter.configure()
+        assert rate_limiter.report() == "waited html 3.0s, files 3.0s"
@@ -4,6 +4,7 @@ import logging
 import os
 from unittest import mock
 
+from bs4.builder import builder_registry
 import pytest
 from requests.exceptions import ProxyError
 
@@ -16,8 +17,10 @@ from vcm.core.utils import (
     Printer,
     check_updates,
     configure_logging,
+    get_html_parser,
     handle_fatal_error_exit,
     open_http_status_server,
+    parse_html,
     save_crash_context,
     secure_filename,
     setup_vcm,
@@ -222,6 +225,66 @@ class TestTiming:
             custom_function()
 
 
+class TestHtmlParser:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        get_html_parser.cache_clear()
+        self.settings_m = mock.patch("vcm.settings.settings").start()
+        yield
+        mock.patch.stopall()
+        get_html_parser.cache_clear()
+
+    def test_get_html_parser_installed(self, caplog):
+        caplog.set_level(30, logger="vcm.core.utils")
+        assert get_html_parser("html.parser") == "html.parser"
+        assert caplog.records == []
+
+    def test_get_html_parser_not_installed(self, caplog):
+        caplog.set_level(30, logger="vcm.core.utils")
+        with mock.patch("vcm.core.utils.builder_registry") as registry_m:
+            registry_m.lookup.return_value = None
+            assert get_html_parser("lxml") == "html.parser"
+            assert get_html_parser("lxml") == "html.parser"
+
+        # The warning is only logged once
+        msg = "HTML parser 'lxml' not installed, using html.parser"
+        assert caplog.record_tuples == [("vcm.core.utils", 30, msg)]
+
+    @mock.patch("vcm.core.utils.BeautifulSoup")
+    def test_parse_html(self, bs_m):
+        self.settings_m.html_parser = "html.parser"
+        soup = parse_html("<html></html>", parse_only="<strainer>")
+
+        assert soup == bs_m.return_value
+        bs_m.assert_called_once_with(
+            "<html></html>", "html.parser", parse_only="<strainer>"
+        )
+
+    @mock.patch("vcm.core.utils.get_html_parser", return_value="html5lib")
+    @mock.patch("vcm.core.utils.BeautifulSoup")
+    def test_parse_html_html5lib_strainer(self, bs_m, _ghp_m):
+        self.settings_m.html_parser = "html5lib"
+        soup = parse_html("<html></html>", parse_only="<strainer>")
+
+        assert soup == bs_m.return_value
+        bs_m.assert_called_once_with("<html></html>", "html5lib", parse_only=None)
+
+    @pytest.mark.parametrize("parser", ["lxml", "html5lib"])
+    @pytest.mark.parametrize("name", ["logged-in", "login-ok", "login-fail-1"])
+    def test_parsers_find_same_links(self, get_test_data, parser, name):
+        if builder_registry.lookup(parser) is None:
+            pytest.skip(f"{parser} not installed")
+
+        def get_links(parser_name):
+            self.settings_m.html_parser = parser_name
+            soup = parse_html(get_test_data(f"{name}.html.example"))
+            return [(a.get("href"), a.get_text(strip=True)) for a in soup("a")]
+
+        expected = get_links("html.parser")
+        assert expected
+        assert get_links(parser) == expected
+
+
 class TestStr2Bool:
     test_data = [
         (True, True),
@@ -0,0 +1,209 @@
+from unittest import mock
+
+import pytest
+
+from vcm.core.exceptions import DownloaderError, WebServiceError
+from vcm.core.webservice import WebService, flatten_params
+
+SITE_INFO = {"userid": 6737, "username": "<username>"}
+COURSES = [
+    {"id": 1234, "fullname": "Subject 1 (1234)", "shortname": "S1"},
+    {"id": 5678, "fullname": "Subject 2 (5678)", "shortname": "S2"},
+]
+CONTENTS = [
+    {
+        "id": 1,
+        "name": "Section 1",
+        "section": 0,
+        "modules": [
+            {
+                "id": 111,
+                "name": "Notes",
+                "modname": "resource",
+                "url": "https://campusvirtual.uva.es/mod/resource/view.php?id=111",
+                "contents": [
+                    {
+                        "type": "file",
+                        "filename": "notes.pdf",
+                        "filesize": 1000,
+                        "timemodified": 1600000000,
+                        "fileurl": "https://campusvirtual.uva.es/webservice/"
+                        "pluginfile.php/1/mod_resource/content/1/notes.pdf"
+                        "?forcedownload=1",
+                    }
+                ],
+            }
+        ],
+    }
+]
+
+
+class FakeWebService:
+    """Fake Moodle server, replying to the requests of the web service."""
+
+    def __init__(self):
+        self.calls = []
+        self.token = "<token>"
+
+    @staticmethod
+    def response(data, status_code=200):
+        response = mock.MagicMock(status_code=status_code, ok=status_code < 400)
+        response.json.return_value = data
+        return response
+
+    def post(self, url, data):
+        self.calls.append((url, data))
+
+        if url.endswith("login/token.php"):
+            if data["password"] != "<password>":
+                return self.response({"error": "Invalid login", "errorcode": "x"})
+            return self.response({"token": self.token, "privatetoken": None})
+
+        assert url.endswith("webservice/rest/server.php")
+        assert data["moodlewsrestformat"] == "json"
+        if data["wstoken"] != self.token:
+            return self.response(
+                {"exception": "moodle_exception", "errorcode": "invalidtoken"}
+            )
+
+        function = data["wsfunction"]
+        if function == "core_webservice_get_site_info":
+            return self.response(SITE_INFO)
+        if function == "core_enrol_get_users_courses":
+            assert data["userid"] == SITE_INFO["userid"]
+            return self.response(COURSES)
+        if function == "core_course_get_contents":
+            return self.response(CONTENTS)
+
+        return self.response(
+            {
+                "exception": "dml_missing_record_exception",
+                "errorcode": "invalidrecord",
+                "message": "Function not found",
+            }
+        )
+
+
+@pytest.mark.parametrize(
+    "params, expected",
+    [
+        ({}, {}),
+        ({"courseid": 5}, {"courseid": 5}),
+        ({"flag": True}, {"flag": 1}),
+        (
+            {"options": [{"name": "cmid", "value": 3}]},
+            {"options[0][name]": "cmid", "options[0][value]": 3},
+        ),
+        ({"ids": [1, 2]}, {"ids[0]": 1, "ids[1]": 2}),
+    ],
+)
+def test_flatten_params(params, expected):
+    assert flatten_params(params) == expected
+
+
+class TestWebService:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.server = FakeWebService()
+        self.connection_m = mock.patch("vcm.core.webservice.Connection").start()
+        self.connection_m.return_value.post.side_effect = self.server.post
+        self.vc_creds = mock.patch(
+            "vcm.core.webservice.Credentials.VirtualCampus"
+        ).start()
+        self.vc_creds.username = "<username>"
+        self.vc_creds.password = "<password>"
+        WebService._instance = None
+        yield
+        WebService._instance = None
+        mock.patch.stopall()
+
+    def test_singleton(self):
+        assert WebService() is WebService()
+
+    def test_token(self):
+        ws = WebService()
+        assert ws.token == "<token>"
+        assert ws.token == "<token>"
+
+        assert len(self.server.calls) == 1
+        url, data = self.server.calls[0]
+        assert url == WebService.token_url
+        assert data == {
+            "username": "<username>",
+            "password": "<password>",
+            "service": "moodle_mobile_app",
+        }
+
+    def test_token_error(self):
+        self.vc_creds.password = "<invalid>"
+        with pytest.raises(WebServiceError, match="Invalid login"):
+            assert WebService().token
+
+    def test_post_downloader_error(self):
+        self.connection_m.return_value.post.side_effect = DownloaderError("error")
+        with pytest.raises(WebServiceError, match="request failed"):
+            WebService().post(WebService.server_url, {})
+
+    def test_post_http_error(self):
+        self.connection_m.return_value.post.side_effect = None
+        self.connection_m.return_value.post.return_value = self.server.response(
+            None, 503
+        )
+        with pytest.raises(WebServiceError, match="returned 503"):
+            WebService().post(WebService.server_url, {})
+
+    def test_post_invalid_json(self):
+        response = self.server.response(None)
+        response.json.side_effect = ValueError
+        self.connection_m.return_value.post.side_effect = None
+        self.connection_m.return_value.post.return_value = response
+        with pytest.raises(WebServiceError, match="invalid JSON"):
+            WebService().post(WebService.server_url, {})
+
+    def test_call(self):
+        ws = WebService()
+        assert ws.call("core_course_get_contents", courseid=1234) == CONTENTS
+
+        url, data = self.server.calls[-1]
+        assert url == WebService.server_url
+        assert data == {
+            "courseid": 1234,
+            "wstoken": "<token>",
+            "wsfunction": "core_course_get_contents",
+            "moodlewsrestformat": "json",
+        }
+
+    def test_call_exception(self):
+        with pytest.raises(WebServiceError, match="Function not found"):
+            WebService().call("invalid_function")
+
+    def test_user_id(self):
+        ws = WebService()
+        assert ws.user_id == 6737
+        assert ws.user_id == 6737
+        assert len(self.server.calls) == 2
+
+    def test_get_user_courses(self):
+        assert WebService().get_user_courses() == COURSES
+        assert self.server.calls[-1][1]["userid"] == 6737
+
+    def test_get_course_contents(self):
+        assert WebService().get_course_contents(1234) == CONTENTS
+        assert self.server.calls[-1][1]["courseid"] == 1234
+
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            (
+                CONTENTS[0]["modules"][0]["contents"][0]["fileurl"],
+                "https://campusvirtual.uva.es/pluginfile.php/1/mod_resource/"
+                "content/1/notes.pdf",
+            ),
+            (
+                "https://campusvirtual.uva.es/pluginfile.php/1/file.pdf",
+                "https://campusvirtual.uva.es/pluginfile.php/1/file.pdf",
+            ),
+        ],
+    )
+    def test_to_pluginfile_url(self, url, expected):
+        assert WebService.to_pluginfile_url(url) == expected
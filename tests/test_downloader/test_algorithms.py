@@ -0,0 +1,86 @@
+import pytest
+
+from vcm.downloader.algorithms import HTML_ALGORITHMS, AlgorithmStats, html_algorithm
+from vcm.downloader.link import Html
+
+ALGORITHMS = ["a1", "a2", "a3"]
+
+
+class TestAlgorithmStats:
+    @pytest.fixture(autouse=True)
+    def reset(self):
+        AlgorithmStats._instance = None
+        self.stats = AlgorithmStats()
+        yield
+        AlgorithmStats._instance = None
+
+    def test_singleton(self):
+        assert AlgorithmStats() is self.stats
+
+    def test_sort_no_stats(self):
+        assert self.stats.sort("S", ALGORITHMS) == ALGORITHMS
+
+    def test_sort(self):
+        self.stats.record("S", "a3", True)
+        self.stats.record("S", "a1", False)
+
+        assert self.stats.sort("S", ALGORITHMS) == ["a3", "a2", "a1"]
+
+    def test_sort_scopes(self):
+        self.stats.record("S", "a3", True)
+
+        assert self.stats.sort("S", ALGORITHMS) == ["a3", "a1", "a2"]
+        assert self.stats.sort("T", ALGORITHMS) == ALGORITHMS
+
+    def test_sort_smoothing(self):
+        # Smoothed hit rates: a1 2/3, a2 3/5, a4 (untried) 1/2, a3 1/3
+        self.stats.record("S", "a1", True)
+        for hit in (True, True, False):
+            self.stats.record("S", "a2", hit)
+        self.stats.record("S", "a3", False)
+
+        assert self.stats.sort("S", ALGORITHMS + ["a4"]) == ["a1", "a2", "a4", "a3"]
+
+    def test_sort_ties_keep_order(self):
+        self.stats.record("S", "a2", True)
+        self.stats.record("S", "a3", True)
+
+        assert self.stats.sort("S", ALGORITHMS) == ["a2", "a3", "a1"]
+
+    def test_record_failure(self):
+        self.stats.record_failure(1.25)
+        self.stats.record_failure(0.5)
+
+        assert self.stats.failures == 2
+        assert self.stats.failures_time == 1.75
+
+    def test_report(self):
+        self.stats.record("S", "a2", True)
+        self.stats.record("S", "a1", False)
+        self.stats.record("T", "a2", False)
+        self.stats.record_failure(1.5)
+
+        assert self.stats.report() == "a1 0/1, a2 1/2, 1 failures (1.5s)"
+
+    def test_report_empty(self):
+        assert self.stats.report() == "0 failures (0.0s)"
+
+    def test_reset(self):
+        self.stats.record("S", "a1", True)
+        self.stats.record_failure(1)
+
+        self.stats.reset()
+
+        assert self.stats.report() == "0 failures (0.0s)"
+
+
+def test_html_algorithm():
+    algorithms = [x for x in dir(Html) if x.startswith("check_algorithm_")]
+    assert sorted(HTML_ALGORITHMS) == sorted(algorithms)
+
+    def check_algorithm_1():
+        pass
+
+    # Registering a method twice doesn't duplicate it
+    assert html_algorithm(check_algorithm_1) is check_algorithm_1
+    assert sorted(HTML_ALGORITHMS) == sorted(algorithms)
@@ -0,0 +1,286 @@
+import json
+import logging
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from vcm.core.exceptions import AliasFatalError, AliasNotFoundError
+from vcm.downloader.alias import Alias, AliasEntry, SqliteAlias
+
+
+class TestAlias:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        self.settings_m = mock.patch("vcm.downloader.alias.settings").start()
+        self.settings_m.root_folder = tmp_path
+        self.settings_m.alias_backend = "json"
+        Alias._instance = None
+        self.alias_path = tmp_path / "alias.json"
+        self.journal_path = tmp_path / "alias.journal"
+        yield
+        Alias._instance = None
+        mock.patch.stopall()
+
+    def new_execution(self):
+        Alias._instance = None
+        return Alias()
+
+    def test_id_to_alias(self):
+        assert Alias.id_to_alias("a", "S/file.pdf") == Path("S/file.pdf")
+        assert Alias.id_to_alias("a", "S/other.pdf") == Path("S/file.pdf")
+        assert len(Alias()) == 1
+
+    def test_id_to_alias_collision(self):
+        # Like in previous versions, the ids share the alias
+        assert Alias.id_to_alias("a", "S/file.pdf") == Path("S/file.pdf")
+        assert Alias.id_to_alias("b", "S/file.pdf") == Path("S/file.pdf")
+
+        assert Alias.alias_to_id("S/file.pdf") == "a"
+        assert Alias().taken_aliases == {"S/file.pdf"}
+
+    def test_id_to_alias_folder(self):
+        folder_id = "744efab6c9423088e7f5c0bc83f9e7b92c604309"
+
+        first = Alias.id_to_alias(folder_id, "S/folder", 1)
+        Alias.id_to_alias(folder_id, "S/other", 2)
+
+        assert first == Path("S/folder")
+        assert Alias.alias_to_id("S/other") != Alias.alias_to_id("S/folder")
+
+    @pytest.mark.parametrize(
+        "template, index, expected",
+        [
+            ("file", 5, "file.5"),
+            ("file.txt", 5, "file.5.txt"),
+            ("some.file.txt", 5, "some.file.5.txt"),
+            ("S/Tema 1.pdf", 1, "S/Tema 1.1.pdf"),
+        ],
+    )
+    def test_create_name(self, template, index, expected):
+        assert Alias._create_name(template, index) == expected
+
+    def test_increment(self):
+        alias = Alias()
+        alias.id_to_alias("a", "S/file.pdf")
+
+        assert alias._increment("S/file.pdf") == "S/file.1.pdf"
+        assert alias._increment(Path("S/file.pdf")) == "S/file.1.pdf"
+        assert alias._increment("S/new.pdf") == "S/new.1.pdf"
+
+    def test_increment_taken(self):
+        alias = Alias()
+        for id_, name in enumerate(["file.pdf", "file.1.pdf", "file.2.pdf"]):
+            alias.id_to_alias(str(id_), name)
+
+        assert alias._increment("file.pdf") == "file.3.pdf"
+        assert alias.next_index == {"file.pdf": 3}
+
+        alias.id_to_alias("3", "file.3.pdf")
+        assert alias._increment("file.pdf") == "file.4.pdf"
+        assert alias.next_index == {"file.pdf": 4}
+
+    def test_increment_starts_from_next_index(self):
+        alias = Alias()
+        alias.id_to_alias("a", "file.1.pdf")
+        alias.next_index["file.pdf"] = 5
+
+        # The lower indexes are known to be taken, they aren't checked again
+        with mock.patch.object(Alias, "_create_name", wraps=Alias._create_name) as m:
+            assert alias._increment("file.pdf") == "file.5.pdf"
+        m.assert_called_once_with("file.pdf", 5)
+
+    def test_taken_aliases(self):
+        self.alias_path.write_text(
+            '[{"id": "a", "alias": "S/file.pdf"}, {"id": "b", "alias": "S/x.pdf"}]'
+        )
+        alias = Alias()
+        alias.id_to_alias("c", "S\\sub/new.pdf")
+
+        assert alias.taken_aliases == {
+            "S/file.pdf",
+            "S/x.pdf",
+            Path("S\\sub/new.pdf").as_posix(),
+        }
+
+        alias.load()
+        assert len(alias.taken_aliases) == 3
+        assert alias.next_index == {}
+
+    def test_journal_replay(self):
+        Alias.id_to_alias("a", "S/a.pdf")
+        Alias.id_to_alias("b", "S/b.pdf")
+
+        # The execution is killed before Alias.commit()
+        assert not self.alias_path.exists()
+        assert len(self.journal_path.read_text().splitlines()) == 2
+
+        alias = self.new_execution()
+        assert len(alias) == 2
+        assert alias.journal_size == 2
+        assert Alias.id_to_alias("a", "S/other.pdf") == Path("S/a.pdf")
+        assert Alias.alias_to_id("S/b.pdf") == "b"
+
+    def test_journal_truncated_line(self, caplog):
+        caplog.set_level(logging.WARNING)
+        Alias.id_to_alias("a", "S/a.pdf")
+        with self.journal_path.open("at", encoding="utf-8") as file_handler:
+            file_handler.write('{"id": "b", "ali')
+
+        alias = self.new_execution()
+        assert len(alias) == 1
+        assert alias.journal_size == 1
+        assert Alias.alias_to_id("S/a.pdf") == "a"
+        assert "Invalid alias journal entry" in caplog.text
+
+        # New entries are still saved
+        Alias.id_to_alias("c", "S/c.pdf")
+        Alias.commit()
+        alias = self.new_execution()
+        assert [x.id for x in alias.alias_entries] == ["a", "c"]
+
+    def test_compact_interval(self):
+        mock.patch.object(Alias, "compact_interval", 3).start()
+
+        Alias.id_to_alias("a", "S/a.pdf")
+        Alias.id_to_alias("b", "S/b.pdf")
+        assert not self.alias_path.exists()
+        assert Alias().journal_size == 2
+
+        Alias.id_to_alias("c", "S/c.pdf")
+        assert not self.journal_path.exists()
+        assert Alias().journal_size == 0
+        assert len(json.loads(self.alias_path.read_text())) == 3
+
+        Alias.id_to_alias("d", "S/d.pdf")
+        assert len(self.journal_path.read_text().splitlines()) == 1
+
+        Alias.commit()
+        assert not self.journal_path.exists()
+        assert len(json.loads(self.alias_path.read_text())) == 4
+
+    def test_save_keeps_other_process_entries(self):
+        Alias.id_to_alias("a", "S/a.pdf")
+
+        # Another execution saves its aliases meanwhile
+        other = [{"id": "x", "alias": "S/x.pdf"}, {"id": "a", "alias": "S/y.pdf"}]
+        self.alias_path.write_text(json.dumps(other))
+
+        Alias.commit()
+
+        entries = json.loads(self.alias_path.read_text())
+        assert {x["id"]: x["alias"] for x in entries} == {
+            "a": "S/a.pdf",
+            "x": "S/x.pdf",
+        }
+        assert Alias.alias_to_id("S/x.pdf") == "x"
+
+    @pytest.mark.parametrize("to_path", [str, Path])
+    def test_alias_to_id(self, to_path):
+        Alias.id_to_alias("a", "S/sub/a.pdf")
+
+        assert Alias.alias_to_id(to_path("S/sub/a.pdf")) == "a"
+        with pytest.raises(AliasNotFoundError, match="Alias not found"):
+            Alias.alias_to_id(to_path("S/sub/b.pdf"))
+
+
+class TestSqliteAlias:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        self.settings_m = mock.patch("vcm.downloader.alias.settings").start()
+        self.settings_m.root_folder = tmp_path
+        self.settings_m.alias_backend = "sqlite"
+        Alias._instance = None
+        SqliteAlias._instance = None
+        self.path = tmp_path / "alias.sqlite3"
+        yield
+        Alias._instance = None
+        SqliteAlias._instance = None
+        mock.patch.stopall()
+
+    def new_execution(self):
+        SqliteAlias._instance = None
+        return SqliteAlias()
+
+    def test_id_to_alias(self):
+        alias = SqliteAlias()
+
+        assert alias.id_to_alias("a", "file.txt") == Path("file.txt")
+        assert alias.id_to_alias("b", "file.txt") == Path("file.1.txt")
+        assert alias.id_to_alias("a", "other.txt") == Path("file.txt")
+        assert alias.alias_to_id("file.1.txt") == "b"
+        assert len(alias) == 2
+
+    def test_inserted_when_assigned(self):
+        first = self.new_execution()
+        second = self.new_execution()
+
+        assert first.id_to_alias("a", "file.txt") == Path("file.txt")
+        # Without calling Alias.commit
+        assert second.id_to_alias("b", "file.txt") == Path("file.1.txt")
+        assert second.id_to_alias("a", "other.txt") == Path("file.txt")
+
+    def test_retry_integrity_error(self):
+        first = self.new_execution()
+        second = self.new_execution()
+        first.id_to_alias("a", "file.txt")
+
+        # Simulate a stale lookup, as if the alias was taken after choosing it
+        with mock.patch.object(second, "_find_free_alias") as find_m:
+            find_m.side_effect = ["file.txt", "file.1.txt"]
+            assert second.id_to_alias("b", "file.txt") == Path("file.1.txt")
+
+        assert find_m.call_count == 2
+        assert second.alias_to_id("file.1.txt") == "b"
+
+    def test_retries_exhausted(self):
+        alias = SqliteAlias()
+        alias.id_to_alias("a", "file.txt")
+
+        with mock.patch.object(alias, "_find_free_alias", return_value="file.txt"):
+            with pytest.raises(AliasFatalError):
+                alias.id_to_alias("b", "file.txt")
+
+        assert len(alias) == 1
+
+    def test_migrate_from_json(self, caplog):
+        caplog.set_level(logging.INFO)
+        entries = [
+            AliasEntry("a", "file.txt"),
+            AliasEntry("b", "file.txt"),
+            AliasEntry("c", "other.txt"),
+            AliasEntry("a", "another.txt"),
+        ]
+        alias = SqliteAlias(self.path)
+
+        assert alias.migrate_from_json(entries) == 3
+
+        assert alias.alias_to_id("file.txt") == "a"
+        assert alias.alias_to_id("file.1.txt") == "b"
+        assert alias.alias_to_id("other.txt") == "c"
+        assert (
+            "'file.txt' of b is duplicated, reassigned to 'file.1.txt'" in caplog.text
+        )
+        assert "Migrated 3/4 aliases" in caplog.text
+
+    def test_migrate_on_creation(self):
+        (self.path.parent / "alias.json").write_text(
+            '[{"id": "a", "alias": "file.txt"}, {"id": "b", "alias": "file.txt"}]'
+        )
+
+        alias = SqliteAlias()
+
+        assert len(alias) == 2
+        assert alias.id_to_alias("b", "file.txt") == Path("file.1.txt")
+
+    def test_destroy(self):
+        alias = SqliteAlias()
+        alias.id_to_alias("a", "file.txt")
+        assert self.path.exists()
+
+        Alias.destroy()
+
+        assert not self.path.exists()
+        assert not (self.path.parent / "alias.sqlite3-wal").exists()
+        assert len(SqliteAlias()) == 0
+        assert SqliteAlias() is not alias
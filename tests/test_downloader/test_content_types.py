@@ -0,0 +1,66 @@
+from unittest import mock
+
+import pytest
+
+from vcm.downloader.content_types import get_content_type_handler
+from vcm.downloader.link import Resource
+
+URL = "https://campusvirtual.uva.es/mod/resource/view.php?id=1"
+
+
+@pytest.mark.parametrize(
+    "content_type, resource_type, lane, stream",
+    [
+        ("application/pdf", "pdf", "files", True),
+        ("text/plain; charset=utf-8", "plain", "files", False),
+        ("text/html; charset=utf-8", "html", "html", True),
+        ("application/vnd.ms-excel.sheet.macroEnabled.12", "excel", "files", True),
+    ],
+)
+def test_get_content_type_handler(content_type, resource_type, lane, stream):
+    handler = get_content_type_handler(content_type)
+    assert handler.resource_type == resource_type
+    assert handler.lane == lane
+    assert handler.stream is stream
+
+
+def test_html_handler():
+    assert get_content_type_handler("text/html").handler is Resource.handle_html
+
+
+@pytest.mark.parametrize("content_type", [None, "", "application/x-unknown"])
+def test_unknown_content_type(content_type):
+    assert get_content_type_handler(content_type) is None
+
+
+class TestResourceLane:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        connection_m = mock.patch("vcm.downloader.link.Connection").start()
+        self.get_m = connection_m.return_value.get
+        self.rate_limiter_m = mock.patch("vcm.downloader.link.RateLimiter").start()
+        resolutions_m = mock.patch("vcm.downloader.link.ResolutionCache").start()
+        resolutions_m.return_value.get.return_value = None
+        validators_m = mock.patch("vcm.downloader.link.ValidatorCache").start()
+        validators_m.return_value.get.return_value = None
+
+        subject = mock.MagicMock()
+        subject.name = "Subject"
+        self.resource = Resource("Page", None, URL, None, subject)
+        yield
+        mock.patch.stopall()
+
+    def test_html_lane(self):
+        response = self.get_m.return_value
+        response.status_code = 200
+        response.headers = {"Content-Type": "text/html; charset=utf-8"}
+        response.content = b"<html></html>"
+        response.text = "<html></html>"
+        response.history = []
+
+        self.resource.do_download()
+
+        assert self.get_m.call_args[1]["lane"] == "files"
+        self.rate_limiter_m.return_value.acquire_bytes.assert_called_once_with(
+            "html", 13
+        )
@@ -0,0 +1,218 @@
+import json
+import os
+from threading import Event, Thread
+from unittest import mock
+
+import pytest
+
+from vcm.core.exceptions import FileCacheError
+from vcm.downloader.filecache import FileCache, file_digest, new_digest
+
+
+def digest_of(content):
+    digest = new_digest()
+    digest.update(content)
+    return digest.hexdigest()
+
+
+class TestFileCache:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        self.settings_m = mock.patch("vcm.downloader.filecache.settings").start()
+        self.settings_m.root_folder = tmp_path
+        self.root = tmp_path
+        self.manifest_path = tmp_path / "filecache.json"
+        yield
+        mock.patch.stopall()
+
+    def write(self, name, content=b"0123"):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def new_execution(self):
+        cache = FileCache()
+        len(cache)
+        cache.save()
+        assert self.manifest_path.exists()
+
+    def bump_mtime(self, folder):
+        # The mtime resolution of some file systems is too coarse for the tests
+        stat = folder.stat()
+        os.utime(folder.as_posix(), (stat.st_atime, stat.st_mtime + 10))
+
+    def test_load_manual(self):
+        with pytest.raises(FileCacheError):
+            FileCache().load()
+
+    def test_first_scan(self):
+        path = self.write("S/file.pdf")
+        self.write("S/other.pdf.part")
+        self.write("S/other.pdf.part.json")
+
+        cache = FileCache()
+
+        assert len(cache) == 1
+        assert path in cache
+        assert cache[path] == 4
+        assert cache.get_entry(path)["hash"] is None
+        assert not self.manifest_path.exists()
+
+        cache.save()
+        data = json.loads(self.manifest_path.read_text())
+        assert list(data["files"]) == ["S/file.pdf"]
+        assert set(data["folders"]) == {".", "S"}
+
+        # The manifest itself is not a cached file
+        assert FileCache().rescan() == 1
+
+    def test_load_manifest(self):
+        path = self.write("S/file.pdf")
+        cache = FileCache()
+        cache.update(path, 4, "hash")
+        cache.save()
+
+        with mock.patch.object(FileCache, "_scan") as scan_m:
+            cache = FileCache()
+            assert cache.get_entry(path)["hash"] == "hash"
+
+        scan_m.assert_not_called()
+
+    @pytest.mark.parametrize("content", ["{", "[]", '{"files": 1}'])
+    def test_load_manifest_invalid(self, content):
+        path = self.write("S/file.pdf")
+        self.manifest_path.write_text(content)
+
+        cache = FileCache()
+
+        assert path in cache
+        assert len(cache) == 1
+
+    def test_new_folder(self):
+        self.write("S/file.pdf")
+        self.new_execution()
+
+        new = self.write("S/T/U/new.pdf")
+        self.bump_mtime(self.root / "S")
+        cache = FileCache()
+
+        assert new in cache
+        assert len(cache) == 2
+
+    def test_removed_folder(self):
+        self.write("S/file.pdf")
+        removed = self.write("S/T/U/removed.pdf")
+        self.new_execution()
+
+        removed.unlink()
+        removed.parent.rmdir()
+        removed.parent.parent.rmdir()
+        self.bump_mtime(self.root / "S")
+        cache = FileCache()
+
+        assert removed not in cache
+        assert len(cache) == 1
+        assert set(cache._folders) == {".", "S"}
+
+    def test_renamed_folder(self):
+        old = self.write("S/T/file.pdf")
+        self.new_execution()
+
+        (self.root / "S" / "T").rename(self.root / "S" / "V")
+        self.bump_mtime(self.root / "S")
+        cache = FileCache()
+
+        assert old not in cache
+        assert self.root / "S" / "V" / "file.pdf" in cache
+        assert set(cache._folders) == {".", "S", "S/V"}
+
+    def test_unchanged_folder_not_scanned(self):
+        path = self.write("S/file.pdf")
+        self.new_execution()
+
+        # Edited in place without changing the folder's mtime
+        path.write_bytes(b"01234567")
+        assert FileCache()[path] == 4
+
+        assert FileCache().rescan() == 1
+        assert FileCache()[path] == 8
+
+    def test_keep_hash(self):
+        kept = self.write("S/kept.pdf")
+        edited = self.write("S/edited.pdf")
+        cache = FileCache()
+        assert cache.get_digest(kept) == digest_of(b"0123")
+        assert cache.get_digest(edited) == digest_of(b"0123")
+        cache.save()
+
+        edited.write_bytes(b"abcdefgh")
+        self.write("S/new.pdf")
+        self.bump_mtime(self.root / "S")
+        cache = FileCache()
+
+        assert cache.get_entry(kept)["hash"] == digest_of(b"0123")
+        assert cache.get_entry(edited)["hash"] is None
+        assert cache.get_digest(edited) == digest_of(b"abcdefgh")
+
+        assert cache.rescan() == 3
+        assert cache.get_entry(kept)["hash"] == digest_of(b"0123")
+
+    def test_concurrent_first_use(self):
+        path = self.write("file.pdf")
+        cache = FileCache()
+
+        scanning = Event()
+        resume = Event()
+        scan_folder = cache._scan_folder
+
+        def slow_scan_folder(*args):
+            scanning.set()
+            resume.wait(5)
+            return scan_folder(*args)
+
+        results = []
+        with mock.patch.object(cache, "_scan_folder", side_effect=slow_scan_folder):
+            loader = Thread(target=lambda: results.append(path in cache))
+            loader.start()
+            assert scanning.wait(5)
+
+            # Another worker uses the cache while it's being scanned
+            reader = Thread(target=lambda: results.append(path in cache))
+            reader.start()
+            reader.join(0.1)
+            assert reader.is_alive()
+
+            resume.set()
+            loader.join(5)
+            reader.join(5)
+
+        assert results == [True, True]
+
+
+class TestFileCacheIsSame:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        self.cache = FileCache()
+        self.path = tmp_path / "file.pdf"
+        self.path.write_bytes(b"01234567")
+        self.cache._cache[self.path] = {"size": 8, "mtime": None, "hash": None}
+        self.cache._loaded = True
+        self.digest_m = mock.patch(
+            "vcm.downloader.filecache.file_digest", wraps=file_digest
+        ).start()
+        yield
+        mock.patch.stopall()
+
+    def test_different_size(self):
+        assert not self.cache.is_same(self.path, 4, digest_of(b"0123"))
+        self.digest_m.assert_not_called()
+
+    def test_same_size(self):
+        assert self.cache.is_same(self.path, 8, digest_of(b"01234567"))
+        assert not self.cache.is_same(self.path, 8, digest_of(b"abcdefgh"))
+        # The hash is calculated once
+        self.digest_m.assert_called_once_with(self.path)
+
+    def test_not_in_cache(self):
+        assert not self.cache.is_same(self.path.with_name("x"), 8, "hash")
@@ -0,0 +1,83 @@
+from unittest import mock
+
+import pytest
+
+from vcm.core.modules import Modules
+from vcm.downloader.forums import ForumIndex
+from vcm.downloader.link import ForumDiscussion, Resource
+
+DISCUSSION_URL = "https://campusvirtual.uva.es/mod/forum/discuss.php?d=1"
+ATTACHMENT_URL = "https://campusvirtual.uva.es/pluginfile.php/1/file.pdf"
+
+
+class TestForumIndexPending:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        settings_m = mock.patch("vcm.downloader.store.settings").start()
+        settings_m.root_folder = tmp_path
+        mock.patch("vcm.downloader.link.Connection").start()
+        self.modules_m = mock.patch("vcm.downloader.link.Modules").start()
+        self.modules_m.current.return_value = Modules.download
+        self.modules_m.download = Modules.download
+
+        ForumIndex._instance = None
+        self.index = ForumIndex()
+
+        subject = mock.MagicMock()
+        subject.name = "Subject"
+        self.discussion = ForumDiscussion(
+            "Discussion", None, DISCUSSION_URL, None, subject, signature="sig"
+        )
+        self.discussion.find_resources = mock.MagicMock(side_effect=self.attach)
+        self.discussion.make_request = mock.MagicMock()
+        self.discussion.process_request_bs4 = mock.MagicMock()
+        self.attachment = None
+        yield
+        ForumIndex._instance = None
+        mock.patch.stopall()
+
+    def attach(self):
+        subject = self.discussion.subject
+        self.attachment = Resource(
+            "File", None, ATTACHMENT_URL, None, subject, self.discussion
+        )
+        self.attachment.do_download = mock.MagicMock()
+
+    def test_attachment_pending(self):
+        self.discussion.download()
+
+        assert self.index.commit() == 0
+        assert DISCUSSION_URL not in self.index
+
+    def test_stored_after_attachments(self):
+        self.discussion.download()
+        # The attachment is downloaded by another worker
+        self.attachment.download()
+
+        assert self.index.commit() == 1
+        assert self.index._entries[DISCUSSION_URL] == "sig"
+        assert self.index._modified
+
+    def test_attachment_failed(self):
+        self.discussion.download()
+        self.attachment.do_download.side_effect = OSError
+        with pytest.raises(OSError):
+            self.attachment.download()
+
+        assert self.index.commit() == 0
+        assert DISCUSSION_URL not in self.index
+
+    def test_discussion_failed(self):
+        self.discussion.make_request.side_effect = OSError
+        with pytest.raises(OSError):
+            self.discussion.download()
+
+        assert self.index.commit() == 0
+
+    def test_notify(self):
+        self.modules_m.current.return_value = Modules.notify
+        self.discussion.download()
+        self.attachment.download()
+
+        assert self.index.commit() == 0
+        assert not self.index._modified
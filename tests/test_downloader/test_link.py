@@ -0,0 +1,637 @@
+import json
+from unittest import mock
+
+import pytest
+from requests.exceptions import ChunkedEncodingError
+
+from vcm.core.concurrency import ConcurrencyLimiter
+from vcm.core.exceptions import ResponseError
+from vcm.core.networking import Downloader
+from vcm.core.utils import parse_html
+from vcm.downloader.alias import Alias
+from vcm.downloader.filecache import new_digest
+from vcm.downloader.link import BaseLink, Html, Resource
+from vcm.downloader.resolutions import ResolutionCache
+
+URL = "https://campusvirtual.uva.es/file.pdf"
+VIEW_URL = "https://campusvirtual.uva.es/mod/resource/view.php?id=1"
+VALIDATORS = {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jun 2020 10:00:00 GMT"}
+
+
+def make_response(status_code=200, chunks=(), error=None, **headers):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.ok = status_code < 400
+    response.headers = headers
+
+    def iter_content(_chunk_size):
+        yield from chunks
+        if error:
+            raise error
+
+    response.iter_content.side_effect = iter_content
+    return response
+
+
+def digest_of(content):
+    digest = new_digest()
+    digest.update(content)
+    return digest.hexdigest()
+
+
+class TestResumeDownload:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        self.connection_m = mock.patch("vcm.downloader.link.Connection").start()
+        self.connection_m.return_value.get.side_effect = self.get
+        self.settings_m = mock.patch("vcm.downloader.link.settings").start()
+        self.settings_m.download_chunk_size = 4
+        self.settings_m.retries = 3
+        mock.patch("vcm.downloader.link.RateLimiter").start()
+
+        self.responses = []
+        self.requests = []
+
+        subject = mock.MagicMock()
+        subject.name = "Subject"
+        self.link = BaseLink("File", None, URL, None, subject)
+        self.link.filepath = tmp_path / "file.pdf"
+        self.part_path = tmp_path / "file.pdf.part"
+        self.sidecar_path = tmp_path / "file.pdf.part.json"
+        yield
+        mock.patch.stopall()
+
+    def get(self, url, **kwargs):
+        self.requests.append(kwargs.get("headers"))
+        return self.responses.pop(0)
+
+    def write_partial(self, content, offset=None, validators=VALIDATORS):
+        self.part_path.write_bytes(content)
+        sidecar = {
+            "url": URL,
+            "offset": len(content) if offset is None else offset,
+            "etag": validators.get("ETag"),
+            "last-modified": validators.get("Last-Modified"),
+        }
+        self.sidecar_path.write_text(json.dumps(sidecar))
+
+    def test_new_download(self):
+        self.link.response = make_response(200, [b"0123", b"4567"], **VALIDATORS)
+
+        part_path, length, digest = self.link.stream_response_content()
+
+        assert part_path == self.part_path
+        assert part_path.read_bytes() == b"01234567"
+        assert (length, digest) == (8, digest_of(b"01234567"))
+        assert not self.sidecar_path.exists()
+        assert self.requests == []
+
+    def test_resume_206(self):
+        self.write_partial(b"0123")
+        self.link.response = make_response(200, [b"ignored"], **VALIDATORS)
+        self.responses.append(
+            make_response(
+                206, [b"4567"], **VALIDATORS, **{"Content-Range": "bytes 4-7/8"}
+            )
+        )
+
+        _, length, digest = self.link.stream_response_content()
+
+        assert self.requests == [{"Range": "bytes=4-", "If-Range": '"abc"'}]
+        assert self.part_path.read_bytes() == b"01234567"
+        assert (length, digest) == (8, digest_of(b"01234567"))
+        assert not self.sidecar_path.exists()
+
+    def test_resume_200_restarts(self):
+        # The server ignored the Range header (or the content changed)
+        self.write_partial(b"0123")
+        self.link.response = make_response(200, [b"ignored"], **VALIDATORS)
+        self.responses.append(make_response(200, [b"abcd", b"efgh"], **VALIDATORS))
+
+        _, length, digest = self.link.stream_response_content()
+
+        assert self.requests == [{"Range": "bytes=4-", "If-Range": '"abc"'}]
+        assert self.part_path.read_bytes() == b"abcdefgh"
+        assert (length, digest) == (8, digest_of(b"abcdefgh"))
+
+    def test_resume_range_not_satisfiable(self):
+        self.write_partial(b"0123")
+        self.link.response = make_response(200, [b"ignored"], **VALIDATORS)
+        self.responses.append(make_response(416))
+        self.responses.append(make_response(200, [b"abcd"], **VALIDATORS))
+
+        _, length, _ = self.link.stream_response_content()
+
+        assert self.requests == [{"Range": "bytes=4-", "If-Range": '"abc"'}, None]
+        assert self.part_path.read_bytes() == b"abcd"
+        assert length == 4
+
+    def test_resume_content_range_mismatch(self):
+        self.write_partial(b"0123")
+        self.link.response = make_response(200, [b"ignored"], **VALIDATORS)
+        self.responses.append(
+            make_response(
+                206, [b"wrong"], **VALIDATORS, **{"Content-Range": "bytes 2-7/8"}
+            )
+        )
+        self.responses.append(make_response(200, [b"abcd", b"efgh"], **VALIDATORS))
+
+        _, length, digest = self.link.stream_response_content()
+
+        # The partial file is discarded and downloaded from the beginning
+        assert self.requests == [{"Range": "bytes=4-", "If-Range": '"abc"'}, None]
+        assert self.part_path.read_bytes() == b"abcdefgh"
+        assert (length, digest) == (8, digest_of(b"abcdefgh"))
+
+    @pytest.mark.parametrize(
+        "validators",
+        [
+            {"ETag": '"xyz"', "Last-Modified": VALIDATORS["Last-Modified"]},
+            {"ETag": '"abc"', "Last-Modified": "Tue, 02 Jun 2020 10:00:00 GMT"},
+        ],
+    )
+    def test_validators_changed(self, validators):
+        self.write_partial(b"0123")
+        self.link.response = make_response(200, [b"abcd", b"efgh"], **validators)
+
+        _, length, _ = self.link.stream_response_content()
+
+        assert self.requests == []
+        assert self.part_path.read_bytes() == b"abcdefgh"
+        assert length == 8
+
+    def test_weak_etag_uses_last_modified(self):
+        validators = {"ETag": 'W/"abc"', "Last-Modified": VALIDATORS["Last-Modified"]}
+        self.write_partial(b"0123", validators=validators)
+        self.link.response = make_response(200, [b"ignored"], **validators)
+        self.responses.append(
+            make_response(
+                206, [b"4567"], **validators, **{"Content-Range": "bytes 4-7/8"}
+            )
+        )
+
+        self.link.stream_response_content()
+
+        assert self.requests == [
+            {"Range": "bytes=4-", "If-Range": VALIDATORS["Last-Modified"]}
+        ]
+
+    def test_interrupted_and_resumed(self):
+        self.link.checkpoint_interval = 1
+        self.link.response = make_response(
+            200, [b"0123"], ChunkedEncodingError(), **VALIDATORS
+        )
+        self.responses.append(
+            make_response(
+                206, [b"4567"], **VALIDATORS, **{"Content-Range": "bytes 4-7/8"}
+            )
+        )
+
+        _, length, digest = self.link.stream_response_content()
+
+        assert self.requests == [{"Range": "bytes=4-", "If-Range": '"abc"'}]
+        assert (length, digest) == (8, digest_of(b"01234567"))
+        assert not self.sidecar_path.exists()
+
+    def test_interrupted_keeps_partial_file(self):
+        self.settings_m.retries = 1
+        self.link.checkpoint_interval = 1
+        self.link.response = make_response(
+            200, [b"0123"], ChunkedEncodingError(), **VALIDATORS
+        )
+
+        with pytest.raises(ChunkedEncodingError):
+            self.link.stream_response_content()
+
+        assert self.part_path.read_bytes() == b"0123"
+        sidecar = json.loads(self.sidecar_path.read_text())
+        assert sidecar["offset"] == 4
+        assert sidecar["etag"] == '"abc"'
+
+
+class TestResourceOutdatedResolution:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.connection_m = mock.patch("vcm.downloader.link.Connection").start()
+        self.get_m = self.connection_m.return_value.get
+        self.resolutions_m = mock.patch("vcm.downloader.link.ResolutionCache").start()
+        self.fingerprints_m = mock.patch("vcm.downloader.link.PageFingerprints").start()
+        mock.patch("vcm.downloader.link.ValidatorCache").start()
+
+        self.subject = mock.MagicMock()
+        self.subject.name = "Subject"
+        self.resource = Resource("File", None, VIEW_URL, None, self.subject)
+        self.resource.redirect_url = URL
+        yield
+        mock.patch.stopall()
+
+    def test_outdated(self):
+        self.resource.resolved_from_cache = True
+        ok = make_response(200)
+        self.get_m.side_effect = [make_response(404), ok]
+
+        self.resource.make_request()
+
+        assert [x[0][0] for x in self.get_m.call_args_list] == [URL, VIEW_URL]
+        assert self.resource.response is ok
+        assert self.resource.redirect_url is None
+        assert self.resource.resolved_from_cache is False
+        self.resolutions_m.return_value.discard.assert_called_once_with(VIEW_URL)
+        self.fingerprints_m.return_value.discard.assert_called_once_with(
+            self.subject.url_hash
+        )
+
+    def test_not_from_cache(self):
+        self.get_m.return_value = make_response(404)
+
+        with pytest.raises(ResponseError, match="404"):
+            self.resource.make_request()
+
+        self.get_m.assert_called_once()
+        self.resolutions_m.return_value.discard.assert_not_called()
+
+
+class TestSaveResponseContent:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        mock.patch("vcm.downloader.link.Connection").start()
+        self.settings_m = mock.patch("vcm.downloader.link.settings").start()
+        self.settings_m.download_chunk_size = 4
+        mock.patch("vcm.downloader.link.RateLimiter").start()
+        mock.patch("vcm.downloader.link.ValidatorCache").start()
+        mock.patch("vcm.downloader.link.Results").start()
+        self.cache_m = mock.patch("vcm.downloader.link.REAL_FILE_CACHE").start()
+        self.cache_m.__contains__.return_value = True
+        self.cache_m.__getitem__.return_value = 8
+
+        subject = mock.MagicMock()
+        subject.name = "Subject"
+        self.link = BaseLink("File", None, URL, None, subject)
+        self.link.filepath = tmp_path / "file.pdf"
+        self.link.filepath.write_bytes(b"01234567")
+        yield
+        mock.patch.stopall()
+
+    def test_same_length_without_validators(self):
+        self.link.response = make_response(
+            200, [b"abcdefgh"], **{"Content-Length": "8"}
+        )
+
+        self.link.save_response_content()
+
+        # Not downloaded nor hashed
+        self.link.response.iter_content.assert_not_called()
+        self.cache_m.is_same.assert_not_called()
+        assert self.link.filepath.read_bytes() == b"01234567"
+
+    def test_same_length_with_validators(self):
+        self.cache_m.is_same.return_value = False
+        self.link.response = make_response(
+            200, [b"abcdefgh"], **VALIDATORS, **{"Content-Length": "8"}
+        )
+
+        self.link.save_response_content()
+
+        self.cache_m.is_same.assert_called_once_with(
+            self.link.filepath, 8, digest_of(b"abcdefgh")
+        )
+        assert self.link.filepath.read_bytes() == b"abcdefgh"
+
+    def test_same_content(self):
+        self.cache_m.is_same.return_value = True
+        self.link.response = make_response(200, [b"01234567"], **VALIDATORS)
+
+        self.link.save_response_content()
+
+        self.cache_m.update.assert_not_called()
+        assert not self.link.filepath.with_name("file.pdf.part").exists()
+
+
+class TestReleaseRepeatedRequests:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        settings_m = mock.patch("vcm.core.concurrency.settings").start()
+        settings_m.adaptive_concurrency = True
+        self.limiter = ConcurrencyLimiter()
+        self.limiter.configure(4)
+
+        connection_m = mock.patch("vcm.downloader.link.Connection").start()
+        connection_m.return_value.get.side_effect = self.get
+        mock.patch("vcm.downloader.link.ResolutionCache").start()
+        mock.patch("vcm.downloader.link.PageFingerprints").start()
+        mock.patch("vcm.downloader.link.ValidatorCache").start()
+        self.responses = []
+
+        self.subject = mock.MagicMock()
+        self.subject.name = "Subject"
+        yield
+        ConcurrencyLimiter._instance = None
+        mock.patch.stopall()
+
+    def get(self, url, **kwargs):
+        # Holds a slot until the body is read or the response is closed, like
+        # Downloader.send_request
+        response = self.responses.pop(0)
+        self.limiter.acquire()
+        Downloader.hold_until_consumed(
+            response, lambda: self.limiter.release(0.1, response.status_code)
+        )
+        return response
+
+    def test_408(self):
+        link = BaseLink("File", None, URL, None, self.subject)
+        self.responses = [make_response(408), make_response(200)]
+
+        link.make_request()
+        assert self.limiter.in_flight == 1
+
+        link.close_connection()
+        assert self.limiter.in_flight == 0
+
+    def test_outdated_resolution(self):
+        resource = Resource("File", None, VIEW_URL, None, self.subject)
+        resource.redirect_url = URL
+        resource.resolved_from_cache = True
+        self.responses = [make_response(404), make_response(200)]
+
+        resource.make_request()
+        assert self.limiter.in_flight == 1
+
+        resource.close_connection()
+        assert self.limiter.in_flight == 0
+
+
+class TestHandleHtml:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        connection_m = mock.patch("vcm.downloader.link.Connection").start()
+        self.get_m = connection_m.return_value.get
+        mock.patch("vcm.downloader.link.RateLimiter").start()
+        mock.patch("vcm.downloader.link.AlgorithmStats").start().return_value.sort = (
+            lambda scope, algorithms: algorithms
+        )
+        resolutions_m = mock.patch("vcm.downloader.link.ResolutionCache").start()
+        resolutions_m.return_value.get.return_value = None
+        resolutions_m.return_value.get_file_id.return_value = None
+        self.resolutions_m = resolutions_m
+        validators_m = mock.patch("vcm.downloader.link.ValidatorCache").start()
+        validators_m.return_value.get.return_value = None
+        self.parse_html_m = mock.patch(
+            "vcm.downloader.link.parse_html", wraps=parse_html
+        ).start()
+
+        self.subject = mock.MagicMock()
+        self.subject.name = "Subject"
+        yield
+        mock.patch.stopall()
+
+    def test_page_requested_and_parsed_once(self):
+        page = (
+            '<div role="main"><h2>Tema 1</h2>'
+            f'<object id="resourceobject" data="{URL}"></object></div>'
+        )
+        response = make_response(200, **{"Content-Type": "text/html; charset=utf-8"})
+        response.text = page
+        response.content = page.encode()
+        response.history = []
+        self.get_m.return_value = response
+        resource = Resource("Tema 1", None, VIEW_URL, None, self.subject)
+
+        resource.do_download()
+
+        html = self.subject.add_link.call_args[0][0]
+        assert isinstance(html, Html)
+        assert html.soup is resource.soup
+
+        html.do_download()
+
+        self.get_m.assert_called_once()
+        self.parse_html_m.assert_called_once_with(page)
+        found = self.subject.add_link.call_args[0][0]
+        assert isinstance(found, Resource)
+        assert (found.name, found.url) == ("Tema 1", URL)
+        self.resolutions_m.return_value.update.assert_called_once_with(
+            VIEW_URL, URL, "check_algorithm_1", "Tema 1", found.url_hash
+        )
+
+
+class TestResourceProbe:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        connection_m = mock.patch("vcm.downloader.link.Connection").start()
+        self.head_m = connection_m.return_value.head
+        self.get_m = connection_m.return_value.get
+        self.settings_m = mock.patch("vcm.downloader.link.settings").start()
+        self.settings_m.probe_content_types = ["application/pdf", "image/*"]
+        self.cache_m = mock.patch("vcm.downloader.link.REAL_FILE_CACHE").start()
+        self.cache_m.__contains__.return_value = True
+        self.cache_m.__getitem__.return_value = 8
+        self.validators_m = mock.patch("vcm.downloader.link.ValidatorCache").start()
+        self.filepath = tmp_path / "file.pdf"
+        self.validators = {
+            "etag": VALIDATORS["ETag"],
+            "last-modified": VALIDATORS["Last-Modified"],
+            "content-type": "application/pdf",
+            "length": 8,
+            "filepath": self.filepath.as_posix(),
+        }
+        self.validators_m.return_value.get.return_value = self.validators
+
+        subject = mock.MagicMock()
+        subject.name = "Subject"
+        self.resource = Resource("File", None, URL, None, subject)
+        yield
+        mock.patch.stopall()
+
+    @pytest.mark.parametrize(
+        "content_type, expected",
+        [
+            ("application/pdf", True),
+            ("application/pdf; charset=binary", True),
+            ("image/png", True),
+            ("text/html", False),
+            (None, False),
+        ],
+    )
+    def test_should_probe(self, content_type, expected):
+        assert Resource.should_probe(content_type) is expected
+
+    def test_should_probe_disabled(self):
+        self.settings_m.probe_content_types = []
+        assert Resource.should_probe("application/pdf") is False
+
+    def test_probe_head(self):
+        response = make_response(200, **{"Content-Length": "8"})
+        self.head_m.return_value = response
+
+        assert self.resource.probe() == (response, 8)
+        self.head_m.assert_called_once_with(URL, allow_redirects=True, lane="files")
+        self.get_m.assert_not_called()
+
+    @pytest.mark.parametrize("status_code", [405, 501])
+    @pytest.mark.parametrize(
+        "headers, length",
+        [
+            ({"Content-Range": "bytes 0-0/8"}, 8),
+            ({"Content-Range": "bytes 0-0/*"}, None),
+        ],
+    )
+    def test_probe_range(self, status_code, headers, length):
+        self.head_m.return_value = make_response(status_code)
+        response = make_response(206, **headers)
+        self.get_m.return_value = response
+
+        assert self.resource.probe() == (response, length)
+        self.get_m.assert_called_once_with(
+            URL, stream=True, headers={"Range": "bytes=0-0"}, lane="files"
+        )
+        response.close.assert_called_once_with()
+
+    def test_probe_range_ignored(self):
+        # The server sent the whole file instead of the first byte
+        self.head_m.return_value = make_response(405)
+        self.get_m.return_value = make_response(200, **{"Content-Length": "8"})
+
+        assert self.resource.probe()[1] == 8
+
+    def test_unchanged(self):
+        self.head_m.return_value = make_response(
+            200, **VALIDATORS, **{"Content-Length": "8"}
+        )
+        assert self.resource.is_unchanged() is True
+
+    @pytest.mark.parametrize(
+        "status_code, headers",
+        [
+            (404, {**VALIDATORS, "Content-Length": "8"}),
+            (200, {**VALIDATORS, "Content-Length": "9"}),
+            (200, {**VALIDATORS}),
+            (200, {"Content-Length": "8"}),
+            (200, {"ETag": '"xyz"', "Content-Length": "8"}),
+            (200, {**VALIDATORS, "ETag": '"xyz"', "Content-Length": "8"}),
+        ],
+    )
+    def test_changed(self, status_code, headers):
+        self.head_m.return_value = make_response(status_code, **headers)
+        assert self.resource.is_unchanged() is False
+
+    def test_not_probed(self):
+        self.validators["content-type"] = "text/plain"
+        assert self.resource.is_unchanged() is False
+        self.head_m.assert_not_called()
+
+    def test_no_validators(self):
+        self.validators_m.return_value.get.return_value = None
+        assert self.resource.is_unchanged() is False
+        self.head_m.assert_not_called()
+
+
+class TestFileIdBetweenRuns:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        for module in ("store", "resolutions", "alias"):
+            settings_m = mock.patch(f"vcm.downloader.{module}.settings").start()
+            settings_m.root_folder = tmp_path
+            settings_m.resolution_cache_ttl = 3600
+            settings_m.alias_backend = "json"
+        connection_m = mock.patch("vcm.downloader.link.Connection").start()
+        self.get_m = connection_m.return_value.get
+        mock.patch("vcm.downloader.link.RateLimiter").start()
+        mock.patch("vcm.downloader.link.AlgorithmStats").start().return_value.sort = (
+            lambda scope, algorithms: algorithms
+        )
+        validators_m = mock.patch("vcm.downloader.link.ValidatorCache").start()
+        validators_m.return_value.get.return_value = None
+        self.reset_stores()
+
+        self.subject = mock.MagicMock()
+        self.subject.name = "Subject"
+        yield
+        self.reset_stores()
+        mock.patch.stopall()
+
+    @staticmethod
+    def reset_stores():
+        ResolutionCache._instance = None
+        Alias._instance = None
+
+    def new_run(self):
+        ResolutionCache().save()
+        self.reset_stores()
+
+    def alias_of(self, resource):
+        return Alias.id_to_alias(resource.url_hash, "Subject/Tema 1.pdf")
+
+    def first_run(self):
+        """The resource's page wraps the file, which is saved by the resource
+        found in the page."""
+
+        page = (
+            '<div role="main"><h2>Tema 1</h2>'
+            f'<object id="resourceobject" data="{URL}"></object></div>'
+        )
+        response = make_response(200, **{"Content-Type": "text/html"})
+        response.text = page
+        response.content = page.encode()
+        response.history = []
+        self.get_m.return_value = response
+
+        Resource("Tema 1", None, VIEW_URL, None, self.subject).do_download()
+        self.subject.add_link.call_args[0][0].do_download()
+        found = self.subject.add_link.call_args[0][0]
+        assert found.url == URL
+        return found
+
+    def test_cached_resolution(self):
+        found = self.first_run()
+        alias = self.alias_of(found)
+        self.new_run()
+
+        resource = Resource("Tema 1", None, VIEW_URL, None, self.subject)
+        resource.use_cached_resolution()
+
+        assert resource.redirect_url == URL
+        assert resource.url_hash == found.url_hash
+        assert self.alias_of(resource) == alias
+        assert len(Alias()) == 1
+
+    def test_resolved_by_subject(self):
+        found = self.first_run()
+        alias = self.alias_of(found)
+        self.new_run()
+
+        resource = Resource("Tema 1", None, VIEW_URL, None, self.subject)
+        resource.redirect_url = URL
+        resource.use_cached_resolution()
+
+        assert resource.url_hash == found.url_hash
+        assert self.alias_of(resource) == alias
+
+    def test_outdated_resolution(self):
+        found = self.first_run()
+        self.new_run()
+
+        # The file url changed, the page is parsed again
+        ResolutionCache().discard(VIEW_URL)
+        self.new_run()
+        assert ResolutionCache().get(VIEW_URL) is None
+        self.first_run()
+
+        resource = Resource("Tema 1", None, VIEW_URL, None, self.subject)
+        resource.use_cached_resolution()
+        assert resource.url_hash == found.url_hash
+
+    def test_saved_by_resource(self):
+        response = make_response(200, **{"Content-Type": "application/pdf"})
+        response.history = [make_response(303)]
+        response.url = URL
+        resource = Resource("Tema 1", None, VIEW_URL, None, self.subject)
+        resource.response = response
+
+        resource.save_resolution()
+        self.new_run()
+
+        other = Resource("Tema 1", None, VIEW_URL, None, self.subject)
+        other.use_cached_resolution()
+        assert other.redirect_url == URL
+        assert other.url_hash == resource.url_hash
@@ -0,0 +1,157 @@
+import json
+from unittest import mock
+
+import pytest
+
+from vcm.downloader.partial import PartialDownload
+
+URL = "https://campusvirtual.uva.es/file.pdf"
+
+
+def make_response(status_code=200, **headers):
+    response = mock.MagicMock()
+    response.status_code = status_code
+    response.headers = headers
+    return response
+
+
+class TestPartialDownload:
+    @pytest.fixture(autouse=True)
+    def partial(self, tmp_path):
+        self.filepath = tmp_path / "file.pdf"
+        self.partial = PartialDownload(self.filepath, URL)
+
+    def write_partial(self, content=b"0123456789", **sidecar):
+        sidecar.setdefault("url", URL)
+        sidecar.setdefault("offset", len(content))
+        sidecar.setdefault("etag", '"abc"')
+        sidecar.setdefault("last-modified", "Mon, 01 Jun 2020 10:00:00 GMT")
+        self.partial.part_path.write_bytes(content)
+        self.partial.sidecar_path.write_text(json.dumps(sidecar))
+
+    def test_paths(self, tmp_path):
+        assert self.partial.part_path == tmp_path / "file.pdf.part"
+        assert self.partial.sidecar_path == tmp_path / "file.pdf.part.json"
+
+    @pytest.mark.parametrize(
+        "name, expected",
+        [
+            ("file.pdf", False),
+            ("file.pdf.part", True),
+            ("file.pdf.part.json", True),
+            ("file.json", False),
+        ],
+    )
+    def test_is_partial(self, tmp_path, name, expected):
+        assert PartialDownload.is_partial(tmp_path / name) is expected
+
+    def test_load(self):
+        self.write_partial()
+        assert self.partial.load()["offset"] == 10
+
+    def test_load_no_part_file(self):
+        self.write_partial()
+        self.partial.part_path.unlink()
+        assert self.partial.load() is None
+
+    @pytest.mark.parametrize(
+        "sidecar",
+        [
+            "{corrupted",
+            "[1, 2]",
+            json.dumps({"url": "https://other.com/file.pdf", "offset": 5}),
+            json.dumps({"url": URL, "offset": "5"}),
+        ],
+    )
+    def test_load_invalid_sidecar(self, sidecar):
+        self.write_partial()
+        self.partial.sidecar_path.write_text(sidecar)
+        assert self.partial.load() is None
+
+    def test_resume_offset(self):
+        self.write_partial(b"0123456789", offset=6)
+        response = make_response(
+            ETag='"abc"', **{"Last-Modified": "Mon, 01 Jun 2020 10:00:00 GMT"}
+        )
+
+        assert self.partial.get_resume_offset(response) == 6
+        # The bytes after the checkpoint are discarded
+        assert self.partial.part_path.read_bytes() == b"012345"
+        assert self.partial.etag == '"abc"'
+
+    def test_resume_offset_beyond_part_file(self):
+        self.write_partial(b"0123", offset=10)
+        response = make_response(
+            ETag='"abc"', **{"Last-Modified": "Mon, 01 Jun 2020 10:00:00 GMT"}
+        )
+        assert self.partial.get_resume_offset(response) == 4
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {"ETag": '"xyz"', "Last-Modified": "Mon, 01 Jun 2020 10:00:00 GMT"},
+            {"ETag": '"abc"', "Last-Modified": "Tue, 02 Jun 2020 10:00:00 GMT"},
+            {"ETag": '"abc"'},
+            {},
+        ],
+    )
+    def test_resume_offset_validators_changed(self, headers):
+        self.write_partial()
+        assert self.partial.get_resume_offset(make_response(**headers)) == 0
+        assert self.partial.part_path.read_bytes() == b"0123456789"
+
+    def test_resume_offset_no_sidecar(self):
+        self.partial.part_path.write_bytes(b"0123")
+        assert self.partial.get_resume_offset(make_response(ETag='"abc"')) == 0
+
+    @pytest.mark.parametrize(
+        "etag, last_modified, if_range",
+        [
+            ('"abc"', "<date>", '"abc"'),
+            ('W/"abc"', "<date>", "<date>"),
+            (None, "<date>", "<date>"),
+            ('W/"abc"', None, None),
+        ],
+    )
+    def test_range_headers(self, etag, last_modified, if_range):
+        self.partial.etag = etag
+        self.partial.last_modified = last_modified
+
+        headers = self.partial.get_range_headers(1024)
+        assert headers["Range"] == "bytes=1024-"
+        assert headers.get("If-Range") == if_range
+
+    @pytest.mark.parametrize(
+        "content_range, expected",
+        [("bytes 100-199/200", 100), ("bytes */200", None), (None, None)],
+    )
+    def test_range_start(self, content_range, expected):
+        headers = {"Content-Range": content_range} if content_range else {}
+        response = make_response(206, **headers)
+        assert PartialDownload.get_range_start(response) == expected
+
+    def test_checkpoint(self):
+        self.partial.start(make_response(ETag='"abc"'))
+        self.partial.checkpoint(2048)
+
+        sidecar = json.loads(self.partial.sidecar_path.read_text())
+        assert sidecar == {
+            "url": URL,
+            "offset": 2048,
+            "etag": '"abc"',
+            "last-modified": None,
+        }
+
+    def test_checkpoint_without_validators(self):
+        self.write_partial()
+        self.partial.start(make_response())
+        assert not self.partial.sidecar_path.exists()
+
+    def test_discard(self):
+        self.write_partial()
+        self.partial.discard()
+        assert not self.partial.part_path.exists()
+        assert not self.partial.sidecar_path.exists()
+
+        # Nothing to discard
+        self.partial.discard()
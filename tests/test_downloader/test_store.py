@@ -0,0 +1,141 @@
+import json
+import logging
+from unittest import mock
+
+import pytest
+
+from vcm.downloader import finish_execution, save_stores
+from vcm.downloader.store import JsonStore
+
+
+class TestJsonStore:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        self.settings_m = mock.patch("vcm.downloader.store.settings").start()
+        self.settings_m.root_folder = tmp_path
+        self.path = tmp_path / "store.json"
+
+        class Store(JsonStore):
+            filename = "store.json"
+            description = "entries"
+
+            def set(self, key, value):
+                with self._lock:
+                    self._entries[key] = value
+                    self._modified = True
+
+        self.store_cls = Store
+        yield
+        mock.patch.stopall()
+
+    def test_singleton(self):
+        assert self.store_cls() is self.store_cls()
+
+    def test_path(self, tmp_path):
+        assert self.store_cls().path == tmp_path / "store.json"
+
+    def test_load_no_file(self):
+        store = self.store_cls()
+        assert len(store) == 0
+        assert "a" not in store
+
+    def test_load(self):
+        self.path.write_text(json.dumps({"a": 1}))
+        store = self.store_cls()
+        assert len(store) == 1
+        assert "a" in store
+
+    @pytest.mark.parametrize("content", ["{invalid", b"\xff\xfe"])
+    def test_load_corrupted(self, content, caplog):
+        if isinstance(content, bytes):
+            self.path.write_bytes(content)
+        else:
+            self.path.write_text(content)
+
+        store = self.store_cls()
+        assert len(store) == 0
+        assert "Entries file corrupted" in caplog.text
+
+    def test_load_invalid(self, caplog):
+        self.path.write_text("[1, 2]")
+        store = self.store_cls()
+        assert len(store) == 0
+        assert "Entries file invalid" in caplog.text
+
+    def test_save(self):
+        store = self.store_cls()
+        store.save()
+        assert not self.path.exists()
+
+        store.set("a", [1, 2])
+        store.save()
+        assert json.loads(self.path.read_text()) == {"a": [1, 2]}
+
+        self.path.unlink()
+        store.save()
+        assert not self.path.exists()
+
+    def test_save_interrupted(self):
+        self.path.write_text('{"a": 1}')
+        store = self.store_cls()
+        store.set("b", 2)
+
+        with mock.patch("vcm.downloader.store.json.dump", side_effect=OSError):
+            with pytest.raises(OSError):
+                store.save()
+
+        # The file is kept intact
+        assert json.loads(self.path.read_text()) == {"a": 1}
+
+        store.save()
+        assert json.loads(self.path.read_text()) == {"a": 1, "b": 2}
+        assert list(self.path.parent.iterdir()) == [self.path]
+
+    def test_discard(self):
+        store = self.store_cls()
+        store.discard("a")
+        assert not store._modified
+
+        store.set("a", 1)
+        store.save()
+        store.discard("a")
+        assert store._modified
+        assert "a" not in store
+
+
+class TestSaveStores:
+    @pytest.fixture(autouse=True)
+    def mocks(self):
+        self.stores_m = [
+            mock.patch("vcm.downloader.%s" % name).start()
+            for name in ("ValidatorCache", "PageFingerprints", "ResolutionCache")
+        ]
+        self.file_cache_m = mock.patch("vcm.downloader.REAL_FILE_CACHE").start()
+        self.forum_index_m = mock.patch("vcm.downloader.ForumIndex").start()
+        self.alias_m = mock.patch("vcm.downloader.Alias").start()
+        yield
+        mock.patch.stopall()
+
+    def test_save_stores(self, caplog):
+        self.stores_m[0].return_value.save.side_effect = OSError("disk full")
+
+        save_stores()
+
+        for store_m in self.stores_m:
+            store_m.return_value.save.assert_called_once_with()
+        self.file_cache_m.save.assert_called_once_with()
+        self.forum_index_m.return_value.commit.assert_called_once_with()
+        self.forum_index_m.return_value.save.assert_called_once_with()
+        self.alias_m.commit.assert_called_once_with()
+        assert "Error saving" in caplog.text
+
+    @mock.patch("vcm.downloader.save_stores")
+    def test_finish_execution(self, save_stores_m, caplog):
+        caplog.set_level(logging.INFO)
+        connection = mock.MagicMock(pool_stats={"connections": 1})
+
+        finish_execution(connection)
+
+        save_stores_m.assert_called_once_with()
+        assert "Connection pool usage: {'connections': 1}" in caplog.text
+        assert "Unchanged forum discussions" in caplog.text
@@ -0,0 +1,212 @@
+import logging
+from unittest import mock
+
+from bs4.builder import builder_registry
+import pytest
+
+from vcm.core.exceptions import WebServiceError
+from vcm.core.utils import get_html_parser
+from vcm.downloader.link import Resource
+from vcm.downloader.subject import Subject
+
+SUBJECT_URL = "https://campusvirtual.uva.es/course/view.php?id=123"
+RESOURCE_URL = "https://campusvirtual.uva.es/mod/resource/view.php?id=%d"
+FILE_URL = "https://campusvirtual.uva.es/pluginfile.php/%d/file.pdf"
+
+
+def make_sections(*cmids):
+    modules = [
+        {
+            "id": cmid,
+            "contents": [
+                {"type": "file", "fileurl": FILE_URL % cmid + "?forcedownload=1"}
+            ],
+        }
+        for cmid in cmids
+    ]
+    return [{"name": "Section", "modules": modules}]
+
+
+class TestResolveResources:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        alias_m = mock.patch("vcm.downloader.subject.Alias").start()
+        alias_m.id_to_alias.side_effect = lambda id_, path, *args: path
+        mock.patch("vcm.downloader.subject.Connection").start()
+        mock.patch("vcm.downloader.link.Connection").start()
+        self.settings_m = mock.patch("vcm.downloader.subject.settings").start()
+        self.settings_m.root_folder = tmp_path
+        self.settings_m.ajax_batch_size = 10
+        self.batcher_m = mock.patch("vcm.downloader.subject.AjaxBatcher").start()
+        self.submit_m = self.batcher_m.return_value.submit
+        self.webservice_m = mock.patch("vcm.downloader.subject.WebService").start()
+        self.webservice_m.to_pluginfile_url.side_effect = lambda x: x.split("?")[0]
+        self.contents_m = self.webservice_m.return_value.get_course_contents
+
+        Subject.ajax_batcher = None
+        Subject.ajax_allowed = True
+        self.subject = Subject("Subject", SUBJECT_URL, mock.MagicMock())
+        yield
+        Subject.ajax_batcher = None
+        Subject.ajax_allowed = True
+        mock.patch.stopall()
+
+    def make_resources(self, *cmids):
+        return [
+            Resource("Resource %d" % x, None, RESOURCE_URL % x, None, self.subject)
+            for x in cmids
+        ]
+
+    def test_disabled(self):
+        self.settings_m.ajax_batch_size = 0
+        resources = self.make_resources(1)
+
+        self.subject.resolve_resources(resources)
+
+        self.submit_m.assert_not_called()
+        self.contents_m.assert_not_called()
+        assert resources[0].redirect_url is None
+
+    def test_no_resources(self):
+        self.subject.resolve_resources([])
+        self.submit_m.assert_not_called()
+
+    def test_ajax(self):
+        self.submit_m.return_value.result.return_value = make_sections(1, 2)
+        resources = self.make_resources(1, 2, 3)
+
+        self.subject.resolve_resources(resources)
+
+        # A single call for the whole course
+        self.submit_m.assert_called_once_with(
+            "core_course_get_contents", {"courseid": 123}
+        )
+        self.contents_m.assert_not_called()
+        assert [x.redirect_url for x in resources] == [
+            FILE_URL % 1,
+            FILE_URL % 2,
+            None,
+        ]
+
+    def test_batcher_shared(self):
+        self.submit_m.return_value.result.return_value = make_sections(1)
+        other = Subject("Other", SUBJECT_URL, mock.MagicMock())
+
+        self.subject.resolve_resources(self.make_resources(1))
+        other.resolve_resources(self.make_resources(1))
+
+        self.batcher_m.assert_called_once_with()
+        assert self.submit_m.call_count == 2
+
+    def test_ajax_not_allowed(self, caplog):
+        caplog.set_level(logging.INFO)
+        self.submit_m.return_value.result.side_effect = WebServiceError("error")
+        self.contents_m.return_value = make_sections(1)
+        resources = self.make_resources(1)
+
+        self.subject.resolve_resources(resources)
+        self.subject.resolve_resources(self.make_resources(1))
+
+        # AJAX is only tried once, then the web service is used
+        self.submit_m.assert_called_once()
+        assert self.contents_m.call_count == 2
+        self.contents_m.assert_called_with(123)
+        assert resources[0].redirect_url == FILE_URL % 1
+        assert "using the web service" in caplog.text
+
+    def test_webservice_error(self):
+        self.submit_m.return_value.result.side_effect = WebServiceError("error")
+        self.contents_m.side_effect = WebServiceError("error")
+        resources = self.make_resources(1)
+
+        self.subject.resolve_resources(resources)
+
+        assert resources[0].redirect_url is None
+
+
+class TestFindLinksHtml:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path, get_test_data):
+        alias_m = mock.patch("vcm.downloader.subject.Alias").start()
+        alias_m.id_to_alias.side_effect = lambda id_, path, *args: path
+        connection_m = mock.patch("vcm.downloader.subject.Connection").start()
+        connection_m.return_value.get.return_value.text = get_test_data(
+            "course.html.example"
+        )
+        mock.patch("vcm.downloader.link.Connection").start()
+        fingerprints_m = mock.patch("vcm.downloader.subject.PageFingerprints").start()
+        fingerprints_m.return_value.get_links.return_value = None
+        self.settings_m = mock.patch("vcm.downloader.subject.settings").start()
+        self.settings_m.root_folder = tmp_path
+        self.settings_m.ajax_batch_size = 0
+        self.settings_m.section_indexing_urls = [SUBJECT_URL]
+        self.parser_settings_m = mock.patch("vcm.settings.settings").start()
+        get_html_parser.cache_clear()
+        yield
+        get_html_parser.cache_clear()
+        mock.patch.stopall()
+
+    def find_links(self, parser):
+        self.parser_settings_m.html_parser = parser
+        subject = Subject("Subject", SUBJECT_URL, mock.MagicMock())
+        subject.find_links_html()
+        return [Subject.link_to_dict(link) for link in subject.notes_links]
+
+    def test_find_links(self):
+        links = self.find_links("html.parser")
+
+        summary = [(x["section"][0], x["type"], x["name"]) for x in links]
+        assert summary == [
+            ("General", "ForumList", "Avisos"),
+            ("Tema 1. Matrices", "Folder", "Exámenes anteriores"),
+            ("Tema 1. Matrices", "Folder", "Prácticas"),
+            ("Tema 1. Matrices", "Url", "Calculadora de matrices"),
+            ("Tema 2. Espacios vectoriales", "Delivery", "Entrega práctica 2"),
+            ("Tema 2. Espacios vectoriales", "Quiz", "Cuestionario tema 2"),
+            ("Tema 2. Espacios vectoriales", "Page", "Bibliografía"),
+            ("General", "Resource", "Guía docente"),
+            ("Tema 1. Matrices", "Resource", "Apuntes tema 1 & ejercicios"),
+            ("Tema 2. Espacios vectoriales", "Resource", "Soluciones (oculto)"),
+        ]
+        assert links[2]["id"] == "1013"
+        assert links[2]["url"] == (
+            "https://campusvirtual.uva.es/mod/folder/download_folder.php"
+        )
+        assert links[1]["section"][1] == SUBJECT_URL + "#section-1"
+
+    @pytest.mark.parametrize("parser", ["lxml", "html5lib"])
+    def test_parsers_find_same_links(self, parser):
+        if builder_registry.lookup(parser) is None:
+            pytest.skip(f"{parser} not installed")
+
+        expected = self.find_links("html.parser")
+        assert expected
+        assert self.find_links(parser) == expected
+
+
+class TestDictToLink:
+    @pytest.fixture(autouse=True)
+    def mocks(self, tmp_path):
+        alias_m = mock.patch("vcm.downloader.subject.Alias").start()
+        alias_m.id_to_alias.side_effect = lambda id_, path, *args: path
+        mock.patch("vcm.downloader.subject.Connection").start()
+        mock.patch("vcm.downloader.link.Connection").start()
+        settings_m = mock.patch("vcm.downloader.subject.settings").start()
+        settings_m.root_folder = tmp_path
+        self.subject = Subject("Subject", SUBJECT_URL, mock.MagicMock())
+        yield
+        mock.patch.stopall()
+
+    @pytest.mark.parametrize("redirect_url", [FILE_URL % 1, None])
+    def test_replayed_resource(self, redirect_url):
+        resource = Resource("Name", None, RESOURCE_URL % 1, None, self.subject)
+        resource.redirect_url = redirect_url
+
+        data = Subject.link_to_dict(resource)
+        link = self.subject.dict_to_link(data)
+
+        assert isinstance(link, Resource)
+        assert link.redirect_url == redirect_url
+        # A replayed file url is checked like a cached resolution
+        assert link.resolved_from_cache is bool(redirect_url)
+        assert Subject.link_to_dict(link) == data
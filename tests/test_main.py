@@ -166,6 +166,20 @@ def test_discover(download_m):
     universal_mocks.setup.assert_called_once_with()
 
 
+@mock.patch("vcm.main.REAL_FILE_CACHE.rescan")
+def test_rescan(rescan_m):
+    rescan_m.return_value = 25
+    runner = CliRunner()
+    result = runner.invoke(main, ["rescan"])
+
+    assert result.exit_code == 0
+    assert result.output == "Scanned 25 files\n"
+
+    rescan_m.assert_called_once_with()
+    universal_mocks.current.assert_called_once_with("rescan")
+    universal_mocks.setup.assert_called_once_with()
+
+
 @mock.patch("vcm.main.settings_to_string")
 def test_list_settings(settings_to_string_m):
     settings_to_string_m.return_value = "<settings-as-str>"
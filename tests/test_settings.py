@@ -340,9 +340,15 @@ class TestSettings:
         with pytest.raises(ValueError):
             test("invalid")
 
+    def test_probe_content_types_setter(self):
+        test = Settings.probe_content_types_setter
+        assert test("") == []
+        assert test("video/mp4") == ["video/mp4"]
+        assert test("Video/MP4, application/zip,,") == ["application/zip", "video/mp4"]
+
     def test_transforms(self):
         self.transf_patcher.stop()
-        assert len(Settings.transforms) == 14
+        assert len(Settings.transforms) == 34
         for transform in Settings.transforms.values():
             assert callable(transform)
 
@@ -617,6 +623,102 @@ class TestSettingsAttributes:
             == self.settings["secure-section-filename"]
         )
 
+    def test_download_chunk_size(self):
+        assert isinstance(self.settings.download_chunk_size, int)
+        assert self.settings.download_chunk_size == self.settings["download-chunk-size"]
+
+    def test_probe_content_types(self):
+        assert isinstance(self.settings.probe_content_types, list)
+        assert self.settings.probe_content_types == self.settings["probe-content-types"]
+
+    def test_keep_alive(self):
+        assert isinstance(self.settings.keep_alive, bool)
+        assert self.settings.keep_alive == self.settings["keep-alive"]
+
+    def test_pool_block(self):
+        assert isinstance(self.settings.pool_block, bool)
+        assert self.settings.pool_block == self.settings["pool-block"]
+
+    def test_backoff_factor(self):
+        assert isinstance(self.settings.backoff_factor, float)
+        assert self.settings.backoff_factor == self.settings["backoff-factor"]
+
+    def test_backoff_max(self):
+        assert isinstance(self.settings.backoff_max, int)
+        assert self.settings.backoff_max == self.settings["backoff-max"]
+
+    def test_retry_budget(self):
+        assert isinstance(self.settings.retry_budget, int)
+        assert self.settings.retry_budget == self.settings["retry-budget"]
+
+    def test_rate_limit_html_requests(self):
+        assert isinstance(self.settings.rate_limit_html_requests, float)
+        assert (
+            self.settings.rate_limit_html_requests
+            == self.settings["rate-limit-html-requests"]
+        )
+
+    def test_rate_limit_html_bytes(self):
+        assert isinstance(self.settings.rate_limit_html_bytes, int)
+        assert (
+            self.settings.rate_limit_html_bytes
+            == self.settings["rate-limit-html-bytes"]
+        )
+
+    def test_rate_limit_files_requests(self):
+        assert isinstance(self.settings.rate_limit_files_requests, float)
+        assert (
+            self.settings.rate_limit_files_requests
+            == self.settings["rate-limit-files-requests"]
+        )
+
+    def test_rate_limit_files_bytes(self):
+        assert isinstance(self.settings.rate_limit_files_bytes, int)
+        assert (
+            self.settings.rate_limit_files_bytes
+            == self.settings["rate-limit-files-bytes"]
+        )
+
+    def test_adaptive_concurrency(self):
+        assert isinstance(self.settings.adaptive_concurrency, bool)
+        assert (
+            self.settings.adaptive_concurrency == self.settings["adaptive-concurrency"]
+        )
+
+    def test_persist_session(self):
+        assert isinstance(self.settings.persist_session, bool)
+        assert self.settings.persist_session == self.settings["persist-session"]
+
+    def test_discovery_backend(self):
+        assert isinstance(self.settings.discovery_backend, str)
+        assert self.settings.discovery_backend == self.settings["discovery-backend"]
+
+    def test_ajax_batch_size(self):
+        assert isinstance(self.settings.ajax_batch_size, int)
+        assert self.settings.ajax_batch_size == self.settings["ajax-batch-size"]
+
+    def test_ajax_batch_wait(self):
+        assert isinstance(self.settings.ajax_batch_wait, float)
+        assert self.settings.ajax_batch_wait == self.settings["ajax-batch-wait"]
+
+    def test_html_parser(self):
+        assert isinstance(self.settings.html_parser, str)
+        assert self.settings.html_parser == self.settings["html-parser"]
+
+    def test_resolution_cache_ttl(self):
+        assert isinstance(self.settings.resolution_cache_ttl, int)
+        assert (
+            self.settings.resolution_cache_ttl == self.settings["resolution-cache-ttl"]
+        )
+
+    def test_incremental_forums(self):
+        assert isinstance(self.settings.incremental_forums, bool)
+        assert self.settings.incremental_forums == self.settings["incremental-forums"]
+
+    def test_alias_backend(self):
+        assert isinstance(self.settings.alias_backend, str)
+        assert self.settings.alias_backend == self.settings["alias-backend"]
+
     def test_email(self):
         assert isinstance(self.settings.email, str)
         assert self.settings.email == self.settings["email"]
@@ -652,6 +754,26 @@ class TestCheckSettings:
             "forum_subfolders",
             "section_indexing_ids",
             "secure_section_filename",
+            "download_chunk_size",
+            "probe_content_types",
+            "keep_alive",
+            "pool_block",
+            "backoff_factor",
+            "backoff_max",
+            "retry_budget",
+            "rate_limit_html_requests",
+            "rate_limit_html_bytes",
+            "rate_limit_files_requests",
+            "rate_limit_files_bytes",
+            "adaptive_concurrency",
+            "persist_session",
+            "discovery_backend",
+            "ajax_batch_size",
+            "ajax_batch_wait",
+            "html_parser",
+            "resolution_cache_ttl",
+            "incremental_forums",
+            "alias_backend",
             "email",
         ]
 
@@ -920,6 +1042,312 @@ class TestCheckSettings:
         with pytest.raises(TypeError):
             CheckSettings.check_secure_section_filename()
 
+    def test_check_download_chunk_size(self):
+        self.settings["download-chunk-size"] = 1024
+        CheckSettings.check_download_chunk_size()
+
+        self.settings["download-chunk-size"] = "2048"
+        CheckSettings.check_download_chunk_size()
+        assert self.settings["download-chunk-size"] == 2048
+
+        self.settings["download-chunk-size"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_download_chunk_size()
+
+        self.settings["download-chunk-size"] = 0
+        with pytest.raises(ValueError):
+            CheckSettings.check_download_chunk_size()
+
+    def test_check_probe_content_types(self):
+        self.settings["probe-content-types"] = []
+        CheckSettings.check_probe_content_types()
+
+        self.settings["probe-content-types"] = ["video/mp4", "application/*"]
+        CheckSettings.check_probe_content_types()
+
+        self.settings["probe-content-types"] = "video/mp4"
+        with pytest.raises(TypeError):
+            CheckSettings.check_probe_content_types()
+
+        self.settings["probe-content-types"] = ["video/mp4", 5]
+        with pytest.raises(TypeError):
+            CheckSettings.check_probe_content_types()
+
+        self.settings["probe-content-types"] = ["video"]
+        with pytest.raises(ValueError):
+            CheckSettings.check_probe_content_types()
+
+    def test_check_keep_alive(self):
+        self.settings["keep-alive"] = False
+        CheckSettings.check_keep_alive()
+
+        self.settings["keep-alive"] = "true"
+        CheckSettings.check_keep_alive()
+        assert self.settings["keep-alive"] is True
+
+        self.settings["keep-alive"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_keep_alive()
+
+    def test_check_pool_block(self):
+        self.settings["pool-block"] = False
+        CheckSettings.check_pool_block()
+
+        self.settings["pool-block"] = "true"
+        CheckSettings.check_pool_block()
+        assert self.settings["pool-block"] is True
+
+        self.settings["pool-block"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_pool_block()
+
+    def test_check_backoff_factor(self):
+        self.settings["backoff-factor"] = 0.25
+        CheckSettings.check_backoff_factor()
+
+        self.settings["backoff-factor"] = 2
+        CheckSettings.check_backoff_factor()
+
+        self.settings["backoff-factor"] = "1.5"
+        CheckSettings.check_backoff_factor()
+        assert self.settings["backoff-factor"] == 1.5
+
+        self.settings["backoff-factor"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_backoff_factor()
+
+        self.settings["backoff-factor"] = -0.5
+        with pytest.raises(ValueError):
+            CheckSettings.check_backoff_factor()
+
+    def test_check_backoff_max(self):
+        self.settings["backoff-max"] = 20
+        CheckSettings.check_backoff_max()
+
+        self.settings["backoff-max"] = "60"
+        CheckSettings.check_backoff_max()
+        assert self.settings["backoff-max"] == 60
+
+        self.settings["backoff-max"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_backoff_max()
+
+        self.settings["backoff-max"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_backoff_max()
+
+    def test_check_retry_budget(self):
+        self.settings["retry-budget"] = 100
+        CheckSettings.check_retry_budget()
+
+        self.settings["retry-budget"] = "300"
+        CheckSettings.check_retry_budget()
+        assert self.settings["retry-budget"] == 300
+
+        self.settings["retry-budget"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_retry_budget()
+
+        self.settings["retry-budget"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_retry_budget()
+
+    def test_check_rate_limit_html_requests(self):
+        self.settings["rate-limit-html-requests"] = 2.5
+        CheckSettings.check_rate_limit_html_requests()
+
+        self.settings["rate-limit-html-requests"] = "1.5"
+        CheckSettings.check_rate_limit_html_requests()
+        assert self.settings["rate-limit-html-requests"] == 1.5
+
+        self.settings["rate-limit-html-requests"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_rate_limit_html_requests()
+
+        self.settings["rate-limit-html-requests"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_rate_limit_html_requests()
+
+    def test_check_rate_limit_html_bytes(self):
+        self.settings["rate-limit-html-bytes"] = 20
+        CheckSettings.check_rate_limit_html_bytes()
+
+        self.settings["rate-limit-html-bytes"] = "60"
+        CheckSettings.check_rate_limit_html_bytes()
+        assert self.settings["rate-limit-html-bytes"] == 60
+
+        self.settings["rate-limit-html-bytes"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_rate_limit_html_bytes()
+
+        self.settings["rate-limit-html-bytes"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_rate_limit_html_bytes()
+
+    def test_check_rate_limit_files_requests(self):
+        self.settings["rate-limit-files-requests"] = 2.5
+        CheckSettings.check_rate_limit_files_requests()
+
+        self.settings["rate-limit-files-requests"] = "1.5"
+        CheckSettings.check_rate_limit_files_requests()
+        assert self.settings["rate-limit-files-requests"] == 1.5
+
+        self.settings["rate-limit-files-requests"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_rate_limit_files_requests()
+
+        self.settings["rate-limit-files-requests"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_rate_limit_files_requests()
+
+    def test_check_rate_limit_files_bytes(self):
+        self.settings["rate-limit-files-bytes"] = 20
+        CheckSettings.check_rate_limit_files_bytes()
+
+        self.settings["rate-limit-files-bytes"] = "60"
+        CheckSettings.check_rate_limit_files_bytes()
+        assert self.settings["rate-limit-files-bytes"] == 60
+
+        self.settings["rate-limit-files-bytes"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_rate_limit_files_bytes()
+
+        self.settings["rate-limit-files-bytes"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_rate_limit_files_bytes()
+
+    def test_check_adaptive_concurrency(self):
+        self.settings["adaptive-concurrency"] = True
+        CheckSettings.check_adaptive_concurrency()
+
+        self.settings["adaptive-concurrency"] = "false"
+        CheckSettings.check_adaptive_concurrency()
+        assert self.settings["adaptive-concurrency"] is False
+
+        self.settings["adaptive-concurrency"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_adaptive_concurrency()
+
+    def test_check_persist_session(self):
+        self.settings["persist-session"] = True
+        CheckSettings.check_persist_session()
+
+        self.settings["persist-session"] = "false"
+        CheckSettings.check_persist_session()
+        assert self.settings["persist-session"] is False
+
+        self.settings["persist-session"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_persist_session()
+
+    def test_check_discovery_backend(self):
+        self.settings["discovery-backend"] = "html"
+        CheckSettings.check_discovery_backend()
+
+        self.settings["discovery-backend"] = "webservice"
+        CheckSettings.check_discovery_backend()
+
+        self.settings["discovery-backend"] = "invalid"
+        with pytest.raises(ValueError):
+            CheckSettings.check_discovery_backend()
+
+        self.settings["discovery-backend"] = 5
+        with pytest.raises(TypeError):
+            CheckSettings.check_discovery_backend()
+
+    def test_check_ajax_batch_size(self):
+        self.settings["ajax-batch-size"] = 20
+        CheckSettings.check_ajax_batch_size()
+
+        self.settings["ajax-batch-size"] = "60"
+        CheckSettings.check_ajax_batch_size()
+        assert self.settings["ajax-batch-size"] == 60
+
+        self.settings["ajax-batch-size"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_ajax_batch_size()
+
+        self.settings["ajax-batch-size"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_ajax_batch_size()
+
+    def test_check_ajax_batch_wait(self):
+        self.settings["ajax-batch-wait"] = 2.5
+        CheckSettings.check_ajax_batch_wait()
+
+        self.settings["ajax-batch-wait"] = "1.5"
+        CheckSettings.check_ajax_batch_wait()
+        assert self.settings["ajax-batch-wait"] == 1.5
+
+        self.settings["ajax-batch-wait"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_ajax_batch_wait()
+
+        self.settings["ajax-batch-wait"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_ajax_batch_wait()
+
+    def test_check_html_parser(self):
+        self.settings["html-parser"] = "lxml"
+        CheckSettings.check_html_parser()
+
+        self.settings["html-parser"] = "html.parser"
+        CheckSettings.check_html_parser()
+
+        self.settings["html-parser"] = "html5lib"
+        CheckSettings.check_html_parser()
+
+        self.settings["html-parser"] = "invalid"
+        with pytest.raises(ValueError):
+            CheckSettings.check_html_parser()
+
+        self.settings["html-parser"] = 5
+        with pytest.raises(TypeError):
+            CheckSettings.check_html_parser()
+
+    def test_check_resolution_cache_ttl(self):
+        self.settings["resolution-cache-ttl"] = 20
+        CheckSettings.check_resolution_cache_ttl()
+
+        self.settings["resolution-cache-ttl"] = "60"
+        CheckSettings.check_resolution_cache_ttl()
+        assert self.settings["resolution-cache-ttl"] == 60
+
+        self.settings["resolution-cache-ttl"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_resolution_cache_ttl()
+
+        self.settings["resolution-cache-ttl"] = -5
+        with pytest.raises(ValueError):
+            CheckSettings.check_resolution_cache_ttl()
+
+    def test_check_incremental_forums(self):
+        self.settings["incremental-forums"] = True
+        CheckSettings.check_incremental_forums()
+
+        self.settings["incremental-forums"] = "false"
+        CheckSettings.check_incremental_forums()
+        assert self.settings["incremental-forums"] is False
+
+        self.settings["incremental-forums"] = "hello"
+        with pytest.raises(TypeError):
+            CheckSettings.check_incremental_forums()
+
+    def test_check_alias_backend(self):
+        self.settings["alias-backend"] = "json"
+        CheckSettings.check_alias_backend()
+
+        self.settings["alias-backend"] = "sqlite"
+        CheckSettings.check_alias_backend()
+
+        self.settings["alias-backend"] = "invalid"
+        with pytest.raises(ValueError):
+            CheckSettings.check_alias_backend()
+
+        self.settings["alias-backend"] = 5
+        with pytest.raises(TypeError):
+            CheckSettings.check_alias_backend()
+
     def test_check_email(self):
         self.settings["email"] = "hey@gmail.com"
         CheckSettings.check_email()
@@ -0,0 +1,192 @@
+"""Adaptive limit of simultaneous HTTP requests (AIMD)."""
+from collections import deque
+from datetime import datetime
+import logging
+from threading import Condition
+from time import monotonic
+from typing import Deque, Tuple
+
+from vcm.settings import settings
+
+from .utils import MetaSingleton
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter(metaclass=MetaSingleton):
+    """Limits the number of HTTP requests in flight (from the request until the
+    response body is read) at the same time.
+    If the setting `adaptive-concurrency` is enabled, the limit is adapted to the
+    server's health, additive-increase / multiplicative-decrease (AIMD) style:
+
+    - While requests are fast and successful, the limit grows by one request each
+        time a full window of requests (the current limit) is completed.
+    - If the server replies with a `5xx` or `408` status code, the request fails
+        or its latency is much higher than usual, the limit is multiplied by
+        `decrease_factor`. It's decreased at most once each `cooldown` seconds, so
+        a single burst of errors doesn't collapse it.
+
+    The limit never exceeds `max_limit` (the number of threads) and is never
+    lower than 1. If `adaptive-concurrency` is disabled, requests are not limited.
+    """
+
+    overload_status_codes = (408,)
+    decrease_factor = 0.5
+    cooldown = 2.0
+    latency_tolerance = 3
+    latency_smoothing = 0.05
+    min_samples = 10
+    history_size = 100
+
+    def __init__(self):
+        self._condition = Condition()
+        self.enabled = False
+        self.max_limit = 1
+        self.limit = 1.0
+        self.in_flight = 0
+        self.baseline_latency = None
+        self.samples = 0
+        self.last_decrease = None
+        self.history: Deque[Tuple[str, int]] = deque(maxlen=self.history_size)
+
+    def configure(self, max_limit: int):
+        """Resets the limiter. The limit starts at half of `max_limit`.
+
+        Args:
+            max_limit (int): upper bound of the limit (the number of threads).
+        """
+
+        with self._condition:
+            self.enabled = settings.adaptive_concurrency
+            self.max_limit = max(max_limit, 1)
+            self.limit = float(max(self.max_limit // 2, 1))
+            self.in_flight = 0
+            self.baseline_latency = None
+            self.samples = 0
+            self.last_decrease = None
+            self.history.clear()
+            self._record()
+            self._condition.notify_all()
+
+        if self.enabled:
+            logger.debug(
+                "Adaptive concurrency enabled (limit=%d, max=%d)",
+                self.limit,
+                self.max_limit,
+            )
+
+    @property
+    def current_limit(self) -> int:
+        return int(self.limit)
+
+    def acquire(self):
+        """Waits until the number of requests in flight is under the limit."""
+
+        if not self.enabled:
+            return
+
+        with self._condition:
+            while self.in_flight >= self.current_limit:
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self, latency: float, status_code: int = None):
+        """Registers the result of a request and adapts the limit.
+
+        Args:
+            latency (float): seconds until the response (or the error) arrived.
+            status_code (int, optional): status code of the response. If None,
+                the request failed without response. Defaults to None.
+        """
+
+        if not self.enabled:
+            return
+
+        with self._condition:
+            self.in_flight = max(self.in_flight - 1, 0)
+
+            if self.is_overloaded(status_code) or self._is_slow(latency):
+                self._decrease()
+            else:
+                self._update_baseline(latency)
+                self._increase()
+
+            self._condition.notify_all()
+
+    @classmethod
+    def is_overloaded(cls, status_code: int = None) -> bool:
+        """Checks if the result of a request denotes that the server is overloaded.
+
+        Args:
+            status_code (int, optional): status code of the response. If None,
+                the request failed without response. Defaults to None.
+
+        Returns:
+            bool: True if there was no response or its status code is 5xx or 408.
+        """
+
+        if status_code is None:
+            return True
+        return status_code >= 500 or status_code in cls.overload_status_codes
+
+    def _is_slow(self, latency: float) -> bool:
+        if self.samples < self.min_samples:
+            return False
+        return latency > self.baseline_latency * self.latency_tolerance
+
+    def _update_baseline(self, latency: float):
+        self.samples += 1
+        if self.baseline_latency is None:
+            self.baseline_latency = latency
+            return
+
+        smoothing = self.latency_smoothing
+        self.baseline_latency += smoothing * (latency - self.baseline_latency)
+
+    def _increase(self):
+        previous = self.current_limit
+        self.limit = min(self.limit + 1 / self.limit, float(self.max_limit))
+
+        if self.current_limit != previous:
+            self._record()
+
+    def _decrease(self):
+        now = monotonic()
+        if self.last_decrease is not None and now - self.last_decrease < self.cooldown:
+            return
+
+        previous = self.current_limit
+        self.limit = max(self.limit * self.decrease_factor, 1.0)
+        self.last_decrease = now
+
+        if self.current_limit != previous:
+            logger.info(
+                "Server overloaded, concurrency limit decreased to %d",
+                self.current_limit,
+            )
+            self._record()
+
+    def _record(self):
+        timestamp = datetime.now().strftime("%H:%M:%S")
+        self.history.append((timestamp, self.current_limit))
+
+    def report(self, history_size=10) -> str:
+        """Returns the current limit and its recent history.
+
+        Args:
+            history_size (int, optional): number of changes of the limit to show.
+                Defaults to 10.
+
+        Returns:
+            str: report.
+        """
+
+        if not self.enabled:
+            return "disabled"
+
+        history = list(self.history)[-history_size:]
+        history = " -> ".join(f"{limit} ({time})" for time, limit in history)
+        return (
+            f"{self.current_limit}/{self.max_limit}, {self.in_flight} in flight "
+            f"[{history}]"
+        )
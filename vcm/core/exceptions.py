@@ -91,6 +91,10 @@ class AlgorithmFailureError(VcmError):
     """Algorihm failure error."""
 
 
+class WebServiceError(VcmError):
+    """Web service error."""
+
+
 class VcmWarning(Warning):
     """Base class for warnings."""
 
@@ -1,19 +1,35 @@
 """Custom downloader with retries control."""
 
+from concurrent.futures import Future
+from email.utils import parsedate_to_datetime
 from functools import lru_cache
+import json
 import logging
+import os
+from pathlib import Path
+from random import uniform
 import sys
-from typing import NoReturn, Optional
+from threading import Lock, Timer
+from time import monotonic, sleep, time
+from typing import Any, Callable, Dict, List, NoReturn, Optional, Tuple
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
 from vcm.settings import settings
 
+from .concurrency import ConcurrencyLimiter
 from .credentials import Credentials
-from .exceptions import DownloaderError, LoginError, LogoutError, MoodleError
-from .utils import MetaSingleton, save_crash_context
+from .exceptions import (
+    DownloaderError,
+    LoginError,
+    LogoutError,
+    MoodleError,
+    WebServiceError,
+)
+from .rate_limiter import RateLimiter
+from .utils import MetaSingleton, parse_html, save_crash_context
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +45,7 @@ class Connection(metaclass=MetaSingleton):
     base_url = settings.base_url
     _logout_url_template = urljoin(base_url, "login/logout.php?sesskey=%s")
     _login_url_template = urljoin(base_url, "login/index.php")
+    _ajax_url_template = urljoin(base_url, "lib/ajax/service.php?sesskey=%s&info=%s")
 
     def __init__(self):
         self._downloader = Downloader()
@@ -88,12 +105,50 @@ class Connection(metaclass=MetaSingleton):
 
         return self._login_url_template
 
+    @property
+    def pool_stats(self) -> Dict[str, int]:
+        """Returns the usage counters of the connection pool.
+
+        Returns:
+            Dict[str, int]: usage counters (see `Downloader.get_pool_stats`).
+        """
+
+        return self._downloader.get_pool_stats()
+
+    def set_pool_size(self, pool_size: int):
+        """Sets the number of connections kept open for each host. It should be
+        equal to the number of threads making requests.
+
+        Args:
+            pool_size (int): number of connections kept open for each host.
+        """
+
+        logger.debug("Setting connection pool size to %d", pool_size)
+        self._downloader.configure_pool(pool_size)
+
+    @property
+    def session_path(self) -> Path:
+        """Returns the path of the file where the session is saved (setting
+        `persist-session`). It's stored next to the credentials file, not in the
+        root folder, which may be synchronized with other devices.
+
+        Returns:
+            Path: path of the session file.
+        """
+
+        return settings.session_path
+
     def __enter__(self):
         self.login()
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if settings.persist_session:
+            self.save_session()
+            return
+
         self.logout()
+        self.delete_session()
 
     def get(self, url, **kwargs) -> requests.Response:
         """Sends an HTTP GET request.
@@ -108,6 +163,19 @@ class Connection(metaclass=MetaSingleton):
 
         return self._downloader.get(url, **kwargs)
 
+    def head(self, url, **kwargs) -> requests.Response:
+        """Sends an HTTP HEAD request.
+
+        Args:
+            url (str): url of the request.
+            **kwargs: keyword arguments passed to requests.Session.request.
+
+        Returns:
+            request.Response: response.
+        """
+
+        return self._downloader.head(url, **kwargs)
+
     def post(self, url: str, data: dict = None, **kwargs) -> requests.Response:
         """Sends an HTTP POST request.
 
@@ -135,6 +203,42 @@ class Connection(metaclass=MetaSingleton):
 
         return self._downloader.delete(url, **kwargs)
 
+    def call_ajax(self, calls: List[dict]) -> list:
+        """Calls several functions of Moodle's AJAX service in a single request.
+
+        Args:
+            calls (List[dict]): calls to make (`methodname` and `args`).
+
+        Raises:
+            WebServiceError: if the request fails or the service rejects it.
+
+        Returns:
+            list: result of each call, as returned by the service (`error` and
+                `data` or `exception`).
+        """
+
+        methods = ",".join(call["methodname"] for call in calls)
+        url = self._ajax_url_template % (self.sesskey, methods)
+        data = [dict(call, index=index) for index, call in enumerate(calls)]
+
+        try:
+            response = self.post(url, json=data)
+        except DownloaderError as exc:
+            raise WebServiceError("AJAX request failed") from exc
+
+        if not response.ok:
+            raise WebServiceError(f"AJAX service returned {response.status_code}")
+
+        try:
+            results = response.json()
+        except ValueError as exc:
+            raise WebServiceError("AJAX service returned invalid JSON") from exc
+
+        if not isinstance(results, list) or len(results) != len(calls):
+            raise WebServiceError(f"AJAX request rejected: {results!r}")
+
+        return results
+
     def make_logout_request(self) -> requests.Response:
         """Makes the logout HTTP request.
 
@@ -284,7 +388,7 @@ class Connection(metaclass=MetaSingleton):
         """
 
         response = self.get_login_page()
-        soup = BeautifulSoup(response.text, "html.parser")
+        soup = parse_html(response.text)
         login_token = soup.find("input", {"type": "hidden", "name": "logintoken"})
 
         try:
@@ -328,12 +432,17 @@ class Connection(metaclass=MetaSingleton):
         self.get_login_page.cache_clear()
 
     def login(self):
-        """Wrapper of real loging function.
+        """Wrapper of real loging function. If the setting `persist-session` is
+        enabled, the session saved by the last execution is reused if it's still
+        valid.
 
         Raises:
             LoginError: if login was unsuccessfull.
         """
 
+        if settings.persist_session and self.restore_session():
+            return
+
         login_retries = settings.login_retries
         exception = None
 
@@ -356,10 +465,86 @@ class Connection(metaclass=MetaSingleton):
 
         logger.info("Logged in")
 
+    def save_session(self):
+        """Saves the cookies, the sesskey and the user url, so the next execution
+        can reuse the session. The file is only readable by the user."""
+
+        cookies = [
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure,
+                "expires": cookie.expires,
+            }
+            for cookie in self._downloader.cookies
+        ]
+
+        session = {
+            "sesskey": self._sesskey,
+            "user_url": self._user_url,
+            "cookies": cookies,
+        }
+
+        path = self.session_path.as_posix()
+        file_descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        os.chmod(path, 0o600)
+
+        with os.fdopen(file_descriptor, "wt", encoding="utf-8") as file_handler:
+            json.dump(session, file_handler)
+
+        logger.info("Session saved (%d cookies)", len(cookies))
+
+    def restore_session(self) -> bool:
+        """Restores the session saved by the last execution, if it's still valid.
+
+        Returns:
+            bool: True if the session was restored, False if a login is needed.
+        """
+
+        if not self.session_path.exists():
+            return False
+
+        try:
+            with self.session_path.open(encoding="utf-8") as file_handler:
+                session = json.load(file_handler)
+            sesskey = session["sesskey"]
+            user_url = session["user_url"]
+            cookies = session["cookies"]
+        except (json.JSONDecodeError, UnicodeDecodeError, KeyError, TypeError) as exc:
+            logger.warning("Session file corrupted (%r), discarding it", exc)
+            self.delete_session()
+            return False
+
+        if not sesskey or not user_url or not cookies:
+            return False
+
+        for cookie in cookies:
+            self._downloader.cookies.set(**cookie)
+
+        # The login page reveals if the session is still open. If it isn't, it's
+        # kept in cache, as it's needed to log in.
+        self.get_login_page.cache_clear()
+        if not self.check_already_logged_in():
+            logger.info("Saved session expired, logging in")
+            return False
+
+        self._sesskey = sesskey
+        self._user_url = user_url
+        logger.info("Saved session restored")
+        return True
+
+    def delete_session(self):
+        """Deletes the saved session, if it exists."""
+
+        if self.session_path.exists():
+            self.session_path.unlink()
+
     def find_sesskey_and_user_url(self):
         """Given a `BeautifulSoup` object parses the `user_url` and the `sesskey`."""
 
-        soup = BeautifulSoup(self._login_response.text, "html.parser")
+        soup = parse_html(self._login_response.text)
         self._sesskey = soup.find("input", {"type": "hidden", "name": "sesskey"})[
             "value"
         ]
@@ -370,20 +555,167 @@ class Connection(metaclass=MetaSingleton):
         )
 
 
+class AjaxBatcher:
+    """Groups the calls to Moodle's AJAX service (`lib/ajax/service.php`), sending
+    them in a single request when `batch_size` calls are pending or when the
+    oldest one has waited `wait` seconds, whatever happens first.
+
+    Args:
+        batch_size (int, optional): max number of calls per request. If None,
+            it's set to `settings.ajax_batch_size`. Defaults to None.
+        wait (float, optional): max number of seconds a call waits for others.
+            If None, it's set to `settings.ajax_batch_wait`. Defaults to None.
+    """
+
+    def __init__(self, batch_size: int = None, wait: float = None):
+        self.batch_size = batch_size or settings.ajax_batch_size
+        self.wait = settings.ajax_batch_wait if wait is None else wait
+        self.connection = Connection()
+        self.requests_sent = 0
+        self._pending: List[Tuple[dict, Future]] = []
+        self._lock = Lock()
+        self._timer: Optional[Timer] = None
+
+    def submit(self, methodname: str, args: Dict[str, Any]) -> Future:
+        """Schedules a call to the AJAX service.
+
+        Args:
+            methodname (str): name of the function.
+            args (Dict[str, Any]): arguments of the function.
+
+        Returns:
+            Future: future of the function's result. If the call fails, it raises
+                `WebServiceError`.
+        """
+
+        future = Future()
+        call = {"methodname": methodname, "args": args}
+
+        with self._lock:
+            self._pending.append((call, future))
+            full = len(self._pending) >= self.batch_size
+
+            if not full and self._timer is None:
+                self._timer = Timer(self.wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if full:
+            self.flush()
+
+        return future
+
+    def flush(self):
+        """Sends the pending calls, in batches of `batch_size` calls."""
+
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        for start in range(0, len(pending), self.batch_size):
+            self._send(pending[start : start + self.batch_size])
+
+    def _send(self, batch: List[Tuple[dict, Future]]):
+        calls = [call for call, _ in batch]
+        logger.debug("Sending %d AJAX calls in one request", len(calls))
+        self.requests_sent += 1
+
+        try:
+            results = self.connection.call_ajax(calls)
+        except WebServiceError as exc:
+            logger.warning("AJAX batch of %d calls failed: %s", len(calls), exc)
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        for (call, future), result in zip(batch, results):
+            if isinstance(result, dict) and not result.get("error"):
+                future.set_result(result.get("data"))
+                continue
+
+            exception = result.get("exception") if isinstance(result, dict) else None
+            future.set_exception(
+                WebServiceError(f"{call['methodname']} failed: {exception!r}")
+            )
+
+
+class RetryBudget:
+    """Controls the number of retries of failed HTTP requests, shared by all the
+    threads of the execution, so retries can't multiply the load of the server
+    when it's struggling."""
+
+    _lock = Lock()
+    left: Optional[int] = None
+    retried = 0
+    given_up = 0
+
+    @classmethod
+    def reset(cls):
+        """Resets the counters and sets the budget to `settings.retry_budget`."""
+
+        with cls._lock:
+            cls.left = settings.retry_budget
+            cls.retried = 0
+            cls.given_up = 0
+
+    @classmethod
+    def consume(cls) -> bool:
+        """Consumes one retry of the budget.
+
+        Returns:
+            bool: True if the retry can be made, False if the budget is exhausted.
+        """
+
+        with cls._lock:
+            if cls.left is None:
+                cls.left = settings.retry_budget
+
+            if cls.left <= 0:
+                return False
+
+            cls.left -= 1
+            cls.retried += 1
+            return True
+
+    @classmethod
+    def record_given_up(cls):
+        """Registers a request that failed after all its retries."""
+
+        with cls._lock:
+            cls.given_up += 1
+
+    @classmethod
+    def report(cls) -> str:
+        return f"{cls.retried} requests retried, {cls.given_up} given up"
+
+
 class Downloader(requests.Session):
     """Downloader with retries control.
 
+    Failed requests are retried with exponential backoff and jitter, consuming the
+    global `RetryBudget`. Every request (including retries) goes through the
+    global `RateLimiter` and `ConcurrencyLimiter`.
+
     Args:
         silenced (bool, optional): if True, only critical errors are logged.
             Defaults to False.
         retries (int, optional): number of retries for each request. If none,
             it's set to settings.retries. Defaults to None.
+        pool_size (int, optional): number of connections kept open for each
+            host. If None, it's set to requests' default (10). Defaults to None.
     """
 
-    def __init__(self, silenced=False, retries=None):
+    retry_status_codes = (429, 503)
+
+    def __init__(self, silenced=False, retries=None, pool_size=None):
         self.logger = logging.getLogger(__name__)
         self.retries = retries or settings.retries
         self.timeout = settings.timeout
+        self.pool_size = None
 
         if silenced is True:
             self.logger.setLevel(logging.CRITICAL)
@@ -391,14 +723,74 @@ class Downloader(requests.Session):
         super().__init__()
         self.headers.update({"User-Agent": USER_AGENT})
 
+        if not settings.keep_alive:
+            self.headers.update({"Connection": "close"})
+
+        self.configure_pool(pool_size or DEFAULT_POOLSIZE)
+
+    def configure_pool(self, pool_size: int):
+        """Mounts a new HTTP adapter with a connection pool of `pool_size`
+        connections for each host. If the setting `pool-block` is True, threads
+        will wait for a free connection instead of opening (and discarding) a new
+        one when the pool is full.
+
+        Args:
+            pool_size (int): number of connections kept open for each host.
+        """
+
+        for adapter in self.adapters.values():
+            adapter.close()
+
+        adapter = HTTPAdapter(pool_maxsize=pool_size, pool_block=settings.pool_block)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+        self.pool_size = pool_size
+
+    def get_pool_stats(self) -> Dict[str, int]:
+        """Returns the usage counters of the connection pools. A hit is a request
+        made using an already open connection, and a miss is a request which
+        needed to open a new connection.
+
+        Returns:
+            Dict[str, int]: number of requests, hits and misses.
+        """
+
+        nrequests = 0
+        nconnections = 0
+        adapters = {id(x): x for x in self.adapters.values()}
+
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                try:
+                    pool = pools[key]
+                except KeyError:
+                    continue
+                nrequests += pool.num_requests
+                nconnections += pool.num_connections
+
+        return {
+            "requests": nrequests,
+            "hits": max(nrequests - nconnections, 0),
+            "misses": nconnections,
+        }
+
     # pylint: disable=arguments-differ
-    def request(self, method, url, retries=None, **kwargs) -> requests.Response:
+    def request(
+        self, method, url, retries=None, validators=None, lane="html", **kwargs
+    ) -> requests.Response:
         """Makes an HTTP request.
 
         Args:
             method (str): HTTP method of the request.
             url (str): url of the request.
             retries (int): override `Downloader.retries` for this request.
+            validators (dict): validators of the cached version of the resource
+                (`etag` and `last-modified`). If set, the request will be
+                conditional, and the server may reply with 304 (Not Modified).
+            lane (str): lane of the rate limiter, `html` for web pages and
+                `files` for file bodies. Defaults to "html". The bytes of
+                streamed responses must be registered by the caller.
             **kwargs: keyword arguments passed to requests.Session.request.
 
         Raises:
@@ -411,9 +803,19 @@ class Downloader(requests.Session):
         self.logger.debug("%s %r", method, url)
         retries = retries or self.retries
 
-        while retries > 0:
+        if validators:
+            kwargs["headers"] = self.get_conditional_headers(
+                validators, kwargs.get("headers")
+            )
+
+        rate_limiter = RateLimiter()
+        attempt = 0
+        while True:
+            attempt += 1
+            rate_limiter.acquire_request(lane)
+
             try:
-                return super().request(method, url, **kwargs)
+                response = self.send_request(method, url, **kwargs)
             except requests.exceptions.RequestException as exc:
                 excname = type(exc).__name__
                 retries -= 1
@@ -421,8 +823,174 @@ class Downloader(requests.Session):
                     "Catched %s in %s, retries=%s", excname, method, retries
                 )
 
+                if retries <= 0 or not self.consume_retry():
+                    break
+
+                sleep(self.get_backoff_time(attempt))
+                continue
+
+            if not kwargs.get("stream"):
+                rate_limiter.acquire_bytes(lane, len(response.content))
+
+            if response.status_code not in self.retry_status_codes:
+                return response
+
+            # The server is overloaded. If the request can't be retried, the
+            # response is returned anyway and the caller handles the status code.
+            if retries <= 1 or not self.consume_retry():
+                RetryBudget.record_given_up()
+                return response
+
+            retries -= 1
+            self.logger.warning(
+                "Received %d in %s, retries=%s", response.status_code, method, retries
+            )
+            response.close()
+            sleep(self.get_backoff_time(attempt, response))
+
+        RetryBudget.record_given_up()
         self.logger.critical("Download error in %s %r", method, url)
         raise DownloaderError("max retries failed.")
 
+    def send_request(self, method, url, **kwargs) -> requests.Response:
+        """Sends a single HTTP request, holding a slot of the global
+        `ConcurrencyLimiter` until the response body is consumed. The latency
+        reported to the limiter is the time until the response headers arrived.
+
+        Args:
+            method (str): HTTP method of the request.
+            url (str): url of the request.
+            **kwargs: keyword arguments passed to requests.Session.request.
+
+        Returns:
+            requests.Response: HTTP response.
+        """
+
+        concurrency_limiter = ConcurrencyLimiter()
+        concurrency_limiter.acquire()
+        start = monotonic()
+
+        try:
+            response = super().request(method, url, **kwargs)
+        except BaseException:
+            concurrency_limiter.release(monotonic() - start, None)
+            raise
+
+        latency = monotonic() - start
+        if not kwargs.get("stream"):
+            concurrency_limiter.release(latency, response.status_code)
+            return response
+
+        self.hold_until_consumed(
+            response,
+            lambda: concurrency_limiter.release(latency, response.status_code),
+        )
+        return response
+
+    @staticmethod
+    def hold_until_consumed(response: requests.Response, release: Callable):
+        """Calls `release` once, when the body of a streamed response has been
+        read (through `iter_content`, `content` or `text`) or the response is
+        closed, whatever happens first.
+
+        Args:
+            response (requests.Response): streamed response.
+            release (Callable): function to call.
+        """
+
+        lock = Lock()
+        released = False
+
+        def release_once():
+            nonlocal released
+            with lock:
+                if released:
+                    return
+                released = True
+            release()
+
+        iter_content = response.iter_content
+        close = response.close
+
+        def iter_content_and_release(*args, **kwargs):
+            try:
+                yield from iter_content(*args, **kwargs)
+            finally:
+                release_once()
+
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release_once()
+
+        response.iter_content = iter_content_and_release
+        response.close = close_and_release
+
+    def consume_retry(self) -> bool:
+        """Consumes one retry of the global retry budget.
+
+        Returns:
+            bool: True if the request can be retried.
+        """
+
+        if RetryBudget.consume():
+            return True
+
+        self.logger.warning("Retry budget exhausted, giving up")
+        return False
+
+    @staticmethod
+    def get_backoff_time(attempt: int, response: requests.Response = None) -> float:
+        """Returns the number of seconds to wait before retrying a request. If
+        the server sent the Retry-After header, it is respected. Otherwise,
+        exponential backoff with full jitter is used. In both cases the time
+        is limited by `settings.backoff_max`.
+
+        Args:
+            attempt (int): number of attempts made.
+            response (requests.Response, optional): response of the last
+                attempt, if it was received. Defaults to None.
+
+        Returns:
+            float: number of seconds to wait.
+        """
+
+        if response is not None and "Retry-After" in response.headers:
+            retry_after = response.headers["Retry-After"]
+            try:
+                seconds = float(retry_after)
+            except ValueError:
+                try:
+                    seconds = parsedate_to_datetime(retry_after).timestamp() - time()
+                except (TypeError, ValueError):
+                    seconds = 0
+            return min(max(seconds, 0), settings.backoff_max)
+
+        exponential = settings.backoff_factor * 2 ** (attempt - 1)
+        return uniform(0, min(exponential, settings.backoff_max))
+
+    @staticmethod
+    def get_conditional_headers(validators: dict, headers: dict = None) -> dict:
+        """Returns the headers needed to make a conditional request.
+
+        Args:
+            validators (dict): validators of the cached version of the resource
+                (`etag` and `last-modified`).
+            headers (dict, optional): extra headers of the request. Defaults to None.
+
+        Returns:
+            dict: headers of the request.
+        """
+
+        headers = dict(headers or {})
+
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last-modified"):
+            headers["If-Modified-Since"] = validators["last-modified"]
+
+        return headers
+
 
 connection = Connection()
@@ -0,0 +1,141 @@
+"""Token bucket rate limiter shared by all the threads."""
+import logging
+from threading import Lock
+from time import monotonic, sleep
+from typing import Dict
+
+from vcm.settings import settings
+
+from .utils import MetaSingleton
+
+logger = logging.getLogger(__name__)
+
+LANES = ("html", "files")
+
+
+class TokenBucket:
+    """Token bucket. Tokens are added at a constant `rate`, up to `capacity`
+    tokens. Consuming more tokens than available is allowed, but the caller has
+    to wait until the debt is paid, so the average rate is never exceeded.
+
+    Args:
+        rate (float): tokens added per second. If 0, the bucket is unlimited.
+        capacity (float, optional): max number of tokens stored (burst size).
+            If None, it's set to one second of tokens. Defaults to None.
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1)
+        self.tokens = self.capacity
+        self.timestamp = monotonic()
+        self.waited = 0.0
+        self._lock = Lock()
+
+    @property
+    def unlimited(self) -> bool:
+        return not self.rate
+
+    def get_wait_time(self, tokens: float) -> float:
+        """Consumes `tokens` and returns the number of seconds the caller must
+        wait before using them.
+
+        Args:
+            tokens (float): number of tokens to consume.
+
+        Returns:
+            float: seconds to wait.
+        """
+
+        if self.unlimited:
+            return 0
+
+        with self._lock:
+            now = monotonic()
+            elapsed = now - self.timestamp
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.timestamp = now
+            self.tokens -= tokens
+
+            if self.tokens >= 0:
+                return 0
+
+            wait_time = -self.tokens / self.rate
+            self.waited += wait_time
+            return wait_time
+
+    def consume(self, tokens: float = 1):
+        """Consumes `tokens`, waiting if the bucket doesn't have enough.
+
+        Args:
+            tokens (float, optional): number of tokens to consume. Defaults to 1.
+        """
+
+        wait_time = self.get_wait_time(tokens)
+        if wait_time:
+            sleep(wait_time)
+
+
+class RateLimiter(metaclass=MetaSingleton):
+    """Limits the requests per second and the bytes per second of each lane,
+    `html` (web pages) and `files` (file bodies), as configured in the settings
+    `rate-limit-<lane>-requests` and `rate-limit-<lane>-bytes`."""
+
+    def __init__(self):
+        self.request_buckets: Dict[str, TokenBucket] = {}
+        self.byte_buckets: Dict[str, TokenBucket] = {}
+        self.configure()
+
+    def configure(self):
+        """Creates the buckets of each lane from the settings."""
+
+        for lane in LANES:
+            requests_rate = settings[f"rate-limit-{lane}-requests"]
+            bytes_rate = settings[f"rate-limit-{lane}-bytes"]
+            self.request_buckets[lane] = TokenBucket(requests_rate)
+            self.byte_buckets[lane] = TokenBucket(bytes_rate)
+
+            logger.debug(
+                "Rate limit of lane %r: %s requests/s, %s bytes/s",
+                lane,
+                requests_rate or "unlimited",
+                bytes_rate or "unlimited",
+            )
+
+    @staticmethod
+    def _check_lane(lane: str):
+        if lane not in LANES:
+            raise ValueError(f"Invalid lane: {lane!r}")
+
+    def acquire_request(self, lane: str):
+        """Waits until a request of `lane` can be made.
+
+        Args:
+            lane (str): lane of the request (`html` or `files`).
+        """
+
+        self._check_lane(lane)
+        self.request_buckets[lane].consume()
+
+    def acquire_bytes(self, lane: str, nbytes: int):
+        """Registers `nbytes` downloaded in `lane`, waiting if the lane's rate
+        was exceeded.
+
+        Args:
+            lane (str): lane of the request (`html` or `files`).
+            nbytes (int): number of bytes downloaded.
+        """
+
+        self._check_lane(lane)
+        self.byte_buckets[lane].consume(nbytes)
+
+    def report(self) -> str:
+        """Returns the time waited in each lane."""
+
+        waited = []
+        for lane in LANES:
+            seconds = self.request_buckets[lane].waited
+            seconds += self.byte_buckets[lane].waited
+            waited.append(f"{lane} {seconds:.1f}s")
+
+        return "waited " + ", ".join(waited)
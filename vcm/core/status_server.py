@@ -23,6 +23,10 @@ logger = getLogger(__name__)
 def runserver(queue: Queue, threadlist: List[Worker]):
     from vcm.downloader.subject import Subject
     from vcm.downloader.link import BaseLink
+    from vcm.downloader.algorithms import AlgorithmStats
+    from vcm.core.concurrency import ConcurrencyLimiter
+    from vcm.core.networking import Connection, RetryBudget
+    from vcm.core.rate_limiter import RateLimiter
 
     t0 = time()
 
@@ -63,7 +67,17 @@ def runserver(queue: Queue, threadlist: List[Worker]):
 
             if not running.is_set():
                 status += '<font color="red"> [Shutting down]</font>'
-            status += f"<br>Items left: {queue.qsize()}<br><br>"
+            status += f"<br>Items left: {queue.qsize()}<br>"
+
+            pool_stats = Connection().pool_stats
+            status += (
+                f"Connection pool: {pool_stats['requests']} requests, "
+                f"{pool_stats['hits']} reused, {pool_stats['misses']} opened<br>"
+            )
+            status += f"Retries: {RetryBudget.report()}<br>"
+            status += f"Rate limiter: {RateLimiter().report()}<br>"
+            status += f"Concurrency limit: {ConcurrencyLimiter().report()}<br>"
+            status += f"Html algorithms: {AlgorithmStats().report()}<br><br>"
             thread_status = "Threads (%d):" % count_threads()
 
             if ErrorCounter.has_errors():
@@ -2,7 +2,7 @@
 from collections import defaultdict
 from copy import deepcopy
 from datetime import datetime
-from functools import wraps
+from functools import lru_cache, wraps
 import logging
 from logging.handlers import RotatingFileHandler
 import os
@@ -16,6 +16,8 @@ from typing import TypeVar, Union
 from warnings import warn
 from webbrowser import get as get_webbrowser
 
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
 import click
 from colorama import init as start_colorama
 from packaging import version
@@ -77,6 +79,45 @@ class Patterns:
     )
 
 
+@lru_cache(maxsize=None)
+def get_html_parser(name: str) -> str:
+    """Returns the parser to use with BeautifulSoup. If the parser `name` is not
+    installed, Python's built-in parser (`html.parser`) is returned.
+
+    Args:
+        name (str): name of the parser (`lxml`, `html.parser` or `html5lib`).
+
+    Returns:
+        str: name of the parser to use.
+    """
+
+    if builder_registry.lookup(name) is None:
+        logger.warning("HTML parser %r not installed, using html.parser", name)
+        return "html.parser"
+    return name
+
+
+def parse_html(markup, parse_only: SoupStrainer = None) -> BeautifulSoup:
+    """Parses a web page with the parser set in the setting `html-parser`.
+
+    Args:
+        markup (Union[str, bytes]): web page to parse.
+        parse_only (SoupStrainer, optional): if set, only the matching elements
+            are parsed. Ignored by `html5lib`, which always parses the whole
+            page. Defaults to None.
+
+    Returns:
+        BeautifulSoup: parsed web page.
+    """
+
+    from vcm.settings import settings
+
+    parser = get_html_parser(settings.html_parser)
+    if parser == "html5lib":
+        parse_only = None
+    return BeautifulSoup(markup, parser, parse_only=parse_only)
+
+
 def timing(_func=_def, *, name=None, level=None, report=True):
     if _func is not _def and not callable(_func):
         raise ValueError("Use keyword arguments in the timing decorator")
@@ -0,0 +1,203 @@
+"""Client of Moodle's REST web service."""
+import logging
+from threading import Lock
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+from vcm.settings import settings
+
+from .credentials import Credentials
+from .exceptions import DownloaderError, WebServiceError
+from .networking import Connection
+from .utils import MetaSingleton
+
+logger = logging.getLogger(__name__)
+
+
+def flatten_params(params: Any, prefix: str = "") -> Dict[str, Any]:
+    """Converts nested parameters into the flat format expected by Moodle's REST
+    server (`options[0][name]=value`).
+
+    Args:
+        params (Any): parameters to flatten (dicts, lists or values).
+        prefix (str, optional): prefix of the keys. Defaults to "".
+
+    Returns:
+        Dict[str, Any]: flat parameters.
+    """
+
+    if isinstance(params, dict):
+        items = params.items()
+    elif isinstance(params, (list, tuple)):
+        items = enumerate(params)
+    else:
+        if isinstance(params, bool):
+            params = int(params)
+        return {prefix: params}
+
+    flat = {}
+    for key, value in items:
+        key = f"{prefix}[{key}]" if prefix else str(key)
+        flat.update(flatten_params(value, key))
+    return flat
+
+
+class WebService(metaclass=MetaSingleton):
+    """Client of Moodle's REST web service. The token is requested with the user's
+    credentials the first time it's needed, and shared by all the threads."""
+
+    service = "moodle_mobile_app"
+    token_url = urljoin(settings.base_url, "login/token.php")
+    server_url = urljoin(settings.base_url, "webservice/rest/server.php")
+
+    def __init__(self):
+        self.connection = Connection()
+        self._token: Optional[str] = None
+        self._user_id: Optional[int] = None
+        self._lock = Lock()
+
+    @property
+    def token(self) -> str:
+        """Returns the token of the web service, requesting it if needed.
+
+        Returns:
+            str: token.
+        """
+
+        with self._lock:
+            if not self._token:
+                self._token = self.request_token()
+            return self._token
+
+    def request_token(self) -> str:
+        """Requests a new token of the web service.
+
+        Raises:
+            WebServiceError: if the server doesn't return the token.
+
+        Returns:
+            str: token.
+        """
+
+        logger.debug("Requesting web service token")
+        data = {
+            "username": Credentials.VirtualCampus.username,
+            "password": Credentials.VirtualCampus.password,
+            "service": self.service,
+        }
+
+        response = self.post(self.token_url, data)
+        if "token" not in response:
+            raise WebServiceError(
+                "Can't get web service token: %s" % response.get("error", response)
+            )
+
+        return response["token"]
+
+    def post(self, url: str, data: dict) -> Any:
+        """Sends a POST request and decodes its JSON response.
+
+        Args:
+            url (str): url of the request.
+            data (dict): data to send.
+
+        Raises:
+            WebServiceError: if the server returns an error or invalid JSON.
+
+        Returns:
+            Any: decoded response.
+        """
+
+        try:
+            response = self.connection.post(url, data)
+        except DownloaderError as exc:
+            raise WebServiceError("Web service request failed") from exc
+
+        if not response.ok:
+            raise WebServiceError(f"Web service returned {response.status_code}")
+
+        try:
+            return response.json()
+        except ValueError as exc:
+            raise WebServiceError("Web service returned invalid JSON") from exc
+
+    def call(self, function: str, **params) -> Any:
+        """Calls a function of the web service.
+
+        Args:
+            function (str): name of the function.
+            **params: parameters of the function.
+
+        Raises:
+            WebServiceError: if the function raises an exception.
+
+        Returns:
+            Any: result of the function.
+        """
+
+        logger.debug("Calling web service function %r", function)
+        data = flatten_params(params)
+        data.update(
+            {
+                "wstoken": self.token,
+                "wsfunction": function,
+                "moodlewsrestformat": "json",
+            }
+        )
+
+        result = self.post(self.server_url, data)
+        if isinstance(result, dict) and "exception" in result:
+            raise WebServiceError(
+                "%s failed: %s (%s)"
+                % (function, result.get("message"), result.get("errorcode"))
+            )
+
+        return result
+
+    @property
+    def user_id(self) -> int:
+        """Returns the id of the user, requesting it if needed.
+
+        Returns:
+            int: user id.
+        """
+
+        if self._user_id is None:
+            self._user_id = self.call("core_webservice_get_site_info")["userid"]
+        return self._user_id
+
+    def get_user_courses(self) -> List[Dict[str, Any]]:
+        """Returns the courses of the user.
+
+        Returns:
+            List[Dict[str, Any]]: courses (`id`, `fullname`, `shortname`, etc).
+        """
+
+        return self.call("core_enrol_get_users_courses", userid=self.user_id)
+
+    def get_course_contents(self, course_id: int) -> List[Dict[str, Any]]:
+        """Returns the sections of a course, with their modules and files.
+
+        Args:
+            course_id (int): id of the course.
+
+        Returns:
+            List[Dict[str, Any]]: sections of the course.
+        """
+
+        return self.call("core_course_get_contents", courseid=course_id)
+
+    @staticmethod
+    def to_pluginfile_url(url: str) -> str:
+        """Converts a file url of the web service into a regular one, which
+        can be downloaded using the session cookies instead of the token.
+
+        Args:
+            url (str): file url returned by the web service.
+
+        Returns:
+            str: regular file url.
+        """
+
+        url = url.replace("/webservice/pluginfile.php", "/pluginfile.php", 1)
+        return url.split("?")[0]
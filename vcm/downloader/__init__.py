@@ -3,24 +3,37 @@ import logging
 from queue import Queue
 import re
 
-from bs4 import BeautifulSoup
 from colorama import init as init_colorama
 
-from vcm.core.networking import Connection
+from vcm.core.concurrency import ConcurrencyLimiter
+from vcm.core.networking import Connection, RetryBudget
+from vcm.core.rate_limiter import RateLimiter
 from vcm.core.status_server import runserver
-from vcm.core.utils import timing
+from vcm.core.utils import parse_html, timing
+from vcm.core.webservice import WebService
 from vcm.core.workers import start_workers
 from vcm.settings import settings
 
+from .algorithms import AlgorithmStats
+from .alias import Alias
+from .content_types import UnknownContentTypes
+from .filecache import REAL_FILE_CACHE
+from .fingerprints import PageFingerprints
+from .forums import ForumIndex
+from .resolutions import ResolutionCache
 from .subject import Subject
+from .validators import ValidatorCache
 
 
 def get_subjects(queue):
+    if settings.discovery_backend == "webservice":
+        return get_subjects_webservice(queue)
+
     logger = logging.getLogger(__name__)
 
     connection = Connection()
     request = connection.get(connection.user_url)
-    soup = BeautifulSoup(request.text, "html.parser")
+    soup = parse_html(request.text)
     primary_li = soup.find_all("li", class_="contentnode")[3]
 
     lis = primary_li.find_all("li")
@@ -48,6 +61,43 @@ def get_subjects(queue):
     return subjects
 
 
+def get_subjects_webservice(queue):
+    """Finds the subjects using Moodle's web service.
+
+    Args:
+        queue (Queue): queue to organize threads.
+
+    Returns:
+        List[Subject]: subjects of the user.
+    """
+
+    logger = logging.getLogger(__name__)
+
+    courses = WebService().get_user_courses()
+    logger.debug("Found %d potential subjects (web service)", len(courses))
+    subjects = []
+
+    for course in courses:
+        course_id = course["id"]
+        subject_url = settings.gen_subject_url(course_id)
+        match = re.search(r"^(.+?)\s?\(", course["fullname"])
+        name = match.group(1) if match else course["fullname"]
+
+        if course_id in settings.exclude_subjects_ids:
+            logger.info("Excluding subject %s (%d)", name, course_id)
+            continue
+
+        # Don't consider subject if 'grado' is in the name (it is the degree itself)
+        if "grado" in name.lower():
+            continue
+
+        logger.debug("Assembling subject %r", name)
+        subjects.append(Subject(name, subject_url, queue))
+
+    subjects.sort(key=lambda x: x.name)
+    return subjects
+
+
 def find_subjects(queue, discover_only=False):
     """Starts finding subjects.
 
@@ -70,6 +120,50 @@ def find_subjects(queue, discover_only=False):
     return subjects
 
 
+def save_stores():
+    """Saves the stores of the root folder and the new aliases. A store that
+    can't be saved doesn't prevent the rest from being saved."""
+
+    logger = logging.getLogger(__name__)
+    ForumIndex().commit()
+
+    stores = (
+        ValidatorCache(),
+        REAL_FILE_CACHE,
+        PageFingerprints(),
+        ResolutionCache(),
+        ForumIndex(),
+    )
+    for store in stores:
+        try:
+            store.save()
+        except Exception:
+            logger.exception("Error saving %s", type(store).__name__)
+
+    Alias.commit()
+
+
+def finish_execution(connection: Connection):
+    """Saves the stores (see `save_stores`) and logs the statistics of the
+    execution. Must be called at the end of the execution, even if it failed.
+
+    Args:
+        connection (Connection): connection used by the execution.
+    """
+
+    logger = logging.getLogger(__name__)
+    save_stores()
+
+    logger.info("Connection pool usage: %r", connection.pool_stats)
+    logger.info("Retries: %s", RetryBudget.report())
+    logger.info("Rate limiter: %s", RateLimiter().report())
+    logger.info("Concurrency limit: %s", ConcurrencyLimiter().report())
+    logger.info("Html algorithms: %s", AlgorithmStats().report())
+    logger.info("Unchanged forum discussions: %d", ForumIndex().skipped)
+    if UnknownContentTypes.has_unknown():
+        logger.warning("Unknown content types: %s", UnknownContentTypes.report())
+
+
 @timing(name="VCM downloader")
 def download(nthreads=20, killer=True, status_server=True, discover_only=False):
     """
@@ -96,12 +190,20 @@ def download(nthreads=20, killer=True, status_server=True, discover_only=False):
     init_colorama()
 
     queue = Queue()
+    connection = Connection()
+    connection.set_pool_size(nthreads)
+    RetryBudget.reset()
+    RateLimiter().configure()
+    ConcurrencyLimiter().configure(nthreads)
     threads = start_workers(queue, nthreads, killer=killer)
 
     if status_server:
         runserver(queue, threads)
 
-    with Connection():
-        find_subjects(queue, discover_only=discover_only)
-        logger.debug("Waiting for queue to empty")
-        queue.join()
+    try:
+        with connection:
+            find_subjects(queue, discover_only=discover_only)
+            logger.debug("Waiting for queue to empty")
+            queue.join()
+    finally:
+        finish_execution(connection)
@@ -0,0 +1,113 @@
+"""Statistics of the algorithms used to find the resources of the HTML pages."""
+from collections import defaultdict
+import logging
+from threading import Lock
+from typing import Callable, Dict, List
+
+from vcm.core.utils import MetaSingleton
+
+logger = logging.getLogger(__name__)
+
+# Names of the methods of `Html` that find the resource of a page, registered
+# with `html_algorithm`
+HTML_ALGORITHMS: List[str] = []
+
+
+def html_algorithm(func: Callable) -> Callable:
+    """Registers a method of `Html` as an algorithm to find the resource of a
+    page. It must return the resource, or None if it doesn't find it.
+
+    Args:
+        func (Callable): method to register.
+
+    Returns:
+        Callable: the same method.
+    """
+
+    if func.__name__ not in HTML_ALGORITHMS:
+        HTML_ALGORITHMS.append(func.__name__)
+    return func
+
+
+class AlgorithmStats(metaclass=MetaSingleton):
+    """Counts the hits and misses of each algorithm in each scope (subject), so
+    the algorithms more likely to find the resource are tried first."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.stats: Dict[str, Dict[str, List[int]]] = defaultdict(
+            lambda: defaultdict(lambda: [0, 0])
+        )
+        self.failures = 0
+        self.failures_time = 0.0
+
+    def reset(self):
+        """Removes all the statistics."""
+
+        with self._lock:
+            self.stats.clear()
+            self.failures = 0
+            self.failures_time = 0.0
+
+    def record(self, scope: str, algorithm: str, hit: bool):
+        """Registers the result of an algorithm.
+
+        Args:
+            scope (str): scope of the page (name of the subject).
+            algorithm (str): name of the algorithm.
+            hit (bool): True if the algorithm found the resource.
+        """
+
+        with self._lock:
+            self.stats[scope][algorithm][0 if hit else 1] += 1
+
+    def record_failure(self, elapsed: float):
+        """Registers a page where no algorithm found the resource.
+
+        Args:
+            elapsed (float): seconds spent handling the page.
+        """
+
+        with self._lock:
+            self.failures += 1
+            self.failures_time += elapsed
+
+    def sort(self, scope: str, algorithms: List[str]) -> List[str]:
+        """Sorts the algorithms by their hit rate in a scope, highest first.
+        Algorithms with the same hit rate keep their order.
+
+        Args:
+            scope (str): scope of the page (name of the subject).
+            algorithms (List[str]): names of the algorithms.
+
+        Returns:
+            List[str]: sorted algorithms.
+        """
+
+        with self._lock:
+            stats = self.stats.get(scope, {})
+
+            def hit_rate(algorithm):
+                hits, misses = stats.get(algorithm, (0, 0))
+                # Smoothed, so untried algorithms aren't discarded
+                return (hits + 1) / (hits + misses + 2)
+
+            return sorted(algorithms, key=hit_rate, reverse=True)
+
+    def report(self) -> str:
+        """Returns the hits and attempts of each algorithm in all the scopes, and
+        the number of failures."""
+
+        with self._lock:
+            totals = defaultdict(lambda: [0, 0])
+            for scope_stats in self.stats.values():
+                for algorithm, (hits, misses) in scope_stats.items():
+                    totals[algorithm][0] += hits
+                    totals[algorithm][1] += misses
+
+            algorithms = [
+                f"{algorithm} {hits}/{hits + misses}"
+                for algorithm, (hits, misses) in sorted(totals.items())
+            ]
+            failures = f"{self.failures} failures ({self.failures_time:.1f}s)"
+            return ", ".join(algorithms + [failures])
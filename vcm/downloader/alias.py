@@ -2,13 +2,20 @@
 from dataclasses import dataclass
 from hashlib import sha1
 import json
+import logging
+import os
+from contextlib import contextmanager
 from pathlib import Path
-from threading import Semaphore
+import sqlite3
+from threading import Lock, Semaphore
+from typing import Dict, List, Optional, Set
 
 from vcm.core.exceptions import AliasFatalError, AliasNotFoundError
 from vcm.core.utils import MetaSingleton
 from vcm.settings import settings
 
+logger = logging.getLogger(__name__)
+
 
 def calculate_hash(byte_data):
     if isinstance(byte_data, str):
@@ -47,99 +54,207 @@ class AliasEntry:
 
 
 class Alias(metaclass=MetaSingleton):
-    """Class designed to declare aliases"""
+    """Class designed to declare aliases.
+
+    The aliases are loaded once, and indexed by id and by alias. New aliases are
+    appended to a journal (`alias.journal`, one JSON entry per line), which is
+    merged into `alias.json` every `compact_interval` new aliases and when
+    `save()` is called at the end of the execution.
+
+    If the alias of a new id is already used by another id, both ids share it,
+    as they always did in this backend. The first free name created with
+    `_create_name` is found with `_increment`.
+    """
+
+    compact_interval = 500
 
     def __init__(self):
         self.alias_path = settings.root_folder / "alias.json"
-        self.alias_entries = []
+        self.journal_path = settings.root_folder / "alias.journal"
+        self.alias_entries: List[AliasEntry] = []
+        self.id_index: Dict[str, AliasEntry] = {}
+        self.alias_index: Dict[Path, AliasEntry] = {}
+        self.taken_aliases: Set[str] = set()
+        self.next_index: Dict[str, int] = {}
+        self.journal_size = 0
         self.load()
 
     def __len__(self):
         return len(self.alias_entries)
 
     def load(self):
-        """Loads the alias configuration."""
+        """Loads the alias configuration and the journal."""
 
-        if not self.alias_path.exists():
+        Events.acquire()
+        try:
             self.alias_entries = []
-            return
+            self.id_index = {}
+            self.alias_index = {}
+            self.taken_aliases = set()
+            self.next_index = {}
+
+            for entry in self._read_alias_file():
+                self._add_entry(AliasEntry(**entry))
+
+            self.journal_size = 0
+            for entry in self._read_journal():
+                self._add_entry(AliasEntry(**entry))
+                self.journal_size += 1
+        finally:
+            Events.release()
+
+    def _read_alias_file(self) -> List[dict]:
+        if not self.alias_path.exists():
+            return []
+
         try:
-            Events.acquire()
             with self.alias_path.open(encoding="utf-8") as file_handler:
-                self.alias_entries = json.load(file_handler) or []
+                entries = json.load(file_handler) or []
         except json.JSONDecodeError as ex:
             raise AliasFatalError("Raised JSONDecodeError") from ex
         except UnicodeDecodeError as ex:
             raise AliasFatalError("Raised UnicodeDecodeError") from ex
 
-        if not isinstance(self.alias_entries, list):
-            raise TypeError(f"Alias file invalid ({type(self.alias_entries).__name__})")
+        if not isinstance(entries, list):
+            raise TypeError(f"Alias file invalid ({type(entries).__name__})")
 
-        for alias in self.alias_entries:
+        for alias in entries:
             if "id" not in alias or "alias" not in alias:
                 raise TypeError(f"alias file invalid: {alias!r}")
 
-        self.alias_entries = [AliasEntry(**x) for x in self.alias_entries]
+        return entries
 
-        Events.release()
+    def _read_journal(self) -> List[dict]:
+        if not self.journal_path.exists():
+            return []
+
+        entries = []
+        with self.journal_path.open(encoding="utf-8") as file_handler:
+            for line in file_handler:
+                try:
+                    entry = json.loads(line)
+                    entries.append({"id": entry["id"], "alias": entry["alias"]})
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    # The last line may be incomplete if the execution was killed
+                    logger.warning("Invalid alias journal entry: %r", line)
+
+        return entries
+
+    def _add_entry(self, entry: AliasEntry) -> bool:
+        """Adds an entry to the indexes, unless its id is already registered.
+
+        Returns:
+            bool: True if the entry was added.
+        """
+
+        if entry.id in self.id_index:
+            return False
+
+        self.alias_entries.append(entry)
+        self.id_index[entry.id] = entry
+        self.alias_index.setdefault(entry.alias, entry)
+        self.taken_aliases.add(entry.alias.as_posix())
+        return True
 
     @classmethod
     def destroy(cls):
-        """Destroys the alias database."""
+        """Destroys the alias database. If the setting `alias-backend` is
+        `sqlite`, the SQLite database is deleted too."""
+
+        if settings.alias_backend == "sqlite":
+            SqliteAlias.destroy()
 
         self = cls()
         Events.acquire()
 
         self.alias_entries = []
+        self.id_index = {}
+        self.alias_index = {}
+        self.taken_aliases = set()
+        self.next_index = {}
+        self.journal_size = 0
+
         with self.alias_path.open("wt", encoding="utf-8") as file_handler:
             json.dump([], file_handler, indent=4, sort_keys=True, ensure_ascii=False)
+        if self.journal_path.exists():
+            self.journal_path.unlink()
 
         Events.release()
         return
 
+    @classmethod
+    def commit(cls):
+        """Saves the new aliases in the backend set in the setting
+        `alias-backend`. Must be called at the end of the execution."""
+
+        if settings.alias_backend == "sqlite":
+            # The aliases are inserted in the database when they are assigned
+            return
+        return cls().save()
+
     def save(self):
-        """Saves alias configuration to the file."""
-        try:
-            with self.alias_path.open(encoding="utf-8") as file_handler:
-                temp = json.load(file_handler) or []
-        except (FileNotFoundError, json.JSONDecodeError):
-            temp = []
+        """Saves alias configuration to the file, merging the journal into it."""
 
-        to_write = [x.to_json() for x in self.alias_entries]
-        to_write += temp
+        Events.acquire()
+        try:
+            self._compact()
+        finally:
+            Events.release()
 
-        res_list = []
-        for i, _ in enumerate(to_write):
-            if to_write[i] not in to_write[i + 1 :]:
-                res_list.append(to_write[i])
+    def _compact(self):
+        # Keep the aliases saved by other executions since this one started
+        for entry in self._read_alias_file():
+            self._add_entry(AliasEntry(**entry))
 
-        with self.alias_path.open("wt", encoding="utf-8") as file_handler:
+        to_write = [x.to_json() for x in self.alias_entries]
+        temp_path = self.alias_path.with_name(self.alias_path.name + ".tmp")
+        with temp_path.open("wt", encoding="utf-8") as file_handler:
             json.dump(
-                res_list, file_handler, indent=4, sort_keys=True, ensure_ascii=False
+                to_write, file_handler, indent=4, sort_keys=True, ensure_ascii=False
             )
 
+        os.replace(temp_path.as_posix(), self.alias_path.as_posix())
+        if self.journal_path.exists():
+            self.journal_path.unlink()
+
+        logger.debug(
+            "Alias database compacted (%d entries, %d from journal)",
+            len(self.alias_entries),
+            self.journal_size,
+        )
+        self.journal_size = 0
+
+    def _append_to_journal(self, entry: AliasEntry):
+        with self.journal_path.open("at", encoding="utf-8") as file_handler:
+            file_handler.write(json.dumps(entry.to_json(), ensure_ascii=False) + "\n")
+
+        self.journal_size += 1
+        if self.journal_size >= self.compact_interval:
+            self._compact()
+
     def _increment(self, something):
         """Changes the filename if it already exists in the database.
 
+        Returns the name created with the lowest free index. The lowest index
+        that may be free is stored for each filename (aliases are never
+        removed), so the taken names are not checked again.
+
         Examples:
             Alias._increment("file") -> "file.1"
             Alias._increment("file.txt") -> "file.1.txt"
             Alias._increment("some.file.txt") -> "some.file.1.txt"
 
         """
-        index = 0
-        while True:
+
+        something = Path(something).as_posix()
+        index = self.next_index.get(something, 1)
+        temp = self._create_name(something, index)
+        while temp in self.taken_aliases:
             index += 1
             temp = self._create_name(something, index)
 
-            done = True
-            for file in self.alias_entries:
-                if temp == file.alias:
-                    done = False
-                    break
-
-            if done:
-                return temp
+        self.next_index[something] = index
+        return temp
 
     @classmethod
     def _create_name(cls, template: str, index: int):
@@ -178,22 +293,23 @@ class Alias(metaclass=MetaSingleton):
         if is_folder:
             id_ = calculate_hash(original + str(folder_id))
 
-        self = Alias.__new__(Alias)
-        self.__init__()
-        Events.acquire()
-
-        for file in self.alias_entries:
-            if file.id == id_:
-                Events.release()
+        if settings.alias_backend == "sqlite":
+            return SqliteAlias().id_to_alias(id_, original)
 
-                return file.alias
+        self = cls()
+        Events.acquire()
 
-        new = AliasEntry(id_, original)
-        self.alias_entries.append(new)
-        self.save()
+        try:
+            entry = self.id_index.get(id_)
+            if entry is not None:
+                return entry.alias
 
-        Events.release()
-        return new.alias
+            new = AliasEntry(id_, original)
+            self._add_entry(new)
+            self._append_to_journal(new)
+            return new.alias
+        finally:
+            Events.release()
 
     @classmethod
     def alias_to_id(cls, alias):
@@ -209,11 +325,241 @@ class Alias(metaclass=MetaSingleton):
             AliasNotFoundError: if the alias is not in the database.
 
         """
-        self = Alias.__new__(Alias)
-        self.__init__()
 
-        for file in self.alias_entries:
-            if file.alias == alias:
-                return file.id
+        if settings.alias_backend == "sqlite":
+            return SqliteAlias().alias_to_id(alias)
+
+        entry = cls().alias_index.get(Path(alias))
+        if entry is None:
+            raise AliasNotFoundError(f"Alias not found: {alias!r}")
+        return entry.id
+
+
+class SqliteAlias(metaclass=MetaSingleton):
+    """Alias database stored in SQLite (`alias.sqlite3`), used if the setting
+    `alias-backend` is `sqlite`.
+
+    Ids and aliases have unique indexes, so lookups don't depend on the number
+    of aliases. The database uses WAL mode, so several executions can read it
+    while another one writes. Each new alias is chosen and inserted in the same
+    write transaction, so two executions can't assign the same alias. If the
+    insert fails anyway, the alias is chosen again (up to `retries` times).
+
+    The first time the database is created, the aliases of `alias.json` are
+    migrated to it.
+
+    Args:
+        path (Path, optional): path of the database. Defaults to
+            `<root-folder>/alias.sqlite3`.
+    """
+
+    retries = 5
+    timeout = 30
+
+    def __init__(self, path: Path = None):
+        self.path = path or settings.root_folder / "alias.sqlite3"
+        self._lock = Lock()
+        self.next_index: Dict[str, int] = {}
+
+        is_new = not self.path.exists()
+        # The transactions are started explicitly (see `_transaction`)
+        self.connection = sqlite3.connect(
+            self.path.as_posix(),
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.create_tables()
+
+        if is_new:
+            self.migrate_from_json(Alias().alias_entries)
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self.connection.execute("SELECT COUNT(*) FROM alias").fetchone()
+            return count
+
+    @classmethod
+    def destroy(cls):
+        """Deletes the database, with its WAL files. The next instance creates
+        it again."""
+
+        self = cls._instance
+        if self is not None:
+            with self._lock:
+                self.connection.close()
+            cls._instance = None
+
+        path = self.path if self is not None else settings.root_folder / "alias.sqlite3"
+        for suffix in ("", "-wal", "-shm"):
+            database_path = path.with_name(path.name + suffix)
+            if database_path.exists():
+                database_path.unlink()
+
+    @contextmanager
+    def _transaction(self):
+        """Runs the block in a write transaction, committed if the block
+        succeeds and rolled back otherwise.
+
+        The write lock of the database is acquired at the beginning (`BEGIN
+        IMMEDIATE`), so other executions can't insert aliases between the
+        queries and the inserts of the block.
+        """
+
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def create_tables(self):
+        """Creates the table of aliases and its indexes, if they don't exist."""
+
+        with self._transaction():
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS alias "
+                "(id TEXT NOT NULL, alias TEXT NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS alias_id ON alias (id)"
+            )
+            self.connection.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS alias_alias ON alias (alias)"
+            )
+
+    def migrate_from_json(self, entries: List[AliasEntry]) -> int:
+        """Inserts the aliases of the JSON database. Ids already registered are
+        skipped. Old versions of the JSON database may have the same alias for
+        several ids: the first id keeps it, and the rest are given the first
+        free name created with `Alias._create_name`.
+
+        Args:
+            entries (List[AliasEntry]): aliases of the JSON database.
+
+        Returns:
+            int: number of aliases migrated.
+        """
+
+        migrated = 0
+        reassigned = 0
+        with self._lock, self._transaction():
+            for entry in entries:
+                if self._get_alias(entry.id) is not None:
+                    continue
+
+                original = entry.alias.as_posix()
+                alias = self._find_free_alias(original)
+                if alias != original:
+                    logger.warning(
+                        "Alias %r of %s is duplicated, reassigned to %r",
+                        original,
+                        entry.id,
+                        alias,
+                    )
+                    reassigned += 1
+
+                self.connection.execute(
+                    "INSERT INTO alias (id, alias) VALUES (?, ?)", (entry.id, alias)
+                )
+                migrated += 1
+
+        if entries:
+            logger.info(
+                "Migrated %d/%d aliases from alias.json to %s (%d reassigned)",
+                migrated,
+                len(entries),
+                self.path.name,
+                reassigned,
+            )
+        return migrated
+
+    def _get_alias(self, id_: str) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT alias FROM alias WHERE id = ?", (id_,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def _is_taken(self, alias: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM alias WHERE alias = ?", (alias,)
+        ).fetchone()
+        return row is not None
+
+    def _find_free_alias(self, original: str) -> str:
+        if not self._is_taken(original):
+            return original
+
+        index = self.next_index.get(original, 1)
+        alias = Alias._create_name(original, index)
+        while self._is_taken(alias):
+            index += 1
+            alias = Alias._create_name(original, index)
+        self.next_index[original] = index
+        return alias
+
+    def id_to_alias(self, id_: str, original: str) -> Path:
+        """Returns the alias of an id, registering `original` (or, if it's used
+        by another id, the first free name created with `Alias._create_name`) if
+        the id is not in the database.
+
+        Args:
+            id_ (str): id.
+            original (str): original name.
+
+        Raises:
+            AliasFatalError: if the alias can't be inserted in `retries`
+                attempts.
+
+        Returns:
+            Path: alias.
+        """
+
+        original = Path(original).as_posix()
+        with self._lock:
+            alias = self._get_alias(id_)
+            if alias is not None:
+                return Path(alias)
+
+            for _ in range(self.retries):
+                try:
+                    with self._transaction():
+                        # Another execution may have registered the id meanwhile
+                        alias = self._get_alias(id_)
+                        if alias is None:
+                            alias = self._find_free_alias(original)
+                            self.connection.execute(
+                                "INSERT INTO alias (id, alias) VALUES (?, ?)",
+                                (id_, alias),
+                            )
+                    return Path(alias)
+                except sqlite3.IntegrityError as exc:
+                    logger.warning("Can't insert alias %r, retrying (%s)", alias, exc)
+
+        raise AliasFatalError(f"Can't register an alias for {original!r} ({id_})")
+
+    def alias_to_id(self, alias) -> str:
+        """Returns the id of an alias.
+
+        Args:
+            alias (str): alias.
+
+        Raises:
+            AliasNotFoundError: if the alias is not in the database.
+
+        Returns:
+            str: id.
+        """
+
+        alias = Path(alias).as_posix()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT id FROM alias WHERE alias = ?", (alias,)
+            ).fetchone()
 
-        raise AliasNotFoundError(f"Alias not found: {alias!r}")
+        if row is None:
+            raise AliasNotFoundError(f"Alias not found: {alias!r}")
+        return row[0]
@@ -0,0 +1,176 @@
+"""Registry of the content types of the resources that can be downloaded."""
+from collections import defaultdict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+
+@dataclass
+class ContentTypeHandler:
+    """Describes how to download a resource of a content type.
+
+    Args:
+        resource_type (str): type of the resource (`pdf`, `word`, etc).
+        stream (bool, optional): if True, the content is streamed to disk in
+            chunks (and can be resumed). If False, it's read at once. Defaults
+            to True.
+        lane (str, optional): lane of the rate limiter used to download the
+            content. Defaults to "files".
+        handler (Callable, optional): function called with the resource instead
+            of saving its content. Defaults to None.
+    """
+
+    resource_type: str
+    stream: bool = True
+    lane: str = "files"
+    handler: Optional[Callable] = None
+
+
+# Handlers by normalized content type (type/subtype)
+CONTENT_TYPES: Dict[str, ContentTypeHandler] = {}
+
+# Handlers of the content types not registered, by a keyword they contain
+CONTENT_TYPE_KEYWORDS: List[Tuple[str, ContentTypeHandler]] = []
+
+
+def normalize_content_type(content_type: Optional[str]) -> str:
+    """Returns the `type/subtype` of a Content-Type header, without parameters.
+
+    Args:
+        content_type (Optional[str]): value of the Content-Type header.
+
+    Returns:
+        str: normalized content type (empty if `content_type` is None).
+    """
+
+    if not content_type:
+        return ""
+    return content_type.split(";")[0].strip().lower()
+
+
+def register_content_type(
+    content_types: Union[str, Iterable[str]],
+    resource_type: str,
+    stream=True,
+    lane="files",
+    handler: Callable = None,
+    keywords: Iterable[str] = (),
+) -> ContentTypeHandler:
+    """Registers how to download the resources of some content types. Registering
+    a content type again replaces its handler.
+
+    Args:
+        content_types (Union[str, Iterable[str]]): content types (`type/subtype`).
+        resource_type (str): type of the resource (`pdf`, `word`, etc).
+        stream (bool, optional): if True, the content is streamed to disk in
+            chunks. If False, it's read at once. Defaults to True.
+        lane (str, optional): lane of the rate limiter. Defaults to "files".
+        handler (Callable, optional): function called with the resource instead
+            of saving its content. Defaults to None.
+        keywords (Iterable[str], optional): if a content type is not registered
+            but contains one of these keywords, this handler is used. Defaults
+            to ().
+
+    Returns:
+        ContentTypeHandler: registered handler.
+    """
+
+    if isinstance(content_types, str):
+        content_types = [content_types]
+
+    content_handler = ContentTypeHandler(resource_type, stream, lane, handler)
+    for content_type in content_types:
+        CONTENT_TYPES[normalize_content_type(content_type)] = content_handler
+    for keyword in keywords:
+        CONTENT_TYPE_KEYWORDS.append((keyword.lower(), content_handler))
+
+    return content_handler
+
+
+def get_content_type_handler(content_type: Optional[str]):
+    """Returns the handler of a content type.
+
+    Args:
+        content_type (Optional[str]): value of the Content-Type header.
+
+    Returns:
+        Optional[ContentTypeHandler]: handler, or None if the content type is
+            unknown.
+    """
+
+    content_type = normalize_content_type(content_type)
+    try:
+        return CONTENT_TYPES[content_type]
+    except KeyError:
+        pass
+
+    if content_type:
+        for keyword, content_handler in CONTENT_TYPE_KEYWORDS:
+            if keyword in content_type:
+                return content_handler
+    return None
+
+
+class UnknownContentTypes:
+    """Counts the content types without handler found in the execution."""
+
+    counter = defaultdict(int)
+    _lock = Lock()
+
+    @classmethod
+    def record(cls, content_type: Optional[str]):
+        with cls._lock:
+            cls.counter[normalize_content_type(content_type) or "none"] += 1
+
+    @classmethod
+    def has_unknown(cls) -> bool:
+        return bool(cls.counter)
+
+    @classmethod
+    def report(cls) -> str:
+        with cls._lock:
+            content_types = sorted(cls.counter.items(), key=lambda x: -x[1])
+            return ", ".join(f"{k}: {v}" for k, v in content_types) or "none"
+
+
+register_content_type("application/pdf", "pdf")
+register_content_type(
+    [
+        "application/msword",
+        "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ],
+    "word",
+    keywords=["wordprocessingml.document", "msword"],
+)
+register_content_type(
+    [
+        "application/vnd.ms-excel",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ],
+    "excel",
+    keywords=["spreadsheetml.sheet", "excel"],
+)
+register_content_type(
+    [
+        "application/vnd.ms-powerpoint",
+        "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        "application/vnd.openxmlformats-officedocument.presentationml.slideshow",
+    ],
+    "power-point",
+    keywords=["presentationml.slideshow", "presentationml.presentation", "powerpoint"],
+)
+register_content_type("application/zip", "zip")
+register_content_type("application/g-zip", "gzip")
+register_content_type("application/x-7z-compressed", "7zip")
+register_content_type(
+    ["application/x-rar-compressed", "application/vnd.rar"],
+    "rar",
+    keywords=["x-rar-compressed"],
+)
+register_content_type("text/plain", "plain", stream=False)
+register_content_type("application/json", "json", stream=False)
+register_content_type("application/octet-stream", "octect-stream")
+register_content_type("image/jpeg", "jpeg")
+register_content_type("image/png", "png")
+register_content_type("video/mp4", "mp4")
+register_content_type(["video/x-ms-wmv"], "avi", keywords=["video/x-ms-wm"])
@@ -1,18 +1,87 @@
 """File scanner to control file version."""
+from hashlib import blake2b
+import json
+import logging
 import os
 from pathlib import Path
+from threading import RLock
+from typing import Dict, List, Optional
 
 from vcm.core.exceptions import FileCacheError
 from vcm.settings import settings
 
+from .partial import PartialDownload
+
+logger = logging.getLogger(__name__)
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def new_digest():
+    """Returns a new hasher of the content of the files (BLAKE2b, 128 bits)."""
+    return blake2b(digest_size=16)
+
+
+def file_digest(path: Path, size: int = None):
+    """Returns the hasher of the content of a file, so it can be updated with
+    more content.
+
+    Args:
+        path (Path): path of the file.
+        size (int, optional): if set, only the first `size` bytes are hashed.
+            Defaults to None.
+
+    Returns:
+        blake2b: hasher.
+    """
+
+    digest = new_digest()
+    with path.open("rb") as file_handler:
+        while size is None or size > 0:
+            to_read = (
+                DIGEST_CHUNK_SIZE if size is None else min(size, DIGEST_CHUNK_SIZE)
+            )
+            chunk = file_handler.read(to_read)
+            if not chunk:
+                break
+            digest.update(chunk)
+            if size is not None:
+                size -= len(chunk)
+
+    return digest
+
 
 class FileCache:
-    """File scanner to control file version."""
+    """File scanner to control file version.
+
+    The size, modification time and hash of each file of the root folder are
+    stored in a manifest (`filecache.json`, root folder), together with the
+    modification time of each folder. The manifest is loaded the first time the
+    cache is used, and only the folders whose modification time changed since
+    they were scanned (files added, removed or renamed by other programs) are
+    scanned again. Files edited in place by other programs are only detected by
+    a full scan (`rescan()`, `vcm rescan`).
 
-    path = settings.root_folder
+    The files written by vcm are updated in the cache, which is written to disk
+    only when `save()` is called.
+    """
+
+    manifest_name = "filecache.json"
 
     def __init__(self):
-        self._cache = {}
+        self._cache: Dict[Path, dict] = {}
+        self._folders: Dict[str, float] = {}
+        self._lock = RLock()
+        self._loaded = False
+        self._modified = False
+
+    @property
+    def path(self) -> Path:
+        return settings.root_folder
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.path / self.manifest_name
 
     def __contains__(self, item):
         if not isinstance(item, Path):
@@ -20,7 +89,10 @@ class FileCache:
                 "FileCache.__contains__ must be used with Path, not %r"
                 % type(item).__name__
             )
-        return item in self._cache.keys()
+
+        self._ensure_loaded()
+        with self._lock:
+            return item in self._cache
 
     def __getitem__(self, item):
         if not isinstance(item, Path):
@@ -29,7 +101,9 @@ class FileCache:
                 % type(item).__name__
             )
 
-        return self._cache[item]
+        self._ensure_loaded()
+        with self._lock:
+            return self._cache[item]["size"]
 
     def __setitem__(self, key, value):
         if not isinstance(key, Path):
@@ -43,29 +117,307 @@ class FileCache:
                 % type(value).__name__
             )
 
-        self._cache[key] = value
+        self.update(key, value)
 
     def __len__(self):
-        return len(self._cache)
+        self._ensure_loaded()
+        with self._lock:
+            return len(self._cache)
+
+    def get_entry(self, path: Path) -> Optional[dict]:
+        """Returns the entry of a file.
+
+        Args:
+            path (Path): path of the file.
+
+        Returns:
+            Optional[dict]: `size`, `mtime` and `hash` of the file (the hash may
+                be None), or None if the file is not in the cache.
+        """
+
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._cache.get(path)
+            return dict(entry) if entry else None
+
+    def get_digest(self, path: Path) -> Optional[str]:
+        """Returns the hash of a file's content (see `new_digest`). If it isn't
+        in the cache, it's calculated from the file and stored.
+
+        Args:
+            path (Path): path of the file.
+
+        Returns:
+            Optional[str]: hash, or None if the file is not in the cache or it
+                can't be read.
+        """
+
+        entry = self.get_entry(path)
+        if entry is None:
+            return None
+        if entry["hash"]:
+            return entry["hash"]
+
+        try:
+            hash_ = file_digest(path).hexdigest()
+        except OSError:
+            return None
+
+        with self._lock:
+            if path in self._cache:
+                self._cache[path]["hash"] = hash_
+                self._modified = True
+        return hash_
+
+    def is_same(self, path: Path, size: int, hash_: str) -> bool:
+        """Checks if a file has the given content. The sizes are compared
+        first, so the file is only hashed (see `get_digest`) if they are equal.
+
+        Args:
+            path (Path): path of the file.
+            size (int): size of the content.
+            hash_ (str): hash of the content.
+
+        Returns:
+            bool: True if the file is in the cache and has the same size and
+                hash.
+        """
+
+        entry = self.get_entry(path)
+        if entry is None or entry["size"] != size:
+            return False
+        return self.get_digest(path) == hash_
+
+    def update(self, path: Path, size: int, hash_: str = None):
+        """Registers a file written by vcm.
+
+        Args:
+            path (Path): path of the file.
+            size (int): size of the file.
+            hash_ (str, optional): hash of the file's content. Defaults to None.
+        """
+
+        self._ensure_loaded()
+        try:
+            mtime = path.stat().st_mtime
+        except OSError:
+            mtime = None
+
+        with self._lock:
+            self._cache[path] = {"size": size, "mtime": mtime, "hash": hash_}
+            self._modified = True
 
     def load(self, _auto=False):
-        """Starts the scanner."""
+        """Starts the scanner: loads the manifest and scans the folders that
+        changed since the last execution. If there is no manifest, the whole root
+        folder is scanned.
+
+        The cache is marked as loaded only when the scan finishes, so the threads
+        that use it meanwhile wait for the lock instead of reading a partial
+        cache (and taking the files already downloaded as new files)."""
 
         if not _auto:
             raise FileCacheError("Use REAL_FILE_CACHE instead")
 
-        filenames = []
-        for folder, _, files in os.walk(self.path.as_posix()):
-            for file in files:
-                filenames.append(Path(folder) / file)
+        with self._lock:
+            if not self._load_manifest():
+                self._scan()
+                self._loaded = True
+                return
+
+            changed = self._scan_changed_folders()
+            self._loaded = True
+            logger.debug(
+                "File cache loaded (%d files, %d folders changed)",
+                len(self._cache),
+                changed,
+            )
+
+    def rescan(self) -> int:
+        """Scans the whole root folder and saves the manifest.
+
+        Returns:
+            int: number of files found.
+        """
+
+        with self._lock:
+            self._load_manifest()
+            self._scan()
+            self._loaded = True
+            self.save()
+            return len(self._cache)
+
+    def save(self):
+        """Saves the manifest to disk, if it was modified."""
+
+        with self._lock:
+            if not self._modified:
+                return
+
+            data = {
+                "files": {self._to_key(k): v for k, v in self._cache.items()},
+                "folders": self._folders,
+            }
+
+            temp_path = self.manifest_path.with_name(self.manifest_name + ".tmp")
+            with temp_path.open("wt", encoding="utf-8") as file_handler:
+                json.dump(data, file_handler, ensure_ascii=False)
+            os.replace(temp_path.as_posix(), self.manifest_path.as_posix())
+
+            self._modified = False
+            logger.debug("Saved file cache (%d files)", len(self._cache))
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+
+        with self._lock:
+            if not self._loaded:
+                self.load(_auto=True)
+
+    def _to_key(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.path).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def _load_manifest(self) -> bool:
+        """Loads the manifest. A corrupted manifest is discarded, as the worst
+        consequence is scanning the root folder again.
+
+        Returns:
+            bool: True if the manifest was loaded.
+        """
+
+        self._cache = {}
+        self._folders = {}
+        if not self.manifest_path.exists():
+            return False
+
+        try:
+            with self.manifest_path.open(encoding="utf-8") as file_handler:
+                data = json.load(file_handler)
+            files, folders = data["files"], data["folders"]
+            self._cache = {self.path / key: dict(v) for key, v in files.items()}
+            self._folders = {key: float(v) for key, v in folders.items()}
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            logger.warning("File cache corrupted (%r), discarding it", exc)
+            return False
+        except (KeyError, TypeError, ValueError, AttributeError):
+            logger.warning("File cache invalid, discarding it")
+            self._cache = {}
+            self._folders = {}
+            return False
+
+        return True
+
+    def _scan(self):
+        """Scans the whole root folder."""
+
+        previous = self._cache
+        self._cache = {}
+        self._folders = {}
+        self._scan_tree(self.path, previous)
+        self._modified = True
+        logger.debug("Scanned root folder (%d files)", len(self._cache))
+
+    def _scan_tree(self, folder: Path, previous: Dict[Path, dict]):
+        pending = [folder]
+        while pending:
+            pending.extend(self._scan_folder(pending.pop(), previous))
+
+    def _scan_folder(self, folder: Path, previous: Dict[Path, dict]) -> List[Path]:
+        """Scans the files of a folder, keeping the hash of the files whose size
+        and modification time didn't change.
+
+        Args:
+            folder (Path): folder to scan.
+            previous (Dict[Path, dict]): previous entries of the files.
+
+        Returns:
+            List[Path]: subfolders of the folder.
+        """
+
+        subfolders = []
+        try:
+            self._folders[self._to_key(folder)] = folder.stat().st_mtime
+            dir_entries = list(os.scandir(folder.as_posix()))
+        except OSError:
+            return subfolders
+
+        for dir_entry in dir_entries:
+            filepath = Path(dir_entry.path)
+            try:
+                if dir_entry.is_dir():
+                    # Like os.walk, don't follow symlinks to folders
+                    if not dir_entry.is_symlink():
+                        subfolders.append(filepath)
+                    continue
+
+                if PartialDownload.is_partial(filepath):
+                    continue
+
+                if filepath.name.startswith(self.manifest_name):
+                    continue
+
+                stat = dir_entry.stat()
+            except OSError:
+                continue
+
+            entry = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": None}
+            old = previous.get(filepath)
+            if old and (old["size"], old["mtime"]) == (entry["size"], entry["mtime"]):
+                entry["hash"] = old.get("hash")
+            self._cache[filepath] = entry
+
+        return subfolders
+
+    def _scan_changed_folders(self) -> int:
+        """Scans again the folders whose modification time changed, and the new
+        folders inside them. Removed folders are discarded.
+
+        Returns:
+            int: number of folders that changed.
+        """
+
+        changed = set()
+        for key, mtime in self._folders.items():
+            folder = self.path / key
+            try:
+                if folder.stat().st_mtime != mtime:
+                    changed.add(folder)
+            except OSError:
+                changed.add(folder)
+
+        if not changed:
+            return 0
+
+        previous = {}
+        for path in [x for x in self._cache if x.parent in changed]:
+            previous[path] = self._cache.pop(path)
+
+        for folder in sorted(changed):
+            if not folder.is_dir():
+                self._forget_tree(folder)
+                continue
+
+            for subfolder in self._scan_folder(folder, previous):
+                if self._to_key(subfolder) not in self._folders:
+                    self._scan_tree(subfolder, previous)
+
+        self._modified = True
+        return len(changed)
+
+    def _forget_tree(self, folder: Path):
+        """Removes a folder, its files and its subfolders from the cache."""
 
-        for file in filenames:
-            self._get_file_length(file)
+        for path in [x for x in self._cache if folder in x.parents]:
+            del self._cache[path]
 
-    def _get_file_length(self, file):
-        """Gets the file content length."""
-        self[file] = file.stat().st_size
+        key = self._to_key(folder)
+        for known in list(self._folders):
+            if known == key or known.startswith(key + "/"):
+                del self._folders[known]
 
 
 REAL_FILE_CACHE = FileCache()
-REAL_FILE_CACHE.load(_auto=True)
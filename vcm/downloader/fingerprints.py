@@ -0,0 +1,84 @@
+"""Persistent store of the fingerprints of the subjects' pages."""
+from hashlib import sha1
+import re
+from typing import Iterable, List, Optional
+
+from .store import JsonStore
+
+
+class PageFingerprints(JsonStore):
+    """Stores the fingerprint of each subject's page and the links found in it,
+    so if the page doesn't change between executions its links can be created
+    again without parsing it.
+
+    The fingerprint is the hash of the page without the tokens that change in
+    each request (the sesskey and the ids generated by Moodle and YUI).
+
+    Entries are keyed by the hash of the subject's url (the same one used by
+    `Alias`).
+    """
+
+    volatile_patterns = (
+        # Ids generated by YUI (yui_3_17_2_1_1591000000000_123)
+        re.compile(r"yui_[\w]+"),
+        # Random ids generated by Moodle (single_button5ed1d3a2b8c4f12)
+        re.compile(r"\b[a-z_]+[0-9a-f]{13}\d*\b"),
+    )
+
+    filename = "fingerprints.json"
+    description = "page fingerprints"
+
+    @classmethod
+    def fingerprint(cls, text: str, volatile: Iterable[str] = ()) -> str:
+        """Returns the fingerprint of a page.
+
+        Args:
+            text (str): content of the page.
+            volatile (Iterable[str], optional): other tokens to remove from the
+                page, like the sesskey. Defaults to ().
+
+        Returns:
+            str: fingerprint.
+        """
+
+        for token in volatile:
+            if token:
+                text = text.replace(token, "")
+        for pattern in cls.volatile_patterns:
+            text = pattern.sub("", text)
+
+        return sha1(text.encode()).hexdigest()
+
+    def get_links(self, id_, fingerprint: str) -> Optional[List[dict]]:
+        """Returns the links found the last time the page was parsed, if its
+        fingerprint didn't change.
+
+        Args:
+            id_ (str): subject's id.
+            fingerprint (str): current fingerprint of the page.
+
+        Returns:
+            Optional[List[dict]]: links of the page, or None if the page changed
+                or it wasn't parsed before.
+        """
+
+        with self._lock:
+            entry = self._entries.get(id_)
+            if not entry or entry.get("fingerprint") != fingerprint:
+                return None
+            return [dict(link) for link in entry["links"]]
+
+    def update(self, id_, fingerprint: str, links: List[dict]):
+        """Stores the fingerprint of a page and its links.
+
+        Args:
+            id_ (str): subject's id.
+            fingerprint (str): fingerprint of the page.
+            links (List[dict]): links found in the page.
+        """
+
+        entry = {"fingerprint": fingerprint, "links": links}
+        with self._lock:
+            if self._entries.get(id_) != entry:
+                self._entries[id_] = entry
+                self._modified = True
@@ -0,0 +1,134 @@
+"""Persistent store of the state of the forum discussions."""
+from hashlib import sha1
+import logging
+from typing import Optional
+
+from bs4 import Tag
+
+from vcm.settings import settings
+
+from .store import JsonStore
+
+logger = logging.getLogger(__name__)
+
+
+def get_discussion_signature(row: Optional[Tag]) -> Optional[str]:
+    """Returns the signature of a discussion of a forum list: the hash of its
+    number of replies and its last post (author, date and link).
+
+    Args:
+        row (Optional[Tag]): row of the discussion in the forum list (`tr`).
+
+    Returns:
+        Optional[str]: signature, or None if the row doesn't show the replies
+            nor the last post.
+    """
+
+    if row is None:
+        return None
+
+    replies = row.find("td", class_="replies")
+    last_post = row.find("td", class_="lastpost")
+    if replies is None and last_post is None:
+        return None
+
+    parts = []
+    for cell in (replies, last_post):
+        if cell is None:
+            parts.append("")
+            continue
+
+        links = [a.get("href", "") for a in cell.find_all("a")]
+        parts.append(" ".join(cell.get_text(" ", strip=True).split()))
+        parts.extend(links)
+
+    return sha1("\n".join(parts).encode()).hexdigest()
+
+
+class ForumIndex(JsonStore):
+    """Stores the signature of each forum discussion (see
+    `get_discussion_signature`) the last time it was downloaded, so the
+    discussions without new posts are not downloaded again.
+
+    Entries are keyed by the discussion's url. The signatures are only stored
+    by `commit()`, at the end of the execution, for the discussions whose
+    attachments were downloaded without errors.
+    """
+
+    filename = "forums.json"
+    description = "forum discussions"
+
+    def __init__(self):
+        super().__init__()
+        self.skipped = 0
+        self._pending = []
+
+    def is_unchanged(self, url: str, signature: Optional[str]) -> bool:
+        """Checks if a discussion didn't change since it was last downloaded.
+
+        Args:
+            url (str): url of the discussion.
+            signature (Optional[str]): current signature of the discussion.
+
+        Returns:
+            bool: True if the discussion can be skipped.
+        """
+
+        if not settings.incremental_forums or not signature:
+            return False
+
+        with self._lock:
+            unchanged = self._entries.get(url) == signature
+            if unchanged:
+                self.skipped += 1
+            return unchanged
+
+    def update(self, url: str, signature: Optional[str]):
+        """Stores the signature of a downloaded discussion.
+
+        Args:
+            url (str): url of the discussion.
+            signature (Optional[str]): signature of the discussion.
+        """
+
+        if not signature:
+            return
+
+        with self._lock:
+            if self._entries.get(url) != signature:
+                self._entries[url] = signature
+                self._modified = True
+
+    def add_pending(self, discussion):
+        """Registers a downloaded discussion, whose signature will be stored by
+        `commit()` if its attachments are downloaded too.
+
+        Args:
+            discussion (ForumDiscussion): discussion downloaded.
+        """
+
+        with self._lock:
+            self._pending.append(discussion)
+
+    def commit(self) -> int:
+        """Stores the signatures of the pending discussions that were downloaded
+        completely (see `BaseLink.is_complete`). The rest are discarded, so they
+        are downloaded again in the next execution.
+
+        Returns:
+            int: number of signatures stored.
+        """
+
+        with self._lock:
+            pending = self._pending
+            self._pending = []
+
+        stored = 0
+        for discussion in pending:
+            if discussion.is_complete:
+                self.update(discussion.url, discussion.signature)
+                stored += 1
+            else:
+                logger.debug("Discussion %r not completed", discussion.url)
+
+        return stored
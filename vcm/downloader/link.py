@@ -4,21 +4,41 @@ import logging
 import os
 from pathlib import Path
 import re
-import warnings
+from time import monotonic
+from urllib.parse import parse_qs, urlencode, urlparse, urlunparse
 
 from bs4 import BeautifulSoup
 from requests import Response
+from requests.exceptions import RequestException
 import unidecode
 
 from vcm.core.exceptions import AlgorithmFailureError, MoodleError, ResponseError
 from vcm.core.modules import Modules
 from vcm.core.networking import Connection
+from vcm.core.rate_limiter import RateLimiter
 from vcm.core.results import Results
-from vcm.core.utils import Patterns, save_crash_context, secure_filename
+from vcm.core.utils import (
+    Patterns,
+    parse_html,
+    save_crash_context,
+    secure_filename,
+)
 from vcm.settings import settings
 
+from .algorithms import HTML_ALGORITHMS, AlgorithmStats, html_algorithm
 from .alias import Alias
-from .filecache import REAL_FILE_CACHE
+from .content_types import (
+    UnknownContentTypes,
+    get_content_type_handler,
+    normalize_content_type,
+    register_content_type,
+)
+from .filecache import REAL_FILE_CACHE, file_digest, new_digest
+from .fingerprints import PageFingerprints
+from .forums import ForumIndex, get_discussion_signature
+from .partial import PartialDownload
+from .resolutions import ResolutionCache
+from .validators import ValidatorCache
 
 
 class _Notify:
@@ -32,6 +52,9 @@ class _Notify:
 class BaseLink(_Notify):
     """Base class for Links."""
 
+    checkpoint_interval = 16
+    lane = "html"
+
     def __init__(self, name, section, url, icon_url, subject, parent=None):
         """
         Args:
@@ -49,6 +72,11 @@ class BaseLink(_Notify):
         self.subject = subject
         self.connection = Connection()
         self.parent = parent
+        self.children = []
+        self.completed = False
+
+        if parent is not None:
+            parent.children.append(self)
 
         self.response: Response = None
         self.soup: BeautifulSoup = None
@@ -73,6 +101,26 @@ class BaseLink(_Notify):
 
         return unidecode.unidecode(self.response.headers["Content-Disposition"])
 
+    @property
+    def url_hash(self):
+        """Hash of the url, used to identify the link between executions."""
+        return sha1(self.url.encode()).hexdigest()
+
+    @property
+    def is_complete(self):
+        """True if the link and all the links it created were downloaded without
+        errors."""
+        return self.completed and all(x.is_complete for x in self.children)
+
+    @property
+    def not_modified(self):
+        """True if the server replied that the file didn't change since the last
+        download (conditional request)."""
+        if self.response is None:
+            raise RuntimeError("Response not made yet")
+
+        return self.response.status_code == 304
+
     def append_subfolder(self, dirname):
         dirname = secure_filename(dirname)
         return self.subfolders.append(dirname)
@@ -151,12 +199,34 @@ class BaseLink(_Notify):
         """Creates the subject's principal folder."""
         return self.subject.create_folder()
 
+    def get_validators(self):
+        """Returns the validators of the file downloaded in a previous execution,
+        only if the file still exists.
+
+        Returns:
+            Optional[dict]: validators of the file.
+        """
+
+        validators = ValidatorCache().get(self.url_hash)
+        if not validators:
+            return None
+
+        if Path(validators["filepath"]) not in REAL_FILE_CACHE:
+            return None
+
+        return validators
+
     def make_request(self):
         """Makes the request for the Link."""
 
         self.logger.debug("Making request")
 
-        self.response = self.connection.get(self.redirect_url or self.url)
+        self.response = self.connection.get(
+            self.redirect_url or self.url,
+            stream=True,
+            validators=self.get_validators(),
+            lane=self.lane,
+        )
 
         self.logger.debug(
             "Response obtained [%d | %s]", self.response.status_code, self.content_type
@@ -167,24 +237,27 @@ class BaseLink(_Notify):
 
         if self.response.status_code == 408:
             self.logger.warning("Received response with code 408, retrying")
+            # Release the connection and the concurrency slot of the response
+            self.response.close()
             return self.make_request()
 
         if not self.response.ok:
             raise ResponseError(f"Got HTTP {self.response.status_code}")
 
     def close_connection(self):
-        warnings.warn(
-            "Since streams are not used, this method should not be called",
-            DeprecationWarning,
-        )
+        """Releases the connection of the streamed response back to the pool."""
+        if self.response is None:
+            return
+
         self.logger.debug("Closing connection")
         self.response.close()
 
     def process_request_bs4(self):
-        """Parses the response with BeautifulSoup with the html parser."""
+        """Parses the response with the parser of the setting `html-parser`."""
 
         self.logger.debug("Parsing response (bs4)")
-        self.soup = BeautifulSoup(self.response.text, "html.parser")
+        RateLimiter().acquire_bytes(self.lane, len(self.response.content))
+        self.soup = parse_html(self.response.text)
         self.logger.debug("Response parsed (bs4)")
 
     def autoset_filepath(self):
@@ -218,9 +291,7 @@ class BaseLink(_Notify):
             folder_id = None
 
         self.filepath = Path(
-            Alias.id_to_alias(
-                sha1(self.url.encode()).hexdigest(), temp_filepath.as_posix(), folder_id
-            )
+            Alias.id_to_alias(self.url_hash, temp_filepath.as_posix(), folder_id)
         )
 
         self.logger.debug("Set filepath: %r", self.filepath.as_posix())
@@ -229,7 +300,9 @@ class BaseLink(_Notify):
         """Wrapper for self.do_download()."""
         try:
             self.do_download()
+            self.completed = True
         finally:
+            self.close_connection()
             self.response = None
             self.soup = None
 
@@ -239,10 +312,16 @@ class BaseLink(_Notify):
         raise NotImplementedError
 
     def get_header_length(self):
+        """Returns the length declared in the Content-Length header, or None if
+        the server didn't declare it (the body is never read to find it out)."""
+        return self._get_length_from_headers(self.response.headers)
+
+    @staticmethod
+    def _get_length_from_headers(headers):
         try:
-            return int(self.response.headers["Content-Length"])
-        except KeyError:
-            return len(self.response.content)
+            return int(headers["Content-Length"])
+        except (KeyError, ValueError):
+            return None
 
     @property
     def content_type(self):
@@ -251,8 +330,20 @@ class BaseLink(_Notify):
 
         return None
 
-    def save_response_content(self):
-        """Saves the response content to the disk."""
+    def save_response_content(self, stream=True):
+        """Saves the response content to the disk.
+
+        If the file is in the cache, the content is compared by its length and,
+        only if the lengths are equal, by its hash. The files whose response has
+        no validators (ETag, Last-Modified) can't be requested conditionally, so
+        they are not downloaded if the Content-Length header matches the length
+        in the cache (changes that keep the length are not detected).
+
+        Args:
+            stream (bool, optional): if True, the content is streamed to disk in
+                chunks (and can be resumed). If False, it's read at once, which is
+                faster for small files. Defaults to True.
+        """
         if self.filepath is None:
             self.autoset_filepath()
 
@@ -265,33 +356,60 @@ class BaseLink(_Notify):
             "filepath in REAL_FILE_CACHE: %s", self.filepath in REAL_FILE_CACHE
         )
 
+        header_length = self.get_header_length()
+        headers = self.response.headers
+        has_validators = "ETag" in headers or "Last-Modified" in headers
+        if (
+            not has_validators
+            and header_length is not None
+            and self.filepath in REAL_FILE_CACHE
+            and REAL_FILE_CACHE[self.filepath] == header_length
+        ):
+            self.logger.debug("File found in cache: Same length (%d)", header_length)
+            return
+
+        try:
+            if stream:
+                part_filepath, length, digest = self.stream_response_content()
+            else:
+                part_filepath, length, digest = self.buffer_response_content()
+        except PermissionError:
+            self.logger.warning(
+                "File couldn't be downloaded due to permission error: %s",
+                self.filepath.name,
+            )
+            self.logger.warning(
+                "Permission error %s -- %s", self.subject.name, self.filepath.name
+            )
+            return
+
         if self.filepath in REAL_FILE_CACHE:
-            if REAL_FILE_CACHE[self.filepath] == self.get_header_length():
-                self.logger.debug(
-                    "File found in cache: Same content (%d)", len(self.response.content)
+            if REAL_FILE_CACHE.is_same(self.filepath, length, digest):
+                self.logger.debug("File found in cache: Same content (%s)", digest)
+                part_filepath.unlink()
+                ValidatorCache().update(
+                    self.url_hash, self.response, self.filepath, length
                 )
                 return
 
             self.logger.debug(
-                "File found in cache: Different content (%d --> %d)",
+                "File found in cache: Different content (%d --> %d, %s)",
                 REAL_FILE_CACHE[self.filepath],
-                len(self.response.content),
+                length,
+                digest,
             )
             Results.print_updated(self.filepath)
         else:
-            self.logger.debug(
-                "File added to cache: %s [%d]",
-                self.filepath,
-                len(self.response.content),
-            )
-            REAL_FILE_CACHE[self.filepath] = len(self.response.content)
+            self.logger.debug("File added to cache: %s [%d]", self.filepath, length)
             Results.print_new(self.filepath)
 
         try:
-            with self.filepath.open("wb") as file_handler:
-                file_handler.write(self.response.content)
+            os.replace(part_filepath.as_posix(), self.filepath.as_posix())
+            REAL_FILE_CACHE.update(self.filepath, length, digest)
+            ValidatorCache().update(self.url_hash, self.response, self.filepath, length)
             self.logger.debug("File downloaded and saved: %s", self.filepath)
         except PermissionError:
+            part_filepath.unlink()
             self.logger.warning(
                 "File couldn't be downloaded due to permission error: %s",
                 self.filepath.name,
@@ -300,6 +418,151 @@ class BaseLink(_Notify):
                 "Permission error %s -- %s", self.subject.name, self.filepath.name
             )
 
+    def stream_response_content(self):
+        """Writes the response body to `<filepath>.part`, reading it from the
+        network in chunks of `settings.download_chunk_size` bytes, so the whole
+        body is never held in memory.
+
+        If a previous attempt left a `.part` file of the same content (same
+        validators), the download is resumed with a `Range` request. If the
+        transfer is interrupted, it is resumed up to `settings.retries` times. If
+        it still fails, the `.part` file is kept for the next execution.
+
+        Returns:
+            Tuple[Path, int, str]: path of the `.part` file, number of bytes
+                written and hash of the content (see `new_digest`).
+        """
+
+        partial = PartialDownload(self.filepath, self.redirect_url or self.url)
+        offset = partial.get_resume_offset(self.response)
+
+        if offset:
+            self.logger.info("Resuming download of %r from byte %d", self.name, offset)
+            self.request_range(partial, offset)
+
+        retries = settings.retries
+        while True:
+            try:
+                length, digest = self.write_part(partial, offset)
+                break
+            except RequestException as exc:
+                offset = partial.part_path.stat().st_size
+                partial.checkpoint(offset)
+                retries -= 1
+                self.logger.warning(
+                    "Download of %r interrupted at byte %d (%r), retries=%d",
+                    self.name,
+                    offset,
+                    exc,
+                    retries,
+                )
+                if retries <= 0:
+                    raise
+
+                self.response.close()
+                self.request_range(partial, offset)
+
+        partial.remove_sidecar()
+        self.logger.debug("Streamed %d bytes to %s", length, partial.part_path)
+        return partial.part_path, length, digest
+
+    def buffer_response_content(self):
+        """Reads the whole response body at once and writes it to
+        `<filepath>.part`. The download can't be resumed.
+
+        Returns:
+            Tuple[Path, int, str]: path of the `.part` file, number of bytes
+                written and hash of the content (see `new_digest`).
+        """
+
+        partial = PartialDownload(self.filepath, self.redirect_url or self.url)
+        partial.remove_sidecar()
+
+        content = self.response.content
+        RateLimiter().acquire_bytes(self.lane, len(content))
+        partial.part_path.write_bytes(content)
+
+        digest = new_digest()
+        digest.update(content)
+
+        self.logger.debug("Wrote %d bytes to %s", len(content), partial.part_path)
+        return partial.part_path, len(content), digest.hexdigest()
+
+    def request_range(self, partial: PartialDownload, offset: int):
+        """Requests the content of the link from `offset` onwards. The server may
+        send the whole content instead (if it changed or doesn't support ranges).
+
+        Args:
+            partial (PartialDownload): partial download to resume.
+            offset (int): number of bytes already downloaded.
+        """
+
+        self.response.close()
+        self.response = self.connection.get(
+            self.redirect_url or self.url,
+            stream=True,
+            headers=partial.get_range_headers(offset),
+            lane=self.lane,
+        )
+
+        if self.response.status_code not in (200, 206):
+            self.logger.debug(
+                "Range request replied with %d, restarting download",
+                self.response.status_code,
+            )
+            self.response.close()
+            self.response = self.connection.get(
+                self.redirect_url or self.url, stream=True, lane=self.lane
+            )
+
+    def write_part(self, partial: PartialDownload, offset: int):
+        """Writes the response body to the `.part` file, appending it if the
+        response is the partial content starting at `offset`. The sidecar is
+        updated every few chunks. The content is hashed while it's written
+        (the bytes already downloaded are read from the `.part` file).
+
+        Args:
+            partial (PartialDownload): partial download.
+            offset (int): number of bytes already downloaded.
+
+        Returns:
+            Tuple[int, str]: length of the `.part` file and hash of its content.
+        """
+
+        if not offset or self.response.status_code != 206:
+            offset = 0
+        elif partial.get_range_start(self.response) != offset:
+            self.logger.warning("Invalid Content-Range, restarting download")
+            self.response.close()
+            self.response = self.connection.get(
+                self.redirect_url or self.url, stream=True, lane=self.lane
+            )
+            offset = 0
+
+        if not offset:
+            partial.start(self.response)
+
+        if offset:
+            digest = file_digest(partial.part_path, offset)
+        else:
+            digest = new_digest()
+
+        rate_limiter = RateLimiter()
+        mode = "ab" if offset else "wb"
+        with partial.part_path.open(mode) as file_handler:
+            chunks = self.response.iter_content(settings.download_chunk_size)
+            for index, chunk in enumerate(chunks, 1):
+                file_handler.write(chunk)
+                digest.update(chunk)
+                offset += len(chunk)
+                rate_limiter.acquire_bytes(self.lane, len(chunk))
+
+                if index % self.checkpoint_interval == 0:
+                    file_handler.flush()
+                    partial.checkpoint(offset)
+
+        return offset, digest.hexdigest()
+
     @staticmethod
     def ensure_origin(url: str) -> bool:
         """Returns True if the origin is the virtual campus."""
@@ -310,10 +573,21 @@ class Resource(BaseLink):
     """Representation of a resource."""
 
     NOTIFY = True
+    lane = "files"
 
     def __init__(self, name, section, url, icon_url, subject, parent=None):
         super().__init__(name, section, url, icon_url, subject, parent)
         self.resource_type = "unknown"
+        self.resolved_from_cache = False
+        self.file_id = None
+
+    @property
+    def url_hash(self):
+        """Id of the file of the resource. If the file was saved by a previous
+        execution, maybe by the `Html` link of the resource's page, it's the id
+        it was saved under (see `ResolutionCache`), so the file keeps its alias
+        and validators when the resource's url is resolved in another way."""
+        return self.file_id or super().url_hash
 
     def set_resource_type(self, new):
         """Sets a new resource type.
@@ -327,118 +601,204 @@ class Resource(BaseLink):
         if self.resource_type == "html":
             self.process_request_bs4()
 
-    def do_download(self):
-        """Downloads the resource."""
-        self.logger.debug("Downloading resource %r", self.name)
+    @staticmethod
+    def should_probe(content_type):
+        """Checks if a file of type `content_type` must be probed before being
+        downloaded again (setting `probe-content-types`).
+
+        Args:
+            content_type (str): value of the Content-Type header.
+
+        Returns:
+            bool: True if the file must be probed.
+        """
+
+        if not content_type or not settings.probe_content_types:
+            return False
+
+        mimetype = normalize_content_type(content_type)
+        wildcard = mimetype.split("/")[0] + "/*"
+        return (
+            mimetype in settings.probe_content_types
+            or wildcard in settings.probe_content_types
+        )
+
+    def probe(self):
+        """Requests only the headers of the resource, using a HEAD request or, if
+        the server doesn't support it, a GET request of the first byte.
+
+        Returns:
+            Tuple[Response, Optional[int]]: response of the probe and length of the
+                resource (None if the server didn't declare it).
+        """
 
         url = self.redirect_url or self.url
-        if not self.ensure_origin(url):
-            self.logger.warning(
-                "Permision denied: URL is outside of campusvirtual.uva.es"
-            )
-            return
+        self.logger.debug("Probing resource %r", self.name)
 
-        self.make_request()
+        response = self.connection.head(url, allow_redirects=True, lane=self.lane)
+        if response.status_code not in (405, 501):
+            return response, self._get_length_from_headers(response.headers)
 
-        if self.response.status_code == 404:
-            self.logger.error("state code of 404 in url %r [%r]", self.url, self.name)
-            return None
+        self.logger.debug("HEAD not supported, using a GET range request")
+        response = self.connection.get(
+            url, stream=True, headers={"Range": "bytes=0-0"}, lane=self.lane
+        )
+        response.close()
 
-        if "application/pdf" in self.content_type:
-            self.set_resource_type("pdf")
-            return self.save_response_content()
+        if response.status_code == 206:
+            match = re.search(r"/(\d+)$", response.headers.get("Content-Range", ""))
+            return response, int(match.group(1)) if match else None
+        return response, self._get_length_from_headers(response.headers)
 
-        if "officedocument.wordprocessingml.document" in self.content_type:
-            self.set_resource_type("word")
-            return self.save_response_content()
+    def is_unchanged(self):
+        """Checks, without downloading its content, if the resource was already
+        downloaded and hasn't changed since. Only resources whose content type is
+        declared in `probe-content-types` are checked.
 
-        if (
-            "officedocument.spreadsheetml.sheet" in self.content_type
-            or "excel" in self.content_type
-        ):
-            self.set_resource_type("excel")
-            return self.save_response_content()
+        Returns:
+            bool: True if the resource was already downloaded and hasn't changed.
+        """
+
+        validators = self.get_validators()
+        if not validators or not self.should_probe(validators.get("content-type")):
+            return False
 
-        if "officedocument.presentationml.slideshow" in self.content_type:
-            self.set_resource_type("power-point")
-            return self.save_response_content()
+        response, length = self.probe()
+        if not response.ok:
+            return False
 
-        if "presentationml.presentation" in self.content_type:
-            self.set_resource_type("power-point")
-            return self.save_response_content()
+        filepath = Path(validators["filepath"])
+        if length is None or length != REAL_FILE_CACHE[filepath]:
+            return False
 
-        if "powerpoint" in self.content_type:
-            self.set_resource_type("power-point")
-            return self.save_response_content()
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return False
 
-        if "msword" in self.content_type:
-            self.set_resource_type("word")
-            return self.save_response_content()
+        same_etag = etag == validators.get("etag")
+        same_last_modified = last_modified == validators.get("last-modified")
+        return same_etag and same_last_modified
 
-        if "application/zip" in self.content_type:
-            self.set_resource_type("zip")
-            return self.save_response_content()
+    def handle_html(self):
+        """Handles a resource that is a web page, creating an `Html` link to find
+        the resource inside it."""
 
-        if "application/g-zip" in self.content_type:
-            self.set_resource_type("gzip")
-            return self.save_response_content()
+        self.logger.debug("Created Html from resource: %r, %s", self.name, self.url)
+        html = Html(
+            self.name, self.section, self.url, self.icon_url, self.subject, self
+        )
 
-        if "application/x-7z-compressed" in self.content_type:
-            self.set_resource_type("7zip")
-            return self.save_response_content()
+        # The page is already downloaded and parsed, don't request it again
+        html.response = self.response
+        html.soup = self.soup
+        self.subject.add_link(html)
 
-        if "x-rar-compressed" in self.content_type:
-            self.set_resource_type("rar")
-            return self.save_response_content()
+    def use_cached_resolution(self):
+        """Uses the id of the file and, if the resource's url wasn't resolved
+        yet, the file url found in a previous execution."""
 
-        if "text/plain" in self.content_type:
-            self.set_resource_type("plain")
-            return self.save_response_content()
+        if not self.file_id:
+            self.file_id = ResolutionCache().get_file_id(self.url)
 
-        if "application/json" in self.content_type:
-            self.set_resource_type("json")
-            return self.save_response_content()
+        if self.redirect_url:
+            return
 
-        if "application/octet-stream" in self.content_type:
-            self.set_resource_type("octect-stream")
-            return self.save_response_content()
+        resolution = ResolutionCache().get(self.url)
+        if not resolution:
+            return
 
-        if "image/jpeg" in self.content_type:
-            self.set_resource_type("jpeg")
-            return self.save_response_content()
+        self.logger.debug(
+            "Using cached resolution of %r (%s)", self.name, resolution["algorithm"]
+        )
+        self.redirect_url = resolution["url"]
+        self.resolved_from_cache = True
+        if resolution.get("name"):
+            self.name = resolution["name"]
 
-        if "image/png" in self.content_type:
-            self.set_resource_type("png")
-            return self.save_response_content()
+    def save_resolution(self):
+        """Stores the file url, and the id the file is saved under, if the
+        request of the resource's url was redirected to it or if the subject
+        resolved it (see `Subject.resolve_resources`)."""
 
-        if "video/mp4" in self.content_type:
-            self.set_resource_type("mp4")
-            return self.save_response_content()
+        if self.resolved_from_cache or not self.response.ok:
+            return
 
-        if "video/x-ms-wm" in self.content_type:
-            self.set_resource_type("avi")
-            return self.save_response_content()
+        if normalize_content_type(self.content_type) == "text/html":
+            return
 
-        if "text/html" in self.content_type:
-            self.set_resource_type("html")
+        if self.redirect_url:
+            file_url, algorithm = self.redirect_url, "contents"
+        elif self.response.history:
+            file_url, algorithm = self.response.url, "redirect"
+        else:
+            return
 
-            self.logger.debug(
-                "Created forum discussion from forum list: %r, %s",
-                self.name,
-                self.url,
-            )
-            self.subject.add_link(
-                Html(
-                    self.name, self.section, self.url, self.icon_url, self.subject, self
-                )
+        ResolutionCache().update(self.url, file_url, algorithm, file_id=self.url_hash)
+
+    def make_request(self):
+        """Makes the request for the resource. If the file url was found in a
+        previous execution (cached resolution or replayed link) and it doesn't
+        exist anymore (404), it is discarded and the resource's url is requested
+        instead."""
+
+        try:
+            return super().make_request()
+        except ResponseError:
+            if not self.resolved_from_cache or self.response.status_code != 404:
+                raise
+
+        self.logger.info("Cached resolution of %r is outdated", self.name)
+        ResolutionCache().discard(self.url)
+        # The subject's page must be parsed again to replace the replayed url
+        PageFingerprints().discard(self.subject.url_hash)
+        self.redirect_url = None
+        self.resolved_from_cache = False
+        self.response.close()
+        return super().make_request()
+
+    def do_download(self):
+        """Downloads the resource."""
+        self.logger.debug("Downloading resource %r", self.name)
+
+        self.use_cached_resolution()
+        url = self.redirect_url or self.url
+        if not self.ensure_origin(url):
+            self.logger.warning(
+                "Permision denied: URL is outside of campusvirtual.uva.es"
             )
             return
 
+        if self.is_unchanged():
+            self.logger.debug("Resource not modified (probe): %r", self.name)
+            return None
+
+        self.make_request()
+        self.save_resolution()
+
+        if self.not_modified:
+            self.logger.debug("Resource not modified: %r", self.name)
+            return None
+
+        if self.response.status_code == 404:
+            self.logger.error("state code of 404 in url %r [%r]", self.url, self.name)
+            return None
+
+        content_handler = get_content_type_handler(self.content_type)
+        if content_handler:
+            # Before setting the type, which parses the body of web pages
+            self.lane = content_handler.lane
+            self.set_resource_type(content_handler.resource_type)
+            if content_handler.handler:
+                return content_handler.handler(self)
+            return self.save_response_content(stream=content_handler.stream)
+
         if self.response.status_code % 300 < 100:
             self.url = self.response.headers["Location"]
             self.logger.warning("Redirecting to %r", self.url)
             return self.download()
 
+        UnknownContentTypes.record(self.content_type)
         self.logger.error(
             "Content not identified: %r (code=%s, header=%r)",
             self.url,
@@ -452,6 +812,7 @@ class Folder(BaseLink):
     """Representation of a folder."""
 
     NOTIFY = True
+    lane = "files"
 
     def __init__(self, name, section, url, icon_url, subject, id_, parent=None):
         super().__init__(name, section, url, icon_url, subject, parent)
@@ -462,7 +823,9 @@ class Folder(BaseLink):
         self.logger.debug("Making request")
 
         data = {"id": self.id, "sesskey": self.connection.sesskey}
-        self.response = self.connection.post(self.url, data=data)
+        self.response = self.connection.post(
+            self.url, data=data, stream=True, lane=self.lane
+        )
         self.logger.debug("Response obtained [%d]", self.response.status_code)
 
     def do_download(self):
@@ -483,21 +846,42 @@ class BaseForum(BaseLink):
 
 
 class ForumList(BaseForum):
+    def __init__(self, name, section, url, icon_url, subject, parent=None, page=None):
+        """
+        Args:
+            page (int, optional): page of the forum list. If None, this is the
+                first page, and the rest of the pages are queued. Defaults to None.
+        """
+
+        super().__init__(name, section, url, icon_url, subject, parent)
+        self.page = page
+
     def do_download(self):
-        self.logger.debug("Downloading forum list %r", self.name)
+        self.logger.debug("Downloading forum list %r (page=%s)", self.name, self.page)
         self.make_request()
         self.process_request_bs4()
 
-        themes = self.soup.findAll("td", {"class": "topic starter"})
+        if self.page is None:
+            self.queue_pages()
+
+        themes = self.soup.find_all("td", {"class": "topic starter"})
 
+        skipped = 0
         for theme in themes:
+            url = theme.a["href"]
+            signature = get_discussion_signature(theme.find_parent("tr"))
+            if ForumIndex().is_unchanged(url, signature):
+                skipped += 1
+                continue
+
             forum = ForumDiscussion(
                 theme.text,
                 self.section,
-                theme.a["href"],
+                url,
                 self.icon_url,
                 self.subject,
                 self,
+                signature=signature,
             )
 
             self.logger.debug(
@@ -507,14 +891,85 @@ class ForumList(BaseForum):
             )
             self.subject.add_link(forum)
 
+        self.logger.debug(
+            "Skipped %d/%d unchanged discussions of %r", skipped, len(themes), self.name
+        )
+
+    def get_last_page(self) -> int:
+        """Returns the number of the last page of the forum list (0-based), found
+        in the paging bar.
+
+        Returns:
+            int: last page (0 if the forum list has only one page).
+        """
+
+        last_page = 0
+        for link in self.soup.find_all("a", href=True):
+            if "/mod/forum/view.php" not in link["href"]:
+                continue
+
+            query = parse_qs(urlparse(link["href"]).query)
+            try:
+                last_page = max(last_page, int(query["page"][0]))
+            except (KeyError, ValueError):
+                continue
+
+        return last_page
+
+    def queue_pages(self):
+        """Queues the rest of the pages of the forum list, so they are downloaded
+        in parallel."""
+
+        last_page = self.get_last_page()
+        if not last_page:
+            return
+
+        self.logger.debug("Forum list %r has %d pages", self.name, last_page + 1)
+        parsed_url = urlparse(self.url)
+        query = parse_qs(parsed_url.query)
+
+        for page in range(1, last_page + 1):
+            query["page"] = [str(page)]
+            url = urlunparse(parsed_url._replace(query=urlencode(query, doseq=True)))
+            forum_list = ForumList(
+                self.name,
+                self.section,
+                url,
+                self.icon_url,
+                self.subject,
+                self,
+                page=page,
+            )
+            self.subject.add_link(forum_list)
+
 
 class ForumDiscussion(BaseForum):
     # NOTIFY = True
 
+    def __init__(
+        self, name, section, url, icon_url, subject, parent=None, signature=None
+    ):
+        """
+        Args:
+            signature (str, optional): signature of the discussion in the forum
+                list, stored once it and its attachments are downloaded.
+                Defaults to None.
+        """
+
+        super().__init__(name, section, url, icon_url, subject, parent)
+        self.signature = signature
+
     def do_download(self):
         self.logger.debug("Downloading forum discussion %r", self.name)
         self.make_request()
         self.process_request_bs4()
+        self.find_resources()
+
+        if Modules.current() == Modules.download:
+            ForumIndex().add_pending(self)
+
+    def find_resources(self):
+        """Creates the links of the attachments and images of the discussion."""
 
         attachments = self.soup.findAll("div", {"class": "attachments"})
         images = self.soup.findAll("div", {"class": "attachedimages"})
@@ -667,10 +1122,14 @@ class BlackBoard(BaseUndownloableLink):
 
 class Html(BaseLink):
     def do_download(self):
-        """Downloads the resources found in a html web page."""
+        """Downloads the resources found in a html web page. If the page was
+        already parsed by the resource that found it, it isn't requested again."""
         self.logger.debug("Downloading html %r", self.name)
-        self.make_request()
-        self.process_request_bs4()
+        if self.soup is None:
+            self.make_request()
+            self.process_request_bs4()
+        else:
+            self.logger.debug("Using the response of the parent resource")
 
         self.logger.debug("Parsing HTML (%r)", self.url)
 
@@ -686,26 +1145,47 @@ class Html(BaseLink):
         return self.try_algorithms(name)
 
     def try_algorithms(self, name):
-        # call actual algorithms
-        algorithms = [x for x in dir(self) if x.startswith("check_algorithm")]
-        algorithms = [getattr(self, x) for x in algorithms]
-        algorithms.sort(key=lambda x: x.__name__)
+        """Tries the registered algorithms to find the resource of the page, the
+        ones with the highest hit rate in the subject first.
+
+        Args:
+            name (str): name of the resource.
+
+        Raises:
+            AlgorithmFailureError: if no algorithm finds the resource.
+        """
+
+        stats = AlgorithmStats()
+        scope = self.subject.name
+        t0 = monotonic()
 
-        for algorithm in algorithms:
-            resource = algorithm(name)
+        for algorithm in stats.sort(scope, HTML_ALGORITHMS):
+            resource = getattr(self, algorithm)(name)
+            stats.record(scope, algorithm, bool(resource))
             if resource:
                 break
         else:
             # If not parsed:
-            return self.handle_algorithm_failure()
+            return self.handle_algorithm_failure(monotonic() - t0)
 
         # If everithing ok:
         self.logger.debug(
-            "Created resource from HTML: %r, %s", resource.name, resource.url
+            "Created resource from HTML (%s, %.3fs): %r, %s",
+            algorithm,
+            monotonic() - t0,
+            resource.name,
+            resource.url,
+        )
+        # The file keeps the id it was first saved under
+        resolutions = ResolutionCache()
+        resource.file_id = resolutions.get_file_id(self.url)
+        resolutions.update(
+            self.url, resource.url, algorithm, resource.name, resource.url_hash
         )
         self.subject.add_link(resource)
         return
 
+    @html_algorithm
     def check_algorithm_1(self, name):
         try:
             resource = self.soup.find("object", {"id": "resourceobject"})
@@ -716,6 +1196,7 @@ class Html(BaseLink):
         except AssertionError:
             return None
 
+    @html_algorithm
     def check_algorithm_2(self, name):
         try:
             resource = self.soup.find("iframe", {"id": "resourceobject"})
@@ -726,6 +1207,7 @@ class Html(BaseLink):
         except AssertionError:
             return None
 
+    @html_algorithm
     def check_algorithm_3(self, name):
         try:
             container = self.soup.find("div", {"class": "resourceworkaround"})
@@ -740,6 +1222,7 @@ class Html(BaseLink):
         except AttributeError:
             return None
 
+    @html_algorithm
     def check_algorithm_4(self, name):
         try:
             resource = self.soup.find("div", class_="resourcecontent resourceimg")
@@ -755,22 +1238,47 @@ class Html(BaseLink):
         except AssertionError:
             return None
 
-    def handle_algorithm_failure(self):
-        self.logger.error("HTML ALGORITHM FAILURE")
+    def handle_algorithm_failure(self, elapsed=0.0):
+        """Saves the crash context of a page where no algorithm found the
+        resource.
+
+        Args:
+            elapsed (float, optional): seconds spent trying the algorithms.
+                Defaults to 0.0.
 
+        Raises:
+            AlgorithmFailureError: always.
+        """
+
+        t0 = monotonic()
         save_crash_context(
             self.response,
             "html-algorithm-failure",
             "html algorithm failure",
         )
+        crash_context_time = monotonic() - t0
+
+        AlgorithmStats().record_failure(elapsed + crash_context_time)
+        self.logger.error(
+            "HTML ALGORITHM FAILURE: %r (algorithms %.3fs, crash context %.3fs)",
+            self.url,
+            elapsed,
+            crash_context_time,
+        )
 
         raise AlgorithmFailureError
 
 
 class Image(BaseLink):
+    lane = "files"
+
     def do_download(self):
         self.make_request()
 
+        if self.not_modified:
+            self.logger.debug("Image not modified: %r", self.name)
+            return None
+
         match = re.search(r"image/(\w+)", self.content_type)
         if not match:
             raise RuntimeError
@@ -779,3 +1287,6 @@ class Image(BaseLink):
         self.logger.debug("Identified image as %r", image_type)
         self.icon_url = "https://campusvirtual.uva.es/invalid/f/" + image_type
         return self.save_response_content()
+
+
+register_content_type("text/html", "html", lane="html", handler=Resource.handle_html)
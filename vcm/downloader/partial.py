@@ -0,0 +1,193 @@
+"""Partially downloaded files, used to resume interrupted downloads."""
+import json
+import logging
+from pathlib import Path
+import re
+from typing import Optional
+
+from requests import Response
+
+logger = logging.getLogger(__name__)
+
+
+class PartialDownload:
+    """Represents the `.part` file of a download, and its sidecar (`.part.json`).
+
+    The content is written to `<file>.part` and, every few chunks, the number of
+    bytes written (offset) and the validators of the response (ETag and
+    Last-Modified) are stored in `<file>.part.json`. If the download is
+    interrupted, the next attempt (in the same execution or in a later one) can
+    resume it with a `Range` request, guarded by `If-Range`, as long as the
+    server still reports the same validators.
+
+    Args:
+        filepath (Path): final path of the file.
+        url (str): url of the file.
+    """
+
+    part_suffix = ".part"
+    sidecar_suffix = ".part.json"
+
+    def __init__(self, filepath: Path, url: str):
+        self.filepath = filepath
+        self.url = url
+        self.part_path = filepath.with_name(filepath.name + self.part_suffix)
+        self.sidecar_path = filepath.with_name(filepath.name + self.sidecar_suffix)
+        self.etag = None
+        self.last_modified = None
+
+    @classmethod
+    def is_partial(cls, path: Path) -> bool:
+        """Checks if a path belongs to a partial download.
+
+        Args:
+            path (Path): path to check.
+
+        Returns:
+            bool: True if the path is a `.part` file or a sidecar.
+        """
+
+        return path.name.endswith((cls.part_suffix, cls.sidecar_suffix))
+
+    def load(self) -> Optional[dict]:
+        """Loads the sidecar of the partial download.
+
+        Returns:
+            Optional[dict]: sidecar data, or None if there is no sidecar or it is
+                invalid.
+        """
+
+        if not self.part_path.exists() or not self.sidecar_path.exists():
+            return None
+
+        try:
+            with self.sidecar_path.open(encoding="utf-8") as file_handler:
+                sidecar = json.load(file_handler)
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            logger.warning("Sidecar %s corrupted (%r)", self.sidecar_path, exc)
+            return None
+
+        if not isinstance(sidecar, dict) or sidecar.get("url") != self.url:
+            return None
+
+        if not isinstance(sidecar.get("offset"), int):
+            return None
+
+        return sidecar
+
+    def get_resume_offset(self, response: Response) -> int:
+        """Returns the offset from which the download can be resumed. It is only
+        possible if the validators of the response are the ones stored in the
+        sidecar, so the `.part` file holds the beginning of the same content.
+
+        Args:
+            response (Response): response of the initial request.
+
+        Returns:
+            int: number of bytes already downloaded (0 if the download can't be
+                resumed).
+        """
+
+        sidecar = self.load()
+        if not sidecar:
+            return 0
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return 0
+
+        if etag != sidecar.get("etag") or last_modified != sidecar.get(
+            "last-modified"
+        ):
+            logger.debug("Validators of %s changed, discarding it", self.part_path)
+            return 0
+
+        # Bytes after the last checkpoint may not have been written completely
+        offset = min(sidecar["offset"], self.part_path.stat().st_size)
+        with self.part_path.open("r+b") as file_handler:
+            file_handler.truncate(offset)
+
+        self.etag = etag
+        self.last_modified = last_modified
+        return offset
+
+    def get_range_headers(self, offset: int) -> dict:
+        """Returns the headers needed to resume the download from `offset`.
+
+        Args:
+            offset (int): number of bytes already downloaded.
+
+        Returns:
+            dict: `Range` header and, if there is a validator, `If-Range` header.
+        """
+
+        headers = {"Range": "bytes=%d-" % offset}
+
+        # Weak entity tags can't be used in If-Range
+        if self.etag and not self.etag.startswith("W/"):
+            headers["If-Range"] = self.etag
+        elif self.last_modified:
+            headers["If-Range"] = self.last_modified
+
+        return headers
+
+    @staticmethod
+    def get_range_start(response: Response) -> Optional[int]:
+        """Returns the first byte of a partial response (206).
+
+        Args:
+            response (Response): partial response.
+
+        Returns:
+            Optional[int]: first byte sent by the server, or None if the
+                Content-Range header is missing or invalid.
+        """
+
+        match = re.match(r"bytes (\d+)-", response.headers.get("Content-Range", ""))
+        return int(match.group(1)) if match else None
+
+    def start(self, response: Response):
+        """Starts the partial download from the beginning, storing the validators
+        of the response.
+
+        Args:
+            response (Response): response whose content will be written.
+        """
+
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.checkpoint(0)
+
+    def checkpoint(self, offset: int):
+        """Stores the offset in the sidecar. It must be called after flushing the
+        `.part` file. If the response has no validators, the download can't be
+        resumed and the sidecar is not written.
+
+        Args:
+            offset (int): number of bytes written in the `.part` file.
+        """
+
+        if not self.etag and not self.last_modified:
+            return self.remove_sidecar()
+
+        sidecar = {
+            "url": self.url,
+            "offset": offset,
+            "etag": self.etag,
+            "last-modified": self.last_modified,
+        }
+
+        with self.sidecar_path.open("wt", encoding="utf-8") as file_handler:
+            json.dump(sidecar, file_handler)
+
+    def remove_sidecar(self):
+        """Removes the sidecar, if it exists."""
+        if self.sidecar_path.exists():
+            self.sidecar_path.unlink()
+
+    def discard(self):
+        """Removes the `.part` file and the sidecar, if they exist."""
+        self.remove_sidecar()
+        if self.part_path.exists():
+            self.part_path.unlink()
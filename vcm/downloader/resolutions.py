@@ -0,0 +1,130 @@
+"""Persistent store of the file urls of the resources."""
+import logging
+from time import time
+from typing import Optional
+
+from vcm.settings import settings
+
+from .store import JsonStore
+
+logger = logging.getLogger(__name__)
+
+
+class ResolutionCache(JsonStore):
+    """Stores the url of the file of each resource, found following the
+    redirection of its `view.php` page or parsing it (`Html` algorithms), so the
+    next runs can request the file directly.
+
+    Entries are keyed by the resource's url (`view.php`), and expire after
+    `resolution-cache-ttl` seconds. Each entry also keeps the id the file of the
+    resource was first saved under (see `Resource.url_hash`): the resource's own
+    id, or the id of the link found in its page. The id is kept when the entry
+    expires or is discarded, so the file keeps its alias and validators however
+    its url is resolved.
+    """
+
+    filename = "resolutions.json"
+    description = "resolutions"
+
+    @property
+    def enabled(self) -> bool:
+        return settings.resolution_cache_ttl > 0
+
+    def get(self, url: str) -> Optional[dict]:
+        """Returns the resolution of a resource, if it hasn't expired.
+
+        Args:
+            url (str): url of the resource (`view.php`).
+
+        Returns:
+            Optional[dict]: `url` of the file, `algorithm` that found it,
+                `name` of the file (only if found by an algorithm) and
+                `timestamp`, or None if the url isn't resolved.
+        """
+
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry or not entry.get("url"):
+                return None
+
+            if time() - entry["timestamp"] > settings.resolution_cache_ttl:
+                return None
+
+            return dict(entry)
+
+    def get_file_id(self, url: str) -> Optional[str]:
+        """Returns the id the file of a resource was first saved under, even if
+        its resolution expired.
+
+        Args:
+            url (str): url of the resource (`view.php`).
+
+        Returns:
+            Optional[str]: id of the file, or None if it isn't known.
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+            return entry.get("id") if entry else None
+
+    def discard(self, url: str):
+        """Removes the resolution of a resource, keeping the id of its file.
+
+        Args:
+            url (str): url of the resource (`view.php`).
+        """
+
+        with self._lock:
+            entry = self._entries.get(url)
+            if not entry:
+                return
+
+            if entry.get("id"):
+                self._entries[url] = {"id": entry["id"]}
+            else:
+                del self._entries[url]
+            self._modified = True
+
+    def update(
+        self,
+        url: str,
+        file_url: str,
+        algorithm: str,
+        name: str = None,
+        file_id: str = None,
+    ):
+        """Stores the file url of a resource.
+
+        Args:
+            url (str): url of the resource (`view.php`).
+            file_url (str): url of the file.
+            algorithm (str): how the url was resolved (`redirect` or the name of
+                the `Html` algorithm).
+            name (str, optional): name of the file, if it was found in the
+                resource's page. Defaults to None.
+            file_id (str, optional): id the file is saved under. If the entry
+                already has one, it's kept. Defaults to None.
+        """
+
+        if not self.enabled or url == file_url:
+            return
+
+        entry = {
+            "url": file_url,
+            "algorithm": algorithm,
+            "name": name,
+            "timestamp": time(),
+            "id": file_id,
+        }
+
+        with self._lock:
+            old_entry = self._entries.get(url)
+            if old_entry and old_entry.get("id"):
+                entry["id"] = old_entry["id"]
+            self._entries[url] = entry
+            self._modified = True
+
+        logger.debug("Resolved %r -> %r (%s)", url, file_url, algorithm)
@@ -0,0 +1,96 @@
+"""Base class of the JSON stores of the root folder."""
+import json
+import logging
+import os
+from pathlib import Path
+from threading import Lock
+
+from vcm.core.utils import MetaSingleton
+from vcm.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JsonStore(metaclass=MetaSingleton):
+    """Dictionary persisted as a JSON file of the root folder.
+
+    The store is loaded when it's created, and written to disk only when
+    `save()` is called and its entries were modified. The entries are written
+    to a temporary file that then replaces the file, so an interrupted save
+    never leaves it half written. A corrupted or invalid file is discarded: the
+    stores only hold information that can be rebuilt (at the cost of requesting
+    or parsing it again).
+
+    Subclasses set `filename` and `description` (used in the log messages),
+    and add the methods of their schema, always holding `_lock` to access
+    `_entries` and setting `_modified` when they change them.
+    """
+
+    filename: str = None
+    description: str = None
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = Lock()
+        self._modified = False
+        self.load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    @property
+    def path(self) -> Path:
+        return settings.root_folder / self.filename
+
+    def load(self):
+        """Loads the entries from disk, discarding the file if it's corrupted."""
+
+        if not self.path.exists():
+            self._entries = {}
+            return
+
+        try:
+            with self.path.open(encoding="utf-8") as file_handler:
+                self._entries = json.load(file_handler)
+        except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+            logger.warning(
+                "%s file corrupted (%r), discarding it",
+                self.description.capitalize(),
+                exc,
+            )
+            self._entries = {}
+
+        if not isinstance(self._entries, dict):
+            logger.warning(
+                "%s file invalid, discarding it", self.description.capitalize()
+            )
+            self._entries = {}
+
+    def save(self):
+        """Saves the entries to disk, if they were modified."""
+
+        with self._lock:
+            if not self._modified:
+                return
+
+            temp_path = self.path.with_name(self.filename + ".tmp")
+            with temp_path.open("wt", encoding="utf-8") as file_handler:
+                json.dump(self._entries, file_handler, ensure_ascii=False)
+            os.replace(temp_path.as_posix(), self.path.as_posix())
+
+            self._modified = False
+            logger.debug("Saved %d %s", len(self._entries), self.description)
+
+    def discard(self, key):
+        """Removes an entry, if it exists.
+
+        Args:
+            key (str): key of the entry.
+        """
+
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._modified = True
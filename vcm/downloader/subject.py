@@ -2,17 +2,22 @@
 from hashlib import sha1
 import logging
 import os
+import re
 from threading import Lock
+from typing import List, Tuple
 from urllib.parse import parse_qs, urlparse
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from requests import Response
 
-from vcm.core.networking import Connection
-from vcm.core.utils import secure_filename
+from vcm.core.exceptions import WebServiceError
+from vcm.core.networking import AjaxBatcher, Connection
+from vcm.core.utils import parse_html, secure_filename
+from vcm.core.webservice import WebService
 from vcm.settings import settings
 
 from .alias import Alias
+from .fingerprints import PageFingerprints
 from .link import (
     BaseLink,
     BlackBoard,
@@ -27,10 +32,51 @@ from .link import (
     Url,
 )
 
+# Link classes of the modules found by the web service, by module name
+MODULE_LINKS = {
+    "assign": Delivery,
+    "chat": Chat,
+    "collaborate": BlackBoard,
+    "forum": ForumList,
+    "kalvidres": Kalvidres,
+    "page": Page,
+    "quiz": Quiz,
+    "url": Url,
+}
+
+
+# Link classes that can be created again from the page fingerprints
+LINK_CLASSES = {
+    cls.__name__: cls
+    for cls in (
+        BlackBoard,
+        Chat,
+        Delivery,
+        Folder,
+        ForumList,
+        Kalvidres,
+        Page,
+        Quiz,
+        Resource,
+        Url,
+    )
+}
+
+# Classes of the div elements of the course page needed to find the links
+COURSE_DIV_CLASSES = ("activityinstance", "singlebutton", "mod-indent")
+
 
 class Subject:
     """Representation of a subject."""
 
+    # Only the sections of the course page are parsed
+    parse_only = SoupStrainer("li", class_=re.compile(r"\bsection\b"))
+
+    # Calls to the AJAX service, shared by all the subjects
+    ajax_batcher: AjaxBatcher = None
+    ajax_lock = Lock()
+    ajax_allowed = True
+
     def __init__(self, name, url, queue):
         """
 
@@ -73,13 +119,25 @@ class Subject:
     def __str__(self):
         return f"{self.name}"
 
+    @property
+    def course_id(self) -> int:
+        """Id of the subject's course."""
+        return int(self.url_to_query_args(self.url)["id"][0])
+
+    @property
+    def url_hash(self):
+        """Hash of the url, used to identify the subject between executions."""
+        return sha1(self.url.encode()).hexdigest()
+
     def make_request(self):
         """Makes the primary request."""
         self.logger.debug("Making subject request")
         self.response = self.connection.get(self.url)
-        self.soup = BeautifulSoup(self.response.text, "html.parser")
-
         self.logger.debug("Response obtained [%d]", self.response.status_code)
+
+    def parse_response(self):
+        """Parses the primary response."""
+        self.soup = parse_html(self.response.text, parse_only=self.parse_only)
         self.logger.debug("Response parsed")
 
     def create_folder(self):
@@ -103,105 +161,443 @@ class Subject:
         self.notes_links.append(link)
         self.queue.put(link)
 
-    @staticmethod
-    def find_section_by_child(child):
-        try:
-            section_h3 = child.find_parent("li", class_="section main clearfix").find(
-                "h3", class_="sectionname"
-            )
-        except AttributeError:
-            section_h3 = child.find_parent(
-                "li", class_="section main clearfix current"
-            ).find("h3", class_="sectionname")
-        return Section(section_h3.text, section_h3.a["href"])
-
     @staticmethod
     def url_to_query_args(url: str):
         return parse_qs(urlparse(url).query)
 
     def find_and_download_links(self):
-        """Finds the links downloading the primary page."""
-        self.logger.debug("Finding links of %s", self.name)
-        self.make_request()
+        """Finds the links of the subject using the backend set in the setting
+        `discovery-backend`."""
+        if settings.discovery_backend == "webservice":
+            return self.find_links_webservice()
+        return self.find_links_html()
+
+    def find_links_webservice(self):
+        """Finds the links using Moodle's web service. A single request returns
+        all the sections and modules, with the urls of their files."""
+        self.logger.debug("Finding links of %s (web service)", self.name)
+        sections = WebService().get_course_contents(self.course_id)
+
+        for section_data in sections:
+            section_url = f"{self.url}#section-{section_data['section']}"
+            section = Section(section_data["name"], section_url)
+
+            for module in section_data.get("modules", []):
+                if not module.get("uservisible", True):
+                    continue
+
+                link = self.module_to_link(module, section)
+                if link:
+                    self.add_link(link)
 
-        _ = [x.extract() for x in self.soup.findAll("span", {"class": "accesshide"})]
-        _ = [x.extract() for x in self.soup.findAll("div", {"class": "mod-indent"})]
+        self.logger.debug("Downloading files for subject %r", self.name)
 
-        for folder in self.soup.find_all("div", class_="singlebutton"):
-            folder_name = folder.parent.parent.div.find(
-                "span", class_="fp-filename"
-            ).text
+    def module_to_link(self, module: dict, section: "Section"):
+        """Creates the link of a module returned by the web service.
 
-            section = self.find_section_by_child(folder)
+        Args:
+            module (dict): module returned by `core_course_get_contents`.
+            section (Section): section of the module.
 
-            folder_url = folder.form["action"]
-            folder_icon_url = folder.find_parent(
-                "div", class_="contentwithoutlink"
-            ).find("img", class_="icon")["src"]
-            id_ = folder.form.find("input", {"name": "id"})["value"]
+        Returns:
+            Optional[BaseLink]: link of the module, or None if the module can't
+                be downloaded.
+        """
 
+        modname = module["modname"]
+        name = module["name"]
+        url = module.get("url")
+        icon_url = module.get("modicon")
+
+        if modname == "resource":
+            link = Resource(name, section, url, icon_url, self)
+            # Skip the view.php redirection
+            link.redirect_url = self.get_module_file_url(module)
+            self.logger.debug("Created Resource (web service): %r, %s", name, url)
+            return link
+
+        if modname == "folder":
+            real_url = "https://campusvirtual.uva.es/mod/folder/download_folder.php"
+            id_ = str(module["id"])
+            self.logger.debug("Created Folder (web service): %r, id=%r", name, id_)
+            return Folder(name, section, real_url, icon_url, self, id_)
+
+        if modname in MODULE_LINKS:
+            link_class = MODULE_LINKS[modname]
             self.logger.debug(
-                "Created Folder (subject search): %r, %s", folder_name, folder_url
-            )
-            self.add_link(
-                Folder(folder_name, section, folder_url, folder_icon_url, self, id_)
+                "Created %s (web service): %r, %s", link_class.__name__, name, url
             )
+            return link_class(name, section, url, icon_url, self)
+
+        return None
+
+    @staticmethod
+    def get_module_file_url(module: dict):
+        """Returns the url of the main file of a module returned by the web
+        service (`core_course_get_contents`).
+
+        Args:
+            module (dict): module returned by the web service.
+
+        Returns:
+            Optional[str]: url of the file, or None if the module has no files.
+        """
 
-        for resource in self.soup.find_all("div", class_="activityinstance"):
-            if not resource.a:
+        for content in module.get("contents", []):
+            if content.get("type") == "file":
+                return WebService.to_pluginfile_url(content["fileurl"])
+        return None
+
+    @staticmethod
+    def is_course_element(tag: Tag) -> bool:
+        """Checks if a tag of the course page is needed to find the links: a
+        section, its header, a folder button, an activity or a hidden element.
+
+        Args:
+            tag (Tag): tag to check.
+
+        Returns:
+            bool: True if the tag is needed.
+        """
+
+        classes = tag.get("class") or ()
+        if tag.name == "div":
+            return any(x in COURSE_DIV_CLASSES for x in classes)
+        if tag.name == "span":
+            return "accesshide" in classes
+        if tag.name == "h3":
+            return "sectionname" in classes
+        if tag.name == "li":
+            return "section" in classes and "main" in classes
+        return False
+
+    @classmethod
+    def index_sections(cls, soup: BeautifulSoup) -> List[Tuple[Tag, List[Tag]]]:
+        """Indexes the course page in a single traversal. Each section is mapped
+        to its folder buttons (`div.singlebutton`) and activities
+        (`div.activityinstance`), in document order. The hidden elements
+        (`span.accesshide` and `div.mod-indent`) are removed from the page.
+
+        Args:
+            soup (BeautifulSoup): course page.
+
+        Returns:
+            List[Tuple[Tag, List[Tag]]]: header (`h3.sectionname`) and elements of
+                each section.
+        """
+
+        index = []
+        hidden = []
+        header = None
+        elements = None
+
+        for tag in soup.find_all(cls.is_course_element):
+            if tag.name == "li":
+                if elements:
+                    index.append((header, elements))
+                header = None
+                elements = []
+            elif tag.name == "span" or "mod-indent" in tag["class"]:
+                hidden.append(tag)
+            elif tag.name == "h3":
+                header = tag if header is None else header
+            elif elements is not None:
+                elements.append(tag)
+
+        if elements:
+            index.append((header, elements))
+
+        for tag in hidden:
+            tag.extract()
+
+        return index
+
+    def find_links_html(self):
+        """Finds the links downloading the primary page. If the page didn't
+        change since the last execution, the links found then are created again
+        instead of parsing it."""
+        self.logger.debug("Finding links of %s", self.name)
+        self.make_request()
+
+        fingerprint = PageFingerprints.fingerprint(
+            self.response.text, volatile=[self.connection.sesskey]
+        )
+        if self.replay_links(fingerprint):
+            self.logger.debug("Downloading files for subject %r", self.name)
+            return
+
+        self.parse_response()
+
+        # Links are stored before add_link, which may remove their section
+        records = []
+        resources = []
+        for header, elements in self.index_sections(self.soup):
+            if header is None:
+                self.logger.warning("Section without name in %r, skipping", self.name)
                 continue
 
-            section = self.find_section_by_child(resource)
-
-            name = resource.a.span.text
-            url = resource.a["href"]
-            icon_url = resource.a.img["src"]
-
-            if "resource" in url:
-                self.logger.debug(
-                    "Created Resource (subject search): %r, %s", name, url
-                )
-                self.add_link(Resource(name, section, url, icon_url, self))
-            elif "folder" in url:
-                real_url = "https://campusvirtual.uva.es/mod/folder/download_folder.php"
-                id_ = self.url_to_query_args(url)["id"][0]
-                self.logger.debug(
-                    "Created Folder (subject search): %r, id=%r", name, id_
-                )
-                self.add_link(Folder(name, section, real_url, icon_url, self, id_))
-            elif "forum" in url:
-                self.logger.debug("Created Forum (subject search): %r, %s", name, url)
-                self.add_link(ForumList(name, section, url, icon_url, self))
-            elif "chat" in url:
-                self.logger.debug("Created Chat (subject search): %r, %s", name, url)
-                self.add_link(Chat(name, section, url, icon_url, self))
-            elif "page" in url:
-                self.logger.debug("Created Page (subject search): %r, %s", name, url)
-                self.add_link(Page(name, section, url, icon_url, self))
-            elif "url" in url:
-                self.logger.debug("Created Page (subject search): %r, %s", name, url)
-                self.add_link(Url(name, section, url, icon_url, self))
-            elif "assign" in url:
-                self.logger.debug(
-                    "Created Delivery (subject search): %r, %s", name, url
-                )
-                self.add_link(Delivery(name, section, url, icon_url, self))
-            elif "kalvidres" in url:
-                self.logger.debug(
-                    "Created Kalvidres (subject search): %r, %s", name, url
-                )
-                self.add_link(Kalvidres(name, section, url, icon_url, self))
-            elif "quiz" in url:
-                self.logger.debug("Created Quiz (subject search): %r, %s", name, url)
-                self.add_link(Quiz(name, section, url, icon_url, self))
-            elif "collaborate" in url:
-                self.logger.debug(
-                    "Created Blackboard (subject search): %r, %s", name, url
-                )
-                self.add_link(BlackBoard(name, section, url, icon_url, self))
+            section = Section(header.text, header.a["href"])
+            for element in elements:
+                if "singlebutton" in element["class"]:
+                    link = self.create_folder_link(element, section)
+                else:
+                    link = self.create_activity_link(element, section)
+
+                if isinstance(link, Resource):
+                    resources.append(link)
+                elif link:
+                    records.append(self.link_to_dict(link))
+                    self.add_link(link)
+
+        self.resolve_resources(resources)
+        for resource in resources:
+            records.append(self.link_to_dict(resource))
+            self.add_link(resource)
+
+        if self.response.ok:
+            PageFingerprints().update(self.url_hash, fingerprint, records)
 
         self.logger.debug("Downloading files for subject %r", self.name)
 
+    def replay_links(self, fingerprint: str) -> bool:
+        """Creates the links found the last time the page was parsed, if its
+        fingerprint didn't change. The links are queued as usual, so each one
+        checks its own content.
+
+        Args:
+            fingerprint (str): fingerprint of the current page.
+
+        Returns:
+            bool: True if the links were created, False if the page must be
+                parsed.
+        """
+
+        links = PageFingerprints().get_links(self.url_hash, fingerprint)
+        if links is None:
+            return False
+
+        try:
+            links = [self.dict_to_link(link) for link in links]
+        except (KeyError, TypeError, ValueError) as exc:
+            self.logger.warning("Invalid fingerprint of %r (%r)", self.name, exc)
+            PageFingerprints().discard(self.url_hash)
+            return False
+
+        self.logger.debug(
+            "Page of %r unchanged, replaying %d links", self.name, len(links)
+        )
+        for link in links:
+            self.add_link(link)
+        return True
+
+    @staticmethod
+    def link_to_dict(link: BaseLink) -> dict:
+        """Converts a link of the subject's page into a dict, to store it.
+
+        Args:
+            link (BaseLink): link to convert.
+
+        Returns:
+            dict: type, name, section, url, icon url, folder id and redirect url
+                of the link.
+        """
+
+        section = link.section
+        return {
+            "type": type(link).__name__,
+            "name": link.name,
+            "section": [section.name, section.url] if section else None,
+            "url": link.url,
+            "icon_url": link.icon_url,
+            "id": getattr(link, "id", None),
+            "redirect_url": link.redirect_url,
+        }
+
+    def dict_to_link(self, data: dict) -> BaseLink:
+        """Creates a link of the subject's page from a dict created by
+        `link_to_dict`.
+
+        Args:
+            data (dict): data of the link.
+
+        Raises:
+            ValueError: if the type of the link is not valid.
+
+        Returns:
+            BaseLink: link.
+        """
+
+        link_class = LINK_CLASSES.get(data["type"])
+        if link_class is None:
+            raise ValueError(f"Invalid link type: {data['type']!r}")
+
+        section = Section(*data["section"]) if data["section"] else None
+        args = [data["name"], section, data["url"], data["icon_url"], self]
+        if link_class is Folder:
+            args.append(data["id"])
+
+        link = link_class(*args)
+        link.redirect_url = data["redirect_url"]
+        if isinstance(link, Resource) and link.redirect_url:
+            # The file url may be outdated, it's checked like a cached resolution
+            link.resolved_from_cache = True
+        return link
+
+    def create_folder_link(self, folder: Tag, section: "Section") -> Folder:
+        """Creates the link of a folder displayed inline in the course page.
+
+        Args:
+            folder (Tag): download button of the folder (`div.singlebutton`).
+            section (Section): section of the folder.
+
+        Returns:
+            Folder: link of the folder.
+        """
+
+        folder_name = folder.parent.parent.div.find("span", class_="fp-filename").text
+
+        folder_url = folder.form["action"]
+        folder_icon_url = folder.find_parent("div", class_="contentwithoutlink").find(
+            "img", class_="icon"
+        )["src"]
+        id_ = folder.form.find("input", {"name": "id"})["value"]
+
+        self.logger.debug(
+            "Created Folder (subject search): %r, %s", folder_name, folder_url
+        )
+        return Folder(folder_name, section, folder_url, folder_icon_url, self, id_)
+
+    def create_activity_link(self, activity: Tag, section: "Section"):
+        """Creates the link of an activity of the course page.
+
+        Args:
+            activity (Tag): activity (`div.activityinstance`).
+            section (Section): section of the activity.
+
+        Returns:
+            Optional[BaseLink]: link of the activity, or None if the activity
+                can't be downloaded.
+        """
+
+        if not activity.a:
+            return None
+
+        name = activity.a.span.text
+        url = activity.a["href"]
+        icon_url = activity.a.img["src"]
+
+        if "resource" in url:
+            self.logger.debug("Created Resource (subject search): %r, %s", name, url)
+            return Resource(name, section, url, icon_url, self)
+        if "folder" in url:
+            real_url = "https://campusvirtual.uva.es/mod/folder/download_folder.php"
+            id_ = self.url_to_query_args(url)["id"][0]
+            self.logger.debug("Created Folder (subject search): %r, id=%r", name, id_)
+            return Folder(name, section, real_url, icon_url, self, id_)
+        if "forum" in url:
+            self.logger.debug("Created Forum (subject search): %r, %s", name, url)
+            return ForumList(name, section, url, icon_url, self)
+        if "chat" in url:
+            self.logger.debug("Created Chat (subject search): %r, %s", name, url)
+            return Chat(name, section, url, icon_url, self)
+        if "page" in url:
+            self.logger.debug("Created Page (subject search): %r, %s", name, url)
+            return Page(name, section, url, icon_url, self)
+        if "url" in url:
+            self.logger.debug("Created Page (subject search): %r, %s", name, url)
+            return Url(name, section, url, icon_url, self)
+        if "assign" in url:
+            self.logger.debug("Created Delivery (subject search): %r, %s", name, url)
+            return Delivery(name, section, url, icon_url, self)
+        if "kalvidres" in url:
+            self.logger.debug("Created Kalvidres (subject search): %r, %s", name, url)
+            return Kalvidres(name, section, url, icon_url, self)
+        if "quiz" in url:
+            self.logger.debug("Created Quiz (subject search): %r, %s", name, url)
+            return Quiz(name, section, url, icon_url, self)
+        if "collaborate" in url:
+            self.logger.debug("Created Blackboard (subject search): %r, %s", name, url)
+            return BlackBoard(name, section, url, icon_url, self)
+        return None
+
+    @classmethod
+    def get_ajax_batcher(cls) -> AjaxBatcher:
+        """Returns the AJAX batcher shared by all the subjects, so the calls of
+        the subjects parsed at the same time are sent in the same request."""
+
+        with cls.ajax_lock:
+            if cls.ajax_batcher is None:
+                cls.ajax_batcher = AjaxBatcher()
+            return cls.ajax_batcher
+
+    def get_course_contents(self) -> List[dict]:
+        """Returns the sections of the course, with their modules and files
+        (`core_course_get_contents`). The function is called through the AJAX
+        service if the site allows it. Otherwise (it isn't AJAX-enabled in the
+        default services of Moodle), the REST web service is used for the rest
+        of the execution.
+
+        Raises:
+            WebServiceError: if the web service fails.
+
+        Returns:
+            List[dict]: sections of the course.
+        """
+
+        cls = type(self)
+        if cls.ajax_allowed:
+            batcher = cls.get_ajax_batcher()
+            args = {"courseid": self.course_id}
+            try:
+                return batcher.submit("core_course_get_contents", args).result()
+            except WebServiceError as exc:
+                if cls.ajax_allowed:
+                    cls.ajax_allowed = False
+                    self.logger.info(
+                        "Can't get the course contents through AJAX (%s), "
+                        "using the web service",
+                        exc,
+                    )
+
+        return WebService().get_course_contents(self.course_id)
+
+    def resolve_resources(self, resources: List[Resource]):
+        """Finds the file urls of the resources with a single call that returns
+        all the modules of the course (see `get_course_contents`), so the
+        `view.php` page of each resource isn't requested. It is only done if the
+        setting `ajax-batch-size` is set. If the url of a resource can't be
+        resolved, it will be found through `view.php`.
+
+        Args:
+            resources (List[Resource]): resources of the subject.
+        """
+
+        if not settings.ajax_batch_size or not resources:
+            return
+
+        try:
+            sections = self.get_course_contents()
+        except WebServiceError as exc:
+            self.logger.debug("Can't resolve resources of %r: %s", self.name, exc)
+            return
+
+        file_urls = {}
+        for section in sections:
+            for module in section.get("modules", []):
+                file_urls[module.get("id")] = self.get_module_file_url(module)
+
+        resolved = 0
+        for resource in resources:
+            cmid = int(self.url_to_query_args(resource.url)["id"][0])
+            file_url = file_urls.get(cmid)
+            if file_url:
+                resource.redirect_url = file_url
+                resolved += 1
+
+        self.logger.debug(
+            "Resolved %d/%d resources of %r", resolved, len(resources), self.name
+        )
+
 
 class Section:
     def __init__(self, name, url=None):
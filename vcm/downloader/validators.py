@@ -0,0 +1,61 @@
+"""Persistent store of the HTTP validators of the downloaded files."""
+from typing import Optional
+
+from requests import Response
+
+from .store import JsonStore
+
+
+class ValidatorCache(JsonStore):
+    """Stores the ETag and Last-Modified headers of each downloaded file, so
+    the next runs can make conditional requests (If-None-Match,
+    If-Modified-Since) instead of downloading unchanged files again.
+
+    Entries are keyed by the hash of the link's url (the same one used by
+    `Alias`).
+    """
+
+    filename = "validators.json"
+    description = "validators"
+
+    def get(self, id_) -> Optional[dict]:
+        """Returns the validators of the file given the link's id.
+
+        Args:
+            id_ (str): link's id.
+
+        Returns:
+            Optional[dict]: validators (`etag`, `last-modified`), `content-type`,
+                `length` and `filepath` of the file, or None if there are no
+                validators stored.
+        """
+
+        with self._lock:
+            entry = self._entries.get(id_)
+            return dict(entry) if entry else None
+
+    def update(self, id_, response: Response, filepath, length):
+        """Stores the validators sent by the server for a file.
+
+        Args:
+            id_ (str): link's id.
+            response (Response): response of the file's request.
+            filepath (Path): path where the file was saved.
+            length (int): length of the file.
+        """
+
+        entry = {
+            "etag": response.headers.get("ETag"),
+            "last-modified": response.headers.get("Last-Modified"),
+            "content-type": response.headers.get("Content-Type"),
+            "length": length,
+            "filepath": filepath.as_posix(),
+        }
+
+        if not entry["etag"] and not entry["last-modified"]:
+            return self.discard(id_)
+
+        with self._lock:
+            if self._entries.get(id_) != entry:
+                self._entries[id_] = entry
+                self._modified = True
@@ -13,6 +13,7 @@ from .core.utils import (
     setup_vcm,
 )
 from .downloader import download
+from .downloader.filecache import REAL_FILE_CACHE
 from .notifier import notify
 from .settings import (
     CheckSettings,
@@ -102,6 +103,13 @@ def discover():
     return download(nthreads=1, killer=False, status_server=False, discover_only=True)
 
 
+@main.command("rescan")
+def rescan():
+    """Scan all the files of the root folder again"""
+    files = REAL_FILE_CACHE.rescan()
+    click.echo("Scanned %d files" % files)
+
+
 @main.group("settings")
 def settings_command():
     """Manage settings"""
@@ -3,11 +3,13 @@ import logging
 from queue import Queue
 from typing import List, Union
 
-from vcm.core.networking import Connection
+from vcm.core.concurrency import ConcurrencyLimiter
+from vcm.core.networking import Connection, RetryBudget
+from vcm.core.rate_limiter import RateLimiter
 from vcm.core.status_server import runserver
 from vcm.core.utils import Printer, timing
 from vcm.core.workers import start_workers
-from vcm.downloader import find_subjects
+from vcm.downloader import find_subjects, finish_execution
 
 from .report import send_report
 
@@ -40,12 +42,20 @@ def notify(send_to: _A, use_icons=True, nthreads=20, status_server=False):
     Printer.silence()
 
     queue = Queue()
+    connection = Connection()
+    connection.set_pool_size(nthreads)
+    RetryBudget.reset()
+    RateLimiter().configure()
+    ConcurrencyLimiter().configure(nthreads)
     threads = start_workers(queue, nthreads, killer=False)
 
     if status_server:
         runserver(queue, threads)
 
-    with Connection():
-        subjects = find_subjects(queue)
-        queue.join()
-        send_report(subjects, use_icons, send_to)
+    try:
+        with connection:
+            subjects = find_subjects(queue)
+            queue.join()
+            send_report(subjects, use_icons, send_to)
+    finally:
+        finish_execution(connection)
@@ -147,6 +147,7 @@ class Settings(dict, metaclass=MetaSingleton):
 
     credentials_path = settings_folder.joinpath(_preffix + "vcm-credentials.yaml")
     settings_path = settings_folder.joinpath(_preffix + "vcm-settings.yaml")
+    session_path = settings_folder.joinpath(_preffix + "vcm-session.json")
     config = {}
 
     @classmethod
@@ -194,17 +195,50 @@ class Settings(dict, metaclass=MetaSingleton):
 
         raise ValueError(f"Invalid logging-level: {value!r}")
 
+    def probe_content_types_setter(*args) -> List[str]:
+        """Setter for probe-content-types.
+
+        Args:
+            value (str): comma separated list of content types.
+
+        Returns:
+            List[str]: parsed list of content types.
+        """
+
+        value = str(args[0])
+        return sorted({x.strip().lower() for x in value.split(",") if x.strip()})
+
     transforms = {
+        "adaptive-concurrency": str2bool,
+        "ajax-batch-size": int,
+        "ajax-batch-wait": float,
+        "alias-backend": str,
+        "backoff-factor": float,
+        "backoff-max": int,
+        "discovery-backend": str,
+        "download-chunk-size": int,
         "email": str,
         "exclude-subjects-ids": exclude_subjects_ids_setter,
         "forum-subfolders": str2bool,
+        "html-parser": str,
         "http-status-port": int,
         "http-status-tickrate": int,
+        "incremental-forums": str2bool,
+        "keep-alive": str2bool,
         "logging-level": logging_level_setter,
         "login-retries": int,
         "logout-retries": int,
         "max-logs": int,
+        "persist-session": str2bool,
+        "pool-block": str2bool,
+        "probe-content-types": probe_content_types_setter,
+        "rate-limit-files-bytes": int,
+        "rate-limit-files-requests": float,
+        "rate-limit-html-bytes": int,
+        "rate-limit-html-requests": float,
+        "resolution-cache-ttl": int,
         "retries": int,
+        "retry-budget": int,
         "root-folder": str,
         "section-indexing-ids": section_indexing_setter,
         "secure-section-filename": str2bool,
@@ -389,6 +423,223 @@ class Settings(dict, metaclass=MetaSingleton):
 
         return self["http-status-tickrate"]
 
+    @property
+    def download_chunk_size(self) -> int:
+        """Number of bytes read from the network and written to disk at once.
+
+        Returns:
+            int: download chunk size.
+        """
+
+        return self["download-chunk-size"]
+
+    @property
+    def probe_content_types(self) -> List[str]:
+        """List of content types (`type/subtype` or `type/*`) of the files that
+        are checked with a HEAD request before being downloaded again.
+
+        Returns:
+            List[str]: list of content types.
+        """
+
+        return self["probe-content-types"]
+
+    @property
+    def keep_alive(self) -> bool:
+        """Returns wether the HTTP connections should be reused or not.
+
+        Returns:
+            bool: keep-alive.
+        """
+
+        return self["keep-alive"]
+
+    @property
+    def pool_block(self) -> bool:
+        """Returns wether threads should wait for a free connection when the
+        connection pool is full, instead of opening a new one.
+
+        Returns:
+            bool: pool-block.
+        """
+
+        return self["pool-block"]
+
+    @property
+    def backoff_factor(self) -> float:
+        """Seconds to wait before the first retry of a failed HTTP request. The
+        time is doubled after each failure, and a random jitter is applied.
+
+        Returns:
+            float: backoff factor.
+        """
+
+        return self["backoff-factor"]
+
+    @property
+    def backoff_max(self) -> int:
+        """Max number of seconds to wait before retrying a failed HTTP request.
+
+        Returns:
+            int: backoff max.
+        """
+
+        return self["backoff-max"]
+
+    @property
+    def retry_budget(self) -> int:
+        """Max number of retries of failed HTTP requests shared by the whole
+        execution.
+
+        Returns:
+            int: retry budget.
+        """
+
+        return self["retry-budget"]
+
+    @property
+    def rate_limit_html_requests(self) -> float:
+        """Max number of requests per second to fetch web pages (subjects, folders,
+        forums...), shared by all the threads. Zero means unlimited.
+
+        Returns:
+            float: max requests per second.
+        """
+
+        return self["rate-limit-html-requests"]
+
+    @property
+    def rate_limit_html_bytes(self) -> int:
+        """Max number of bytes per second downloaded in web pages, shared by all the
+        threads. Zero means unlimited.
+
+        Returns:
+            int: max bytes per second.
+        """
+
+        return self["rate-limit-html-bytes"]
+
+    @property
+    def rate_limit_files_requests(self) -> float:
+        """Max number of requests per second to download files, shared by all the
+        threads. Zero means unlimited.
+
+        Returns:
+            float: max requests per second.
+        """
+
+        return self["rate-limit-files-requests"]
+
+    @property
+    def rate_limit_files_bytes(self) -> int:
+        """Max number of bytes per second downloaded in files, shared by all the
+        threads. Zero means unlimited.
+
+        Returns:
+            int: max bytes per second.
+        """
+
+        return self["rate-limit-files-bytes"]
+
+    @property
+    def adaptive_concurrency(self) -> bool:
+        """If True, the number of simultaneous requests is adapted to the server's
+        latency and errors (AIMD), with the number of threads as upper limit.
+
+        Returns:
+            bool: adaptive concurrency enabled.
+        """
+
+        return self["adaptive-concurrency"]
+
+    @property
+    def persist_session(self) -> bool:
+        """If True, the session is not closed at exit. Its cookies and sesskey are saved
+        in the root folder and reused by the next execution.
+
+        Returns:
+            bool: persist session enabled.
+        """
+
+        return self["persist-session"]
+
+    @property
+    def discovery_backend(self) -> str:
+        """Backend used to discover the subjects and their links: `html` (scraping the
+        web pages) or `webservice` (Moodle's REST web service).
+
+        Returns:
+            str: discovery backend.
+        """
+
+        return self["discovery-backend"]
+
+    @property
+    def ajax_batch_size(self) -> int:
+        """Max number of AJAX calls sent in the same request to resolve the file urls of
+        the resources. Zero disables the resolution.
+
+        Returns:
+            int: max AJAX calls per request.
+        """
+
+        return self["ajax-batch-size"]
+
+    @property
+    def ajax_batch_wait(self) -> float:
+        """Max number of seconds an AJAX call waits for other calls to be sent in the
+        same request.
+
+        Returns:
+            float: seconds to wait.
+        """
+
+        return self["ajax-batch-wait"]
+
+    @property
+    def html_parser(self) -> str:
+        """Parser used by BeautifulSoup to parse the web pages: `lxml`, `html.parser` or
+        `html5lib`.
+
+        Returns:
+            str: html parser.
+        """
+
+        return self["html-parser"]
+
+    @property
+    def resolution_cache_ttl(self) -> int:
+        """Seconds the file url of a resource, found through its `view.php` page, is
+        reused before resolving it again. If 0, the resolutions are not cached.
+
+        Returns:
+            int: seconds the resolutions are reused.
+        """
+
+        return self["resolution-cache-ttl"]
+
+    @property
+    def incremental_forums(self) -> bool:
+        """If True, only the forum discussions whose replies or last post changed since
+        they were last downloaded are downloaded.
+
+        Returns:
+            bool: True if only the changed discussions are downloaded.
+        """
+
+        return self["incremental-forums"]
+
+    @property
+    def alias_backend(self) -> str:
+        """Database of the aliases of the files: `json` (`alias.json`) or `sqlite`
+        (`alias.sqlite3`, safe to use from several executions at the same time).
+
+        Returns:
+            str: alias backend (`json` or `sqlite`).
+        """
+
+        return self["alias-backend"]
+
     # DEPENDANT SETTINGS
 
     @property
@@ -759,6 +1010,349 @@ class CheckSettings:
             except ValueError:
                 raise TypeError("Setting secure-section-filename must be bool")
 
+    @classmethod
+    def check_download_chunk_size(cls):
+        """Download chunk size checks.
+
+        Raises:
+            TypeError: if settings.download_chunk_size is not a valid number.
+            ValueError: if settings.download_chunk_size is not positive.
+        """
+
+        if not isinstance(settings.download_chunk_size, int):
+            try:
+                download_chunk_size = int(settings.download_chunk_size)
+                settings["download-chunk-size"] = download_chunk_size
+            except ValueError:
+                raise TypeError("Setting download-chunk-size must be int")
+        if settings.download_chunk_size <= 0:
+            raise ValueError("Setting download-chunk-size must be positive")
+
+    @classmethod
+    def check_probe_content_types(cls):
+        """Probe content types checks.
+
+        Raises:
+            TypeError: if settings.probe_content_types does not return a list.
+            TypeError: if any member of settings.probe_content_types is not a string.
+            ValueError: if any member of settings.probe_content_types is not a valid
+                content type.
+        """
+
+        if not isinstance(settings.probe_content_types, list):
+            raise TypeError("Setting probe-content-types must be list of strings")
+        for content_type in settings.probe_content_types:
+            if not isinstance(content_type, str):
+                raise TypeError(
+                    "All elements of setting probe-content-types must be strings"
+                )
+            if content_type.count("/") != 1:
+                raise ValueError(
+                    "All elements of setting probe-content-types must be content "
+                    "types (type/subtype)"
+                )
+
+    @classmethod
+    def check_keep_alive(cls):
+        """Keep alive check.
+
+        Raises:
+            TypeError: if settings.keep_alive is not a boolean.
+        """
+
+        if not isinstance(settings.keep_alive, bool):
+            try:
+                keep_alive = str2bool(settings.keep_alive)
+                settings["keep-alive"] = keep_alive
+            except ValueError:
+                raise TypeError("Setting keep-alive must be bool")
+
+    @classmethod
+    def check_pool_block(cls):
+        """Pool block check.
+
+        Raises:
+            TypeError: if settings.pool_block is not a boolean.
+        """
+
+        if not isinstance(settings.pool_block, bool):
+            try:
+                pool_block = str2bool(settings.pool_block)
+                settings["pool-block"] = pool_block
+            except ValueError:
+                raise TypeError("Setting pool-block must be bool")
+
+    @classmethod
+    def check_backoff_factor(cls):
+        """Backoff factor checks.
+
+        Raises:
+            TypeError: if settings.backoff_factor is not a valid number.
+            ValueError: if settings.backoff_factor is negative.
+        """
+
+        if not isinstance(settings.backoff_factor, (int, float)):
+            try:
+                backoff_factor = float(settings.backoff_factor)
+                settings["backoff-factor"] = backoff_factor
+            except ValueError:
+                raise TypeError("Setting backoff-factor must be float")
+        if settings.backoff_factor < 0:
+            raise ValueError("Setting backoff-factor must be positive")
+
+    @classmethod
+    def check_backoff_max(cls):
+        """Backoff max checks.
+
+        Raises:
+            TypeError: if settings.backoff_max is not a valid number.
+            ValueError: if settings.backoff_max is negative.
+        """
+
+        if not isinstance(settings.backoff_max, int):
+            try:
+                backoff_max = int(settings.backoff_max)
+                settings["backoff-max"] = backoff_max
+            except ValueError:
+                raise TypeError("Setting backoff-max must be int")
+        if settings.backoff_max < 0:
+            raise ValueError("Setting backoff-max must be positive")
+
+    @classmethod
+    def check_retry_budget(cls):
+        """Retry budget checks.
+
+        Raises:
+            TypeError: if settings.retry_budget is not a valid number.
+            ValueError: if settings.retry_budget is negative.
+        """
+
+        if not isinstance(settings.retry_budget, int):
+            try:
+                retry_budget = int(settings.retry_budget)
+                settings["retry-budget"] = retry_budget
+            except ValueError:
+                raise TypeError("Setting retry-budget must be int")
+        if settings.retry_budget < 0:
+            raise ValueError("Setting retry-budget must be positive")
+
+    @classmethod
+    def check_rate_limit_html_requests(cls):
+        """Rate limit html requests checks.
+
+        Raises:
+            TypeError: if settings.rate_limit_html_requests is not a valid number.
+            ValueError: if settings.rate_limit_html_requests is negative.
+        """
+
+        if not isinstance(settings.rate_limit_html_requests, (int, float)):
+            try:
+                rate_limit_html_requests = float(settings.rate_limit_html_requests)
+                settings["rate-limit-html-requests"] = rate_limit_html_requests
+            except ValueError:
+                raise TypeError("Setting rate-limit-html-requests must be float")
+        if settings.rate_limit_html_requests < 0:
+            raise ValueError("Setting rate-limit-html-requests must be positive")
+
+    @classmethod
+    def check_rate_limit_html_bytes(cls):
+        """Rate limit html bytes checks.
+
+        Raises:
+            TypeError: if settings.rate_limit_html_bytes is not a valid number.
+            ValueError: if settings.rate_limit_html_bytes is negative.
+        """
+
+        if not isinstance(settings.rate_limit_html_bytes, int):
+            try:
+                rate_limit_html_bytes = int(settings.rate_limit_html_bytes)
+                settings["rate-limit-html-bytes"] = rate_limit_html_bytes
+            except ValueError:
+                raise TypeError("Setting rate-limit-html-bytes must be int")
+        if settings.rate_limit_html_bytes < 0:
+            raise ValueError("Setting rate-limit-html-bytes must be positive")
+
+    @classmethod
+    def check_rate_limit_files_requests(cls):
+        """Rate limit files requests checks.
+
+        Raises:
+            TypeError: if settings.rate_limit_files_requests is not a valid number.
+            ValueError: if settings.rate_limit_files_requests is negative.
+        """
+
+        if not isinstance(settings.rate_limit_files_requests, (int, float)):
+            try:
+                rate_limit_files_requests = float(settings.rate_limit_files_requests)
+                settings["rate-limit-files-requests"] = rate_limit_files_requests
+            except ValueError:
+                raise TypeError("Setting rate-limit-files-requests must be float")
+        if settings.rate_limit_files_requests < 0:
+            raise ValueError("Setting rate-limit-files-requests must be positive")
+
+    @classmethod
+    def check_rate_limit_files_bytes(cls):
+        """Rate limit files bytes checks.
+
+        Raises:
+            TypeError: if settings.rate_limit_files_bytes is not a valid number.
+            ValueError: if settings.rate_limit_files_bytes is negative.
+        """
+
+        if not isinstance(settings.rate_limit_files_bytes, int):
+            try:
+                rate_limit_files_bytes = int(settings.rate_limit_files_bytes)
+                settings["rate-limit-files-bytes"] = rate_limit_files_bytes
+            except ValueError:
+                raise TypeError("Setting rate-limit-files-bytes must be int")
+        if settings.rate_limit_files_bytes < 0:
+            raise ValueError("Setting rate-limit-files-bytes must be positive")
+
+    @classmethod
+    def check_adaptive_concurrency(cls):
+        """Adaptive concurrency checks.
+
+        Raises:
+            TypeError: if settings.adaptive_concurrency is not a boolean.
+        """
+
+        if not isinstance(settings.adaptive_concurrency, bool):
+            try:
+                adaptive_concurrency = str2bool(settings.adaptive_concurrency)
+                settings["adaptive-concurrency"] = adaptive_concurrency
+            except ValueError:
+                raise TypeError("Setting adaptive-concurrency must be bool")
+
+    @classmethod
+    def check_persist_session(cls):
+        """Persist session checks.
+
+        Raises:
+            TypeError: if settings.persist_session is not a boolean.
+        """
+
+        if not isinstance(settings.persist_session, bool):
+            try:
+                persist_session = str2bool(settings.persist_session)
+                settings["persist-session"] = persist_session
+            except ValueError:
+                raise TypeError("Setting persist-session must be bool")
+
+    @classmethod
+    def check_discovery_backend(cls):
+        """Discovery backend checks.
+
+        Raises:
+            TypeError: if settings.discovery_backend is not str.
+            ValueError: if settings.discovery_backend is not valid.
+        """
+
+        if not isinstance(settings.discovery_backend, str):
+            raise TypeError("Setting discovery-backend must be str")
+        if settings.discovery_backend not in ("html", "webservice"):
+            raise ValueError(
+                "Setting discovery-backend must be one of html, webservice"
+            )
+
+    @classmethod
+    def check_ajax_batch_size(cls):
+        """Ajax batch size checks.
+
+        Raises:
+            TypeError: if settings.ajax_batch_size is not a valid number.
+            ValueError: if settings.ajax_batch_size is negative.
+        """
+
+        if not isinstance(settings.ajax_batch_size, int):
+            try:
+                ajax_batch_size = int(settings.ajax_batch_size)
+                settings["ajax-batch-size"] = ajax_batch_size
+            except ValueError:
+                raise TypeError("Setting ajax-batch-size must be int")
+        if settings.ajax_batch_size < 0:
+            raise ValueError("Setting ajax-batch-size must be positive")
+
+    @classmethod
+    def check_ajax_batch_wait(cls):
+        """Ajax batch wait checks.
+
+        Raises:
+            TypeError: if settings.ajax_batch_wait is not a valid number.
+            ValueError: if settings.ajax_batch_wait is negative.
+        """
+
+        if not isinstance(settings.ajax_batch_wait, (int, float)):
+            try:
+                ajax_batch_wait = float(settings.ajax_batch_wait)
+                settings["ajax-batch-wait"] = ajax_batch_wait
+            except ValueError:
+                raise TypeError("Setting ajax-batch-wait must be float")
+        if settings.ajax_batch_wait < 0:
+            raise ValueError("Setting ajax-batch-wait must be positive")
+
+    @classmethod
+    def check_html_parser(cls):
+        """Html parser checks.
+
+        Raises:
+            TypeError: if settings.html_parser is not str.
+            ValueError: if settings.html_parser is not valid.
+        """
+
+        if not isinstance(settings.html_parser, str):
+            raise TypeError("Setting html-parser must be str")
+        if settings.html_parser not in ("lxml", "html.parser", "html5lib"):
+            raise ValueError(
+                "Setting html-parser must be one of lxml, html.parser, html5lib"
+            )
+
+    @classmethod
+    def check_resolution_cache_ttl(cls):
+        """Resolution cache ttl checks.
+
+        Raises:
+            TypeError: if settings.resolution_cache_ttl is not a valid number.
+            ValueError: if settings.resolution_cache_ttl is negative.
+        """
+
+        if not isinstance(settings.resolution_cache_ttl, int):
+            try:
+                resolution_cache_ttl = int(settings.resolution_cache_ttl)
+                settings["resolution-cache-ttl"] = resolution_cache_ttl
+            except ValueError:
+                raise TypeError("Setting resolution-cache-ttl must be int")
+        if settings.resolution_cache_ttl < 0:
+            raise ValueError("Setting resolution-cache-ttl must be positive")
+
+    @classmethod
+    def check_incremental_forums(cls):
+        """Incremental forums checks.
+
+        Raises:
+            TypeError: if settings.incremental_forums is not a boolean.
+        """
+
+        if not isinstance(settings.incremental_forums, bool):
+            try:
+                incremental_forums = str2bool(settings.incremental_forums)
+                settings["incremental-forums"] = incremental_forums
+            except ValueError:
+                raise TypeError("Setting incremental-forums must be bool")
+
+    @classmethod
+    def check_alias_backend(cls):
+        """Alias backend checks.
+
+        Raises:
+            TypeError: if settings.alias_backend is not str.
+            ValueError: if settings.alias_backend is not valid.
+        """
+
+        if not isinstance(settings.alias_backend, str):
+            raise TypeError("Setting alias-backend must be str")
+        if settings.alias_backend not in ("json", "sqlite"):
+            raise ValueError("Setting alias-backend must be one of json, sqlite")
+
     @classmethod
     def check_email(cls):
         """Email checks.